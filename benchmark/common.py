@@ -0,0 +1,223 @@
+"""
+Helpers shared by the benchmarks. They are meant to be run inside the mininet
+container (see README), where pox, the controller and the topologies are
+mounted under /tmp, but also work from the root of the repository.
+"""
+import os
+import struct
+import sys
+import time
+import types
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def setup_sys_path():
+    for directory in [
+        os.path.join(ROOT, 'pox'),
+        os.path.join(ROOT, 'pox', 'ext'),       # controller inside the container
+        os.path.join(ROOT, 'controller'),       # controller inside the repository
+        os.path.join(ROOT, 'topology'),
+    ]:
+        if os.path.isdir(directory) and directory not in sys.path:
+            sys.path.insert(0, directory)
+
+
+class MinimalTopo(object):
+    """
+    Stands for mininet.topo.Topo when mininet is not installed, with just what
+    the topologies of the repository use, numbering the ports as mininet does
+    """
+    def __init__(self, *args, **params):
+        self.nodes = []     # [name], in order of addition
+        self.switch_names = set()
+        self.link_list = [] # [(node_1, node_2)]
+        self.ports = {}     # {node: {linked_node: port}}
+
+    def addSwitch(self, name, **opts):
+        self.switch_names.add(name)
+        return self._add_node(name)
+
+    def addHost(self, name, **opts):
+        return self._add_node(name)
+
+    def addLink(self, node_1, node_2, **opts):
+        self.ports[node_1][node_2] = self._new_port(node_1)
+        self.ports[node_2][node_1] = self._new_port(node_2)
+        self.link_list.append((node_1, node_2))
+        return (node_1, node_2)
+
+    def switches(self, sort=True):
+        return [node for node in self.nodes if node in self.switch_names]
+
+    def hosts(self, sort=True):
+        return [node for node in self.nodes if node not in self.switch_names]
+
+    def links(self, sort=False, withKeys=False, withInfo=False):
+        return list(self.link_list)
+
+    def port(self, node_1, node_2):
+        return self.ports[node_1][node_2], self.ports[node_2][node_1]
+
+    def _add_node(self, name):
+        self.nodes.append(name)
+        self.ports[name] = {}
+        return name
+
+    def _new_port(self, node):
+        # switch ports start at 1 and host ones at 0
+        base = 1 if node in self.switch_names else 0
+        return max([base - 1] + list(self.ports[node].values())) + 1
+
+
+def fat_tree_topo(levels):
+    """FatTreeTopo(levels) of topology/fat_tree.py, built over MinimalTopo if mininet is not installed"""
+    try:
+        import mininet.topo
+    except ImportError:
+        mininet = types.ModuleType('mininet')
+        mininet.topo = types.ModuleType('mininet.topo')
+        mininet.topo.Topo = MinimalTopo
+        sys.modules['mininet'] = mininet
+        sys.modules['mininet.topo'] = mininet.topo
+    from fat_tree import FatTreeTopo
+    return FatTreeTopo(levels=levels)
+
+
+OFPT_FLOW_MOD = 14
+OFPT_PACKET_OUT = 13
+OFPT_BARRIER_REQUEST = 18
+
+
+class FakeConnection:
+    """Stands for the connection of a switch, recording what the controller sends to it"""
+    def __init__(self, dpid):
+        self.dpid = dpid
+        self.sent = []
+        self.ports = {}     # {port_no: None}, as the ports pox keeps of the features reply of the switch
+
+    def send(self, data):
+        self.sent.append(data)
+
+    def sent_bytes(self):
+        return sum(len(data) if isinstance(data, bytes) else len(data.pack()) for data in self.sent)
+
+    def count_messages(self, message_type, since=0):
+        """Quantity of OpenFlow messages of message_type sent from the index since of sent"""
+        count = 0
+        for data in self.sent[since:]:
+            data = data if isinstance(data, bytes) else data.pack()
+            offset = 0
+            # several messages can be sent packed together
+            while offset + 8 <= len(data):
+                _, sent_type, length = struct.unpack_from('!BBH', data, offset)
+                if sent_type == message_type:
+                    count += 1
+                offset += max(length, 8)
+        return count
+
+
+class FakeHost:
+    def __init__(self, name, number, link_to_sw):
+        self.name = name
+        self.mac = '00:00:00:00:%02x:%02x' % (number // 256, number % 256)     # as mininet --mac does
+        self.ip = '10.0.%d.%d' % (number // 256, number % 256)
+        self.link_to_sw = link_to_sw
+
+
+def build_fat_tree(levels, graph=None):
+    """
+    Builds the switches of FatTreeTopo(levels) as controller Switch objects
+    linked between them through graph (a new TopologyGraph if not given) and with
+    a FakeConnection, and its hosts as FakeHost.
+    Returns (switches, hosts) with switches with the same shape FatTreeController uses.
+    """
+    from pox.lib.util import dpid_to_str
+    from extensions.switch import Switch
+    from extensions.link_to_switch import LinkToSwitch
+    from extensions.topology_graph import TopologyGraph
+
+    topo = fat_tree_topo(levels)
+    graph = graph if graph is not None else TopologyGraph()
+    switches = {}   # {sw_dpid: Switch}
+    dpids = {}      # {sw_name: sw_dpid}
+    hosts = []      # [FakeHost]
+    for number, name in enumerate(sorted(topo.switches())):
+        dpid = dpid_to_str(number + 1)
+        dpids[name] = dpid
+        switches[dpid] = Switch(dpid, FakeConnection(number + 1))
+        graph.add_switch(switches[dpid])
+
+    for node_1, node_2 in topo.links():
+        port_1, port_2 = topo.port(node_1, node_2)
+        if node_1 in dpids and node_2 in dpids:
+            graph.add_link(switches[dpids[node_1]], port_1, switches[dpids[node_2]], port_2)
+        else:
+            if node_2 in dpids:
+                node_1, node_2, port_1, port_2 = node_2, node_1, port_2, port_1
+            link_to_sw = LinkToSwitch(switches, dpids[node_1], port_1)
+            hosts.append(FakeHost(node_2, len(hosts) + 1, link_to_sw))
+    return switches, hosts
+
+
+class FakePacketIn(object):
+    """Stands for the PacketIn event raised by pox when a switch sends a packet to the controller"""
+    def __init__(self, dpid, port, eth_packet, connection=None):
+        import pox.openflow.libopenflow_01 as of
+        self.dpid = dpid
+        self.port = port
+        self.connection = connection    # FakeConnection of the switch, only needed to reply on it
+        self.data = eth_packet.pack()
+        self.ofp = of.ofp_packet_in(data=self.data, in_port=port, reason=of.OFPR_NO_MATCH)
+        self._parsed = None
+
+    @property
+    def parsed(self):
+        """As pox, the packet is only parsed the first time it is asked for"""
+        from pox.lib.packet import ethernet
+        if self._parsed is None:
+            self._parsed = ethernet(self.data)
+        return self._parsed
+
+
+class FakeBarrierIn:
+    def __init__(self, xid):
+        self.xid = xid
+
+
+def tcp_packet(src_host, dst_host, src_port, dst_port):
+    from pox.lib.packet import ethernet, ipv4, tcp
+    from pox.lib.addresses import EthAddr, IPAddr
+    tcp_packet = tcp(srcport=src_port, dstport=dst_port)
+    tcp_packet.SYN = True
+    ip_packet = ipv4(srcip=IPAddr(src_host.ip), dstip=IPAddr(dst_host.ip), protocol=ipv4.TCP_PROTOCOL)
+    ip_packet.payload = tcp_packet
+    eth_packet = ethernet(src=EthAddr(src_host.mac), dst=EthAddr(dst_host.mac), type=ethernet.IP_TYPE)
+    eth_packet.payload = ip_packet
+    return eth_packet
+
+
+def arp_request(src_host, dst_host):
+    from pox.lib.packet import ethernet, arp
+    from pox.lib.addresses import EthAddr, IPAddr, ETHER_BROADCAST
+    arp_packet = arp()
+    arp_packet.opcode = arp.REQUEST
+    arp_packet.hwsrc = EthAddr(src_host.mac)
+    arp_packet.hwdst = EthAddr('00:00:00:00:00:00')
+    arp_packet.protosrc = IPAddr(src_host.ip)
+    arp_packet.protodst = IPAddr(dst_host.ip)
+    eth_packet = ethernet(src=EthAddr(src_host.mac), dst=ETHER_BROADCAST, type=ethernet.ARP_TYPE)
+    eth_packet.payload = arp_packet
+    return eth_packet
+
+
+def timed(function, repeat=5):
+    """Returns the best wall time in seconds of calling function repeat times"""
+    best = None
+    for _ in range(repeat):
+        start = time.time()
+        function()
+        elapsed = time.time() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
@@ -0,0 +1,82 @@
+"""
+Measures the aggregated TCP throughput of FatTreeTopo under concurrent iperf
+connections between the hosts of the leaves, to compare controller options.
+The controller has to be running before, for example:
+
+    docker-compose exec mininet /tmp/pox/pox.py fat_tree_controller --balancer=load_aware
+    docker-compose exec mininet python /tmp/benchmark/iperf_fat_tree.py [levels] [connections] [seconds]
+
+Running it against the controller with and without --elephant_threshold (for example
+--elephant_threshold=1000000 --stats_interval=2) measures the gain of migrating elephant flows.
+"""
+from __future__ import print_function
+import random
+import re
+import sys
+import time
+from common import setup_sys_path
+
+setup_sys_path()
+
+from mininet.net import Mininet
+from mininet.node import RemoteController, OVSKernelSwitch
+from fat_tree import FatTreeTopo
+
+DISCOVERY_WAIT = 15     # seconds for the controller to discover the links
+
+
+def start_network(levels):
+    net = Mininet(
+        topo=FatTreeTopo(levels=levels),
+        switch=OVSKernelSwitch,
+        controller=RemoteController,
+        autoSetMacs=True,
+        autoStaticArp=True
+    )
+    net.start()
+    time.sleep(DISCOVERY_WAIT)
+    net.pingAll()   # so host_tracker learns every host
+    return net
+
+
+def leaf_hosts(net, topo):
+    # FatTreeTopo adds first the hosts of the root and then the ones of the leaves
+    return [net.get(host) for host in topo.hosts(sort=True)[topo.hosts_on_root:]]
+
+
+def run_iperfs(pairs, seconds):
+    """Runs an iperf per pair at the same time, returns the throughput of each one in Mbits/sec"""
+    servers = [dst.popen(['iperf', '-s']) for _, dst in pairs]
+    time.sleep(1)
+    clients = [src.popen(['iperf', '-c', dst.IP(), '-t', str(seconds), '-f', 'm']) for src, dst in pairs]
+    throughputs = []
+    for client in clients:
+        output = client.communicate()[0]
+        if not isinstance(output, str):
+            output = output.decode()
+        found = re.findall(r'([\d.]+) Mbits/sec', output)
+        throughputs.append(float(found[-1]) if found else 0.0)
+    for server in servers:
+        server.terminate()
+    return throughputs
+
+
+def main(levels, connections, seconds):
+    net = start_network(levels)
+    try:
+        hosts = leaf_hosts(net, net.topo)
+        random.seed(0)
+        pairs = [tuple(random.sample(hosts, 2)) for _ in range(connections)]
+        throughputs = run_iperfs(pairs, seconds)
+        print("levels=%s connections=%s seconds=%s" % (levels, connections, seconds))
+        for (src, dst), throughput in zip(pairs, throughputs):
+            print("%5s -> %-5s %10.2f Mbits/sec" % (src.name, dst.name, throughput))
+        print("aggregated: %10.2f Mbits/sec" % sum(throughputs))
+    finally:
+        net.stop()
+
+
+if __name__ == '__main__':
+    args = [int(arg) for arg in sys.argv[1:]]
+    defaults = [3, 8, 10]
+    main(*(args + defaults[len(args):]))
@@ -0,0 +1,64 @@
+"""
+Measures the packet loss of a ping between two leaf hosts of FatTreeTopo when
+the link its path uses to leave the source switch goes down in the middle of it.
+The controller has to be running before, for example with and without backup paths:
+
+    docker-compose exec mininet /tmp/pox/pox.py fat_tree_controller --backup_paths=True
+    docker-compose exec mininet python /tmp/benchmark/link_failure_loss.py [levels] [seconds]
+"""
+from __future__ import print_function
+import re
+import sys
+import time
+from common import setup_sys_path
+
+setup_sys_path()
+
+from iperf_fat_tree import start_network, leaf_hosts
+
+PING_INTERVAL = 0.01    # seconds between pings
+
+
+def used_output_port(sw, dst):
+    """Output port of the entry of the flow to dst (the backup ones have a priority different to the default)"""
+    for line in sw.cmd('ovs-ofctl dump-flows %s' % sw.name).splitlines():
+        if 'nw_dst=%s' % dst.IP() in line and 'priority=' not in line:
+            found = re.search(r'actions=output:(\d+)', line)
+            if found:
+                return int(found.group(1))
+    return None
+
+
+def main(levels, seconds):
+    net = start_network(levels)
+    try:
+        src, dst = leaf_hosts(net, net.topo)[:2]
+        sw = src.intfs[0].link.intf2.node if src.intfs[0].link.intf1.node == src else src.intfs[0].link.intf1.node
+        count = int(seconds / PING_INTERVAL)
+        ping = src.popen(['ping', '-i', str(PING_INTERVAL), '-c', str(count), dst.IP()])
+        time.sleep(seconds / 3.0)
+
+        port = used_output_port(sw, dst)
+        if port is None:
+            print("No entry found on %s for the ping to %s." % (sw.name, dst.name))
+            return
+        link = sw.intfs[port].link
+        peer = link.intf2.node if link.intf1.node == sw else link.intf1.node
+        print("Bringing down %s-%s, used by the ping %s -> %s." % (sw.name, peer.name, src.name, dst.name))
+        net.configLinkStatus(sw.name, peer.name, 'down')
+
+        output = ping.communicate()[0]
+        if not isinstance(output, str):
+            output = output.decode()
+        loss = re.search(r'([\d.]+)% packet loss', output)
+        received = re.search(r'(\d+) received', output)
+        print("levels=%s pings=%s received=%s loss=%s%%" % (
+            levels, count, received.group(1) if received else '?', loss.group(1) if loss else '?'))
+    finally:
+        net.stop()
+
+
+if __name__ == '__main__':
+    args = [int(arg) for arg in sys.argv[1:]]
+    defaults = [3, 10]
+    main(*(args + defaults[len(args):]))
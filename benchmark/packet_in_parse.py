@@ -0,0 +1,70 @@
+"""
+Compares the reading of the PacketIns of TCP packets straight from their bytes with
+the full parsing by pox the handler did before, first only the extraction of the macs
+and the Flow, then the whole handling of the PacketIns by FatTreeController.
+
+    python /tmp/benchmark/packet_in_parse.py [levels] [packet_ins] [distinct_flows]
+"""
+from __future__ import print_function
+import sys
+import time
+from common import setup_sys_path
+
+setup_sys_path()
+
+from pox.lib.packet import ethernet
+from pox.lib.util import dpid_to_str
+from simulator import Simulator
+from extensions.flow import Flow
+from extensions.packet_in_parser import parse_ip_packet_in
+import fat_tree_controller
+
+
+def full_parse(event):
+    """What the handler did before for every PacketIn"""
+    eth_packet = ethernet(event.data)
+    dpid_to_str(event.dpid)
+    return eth_packet.src.toStr(), eth_packet.dst.toStr(), Flow.of(eth_packet.payload)
+
+
+def fast_parse(event):
+    return parse_ip_packet_in(event.data)
+
+
+def rate(function, events):
+    start = time.time()
+    for event in events:
+        function(event)
+    return len(events) / (time.time() - start)
+
+
+def handler_rate(levels, packet_ins, distinct_flows, fast):
+    simulator = Simulator(levels)
+    simulator.start()
+    events = simulator.build_packet_ins(packet_ins, distinct_flows)
+    if not fast:
+        fat_tree_controller.parse_ip_packet_in = lambda data: None  # always fall back to pox
+    try:
+        return simulator.replay_packet_ins(events)
+    finally:
+        fat_tree_controller.parse_ip_packet_in = parse_ip_packet_in
+
+
+def main(levels, packet_ins, distinct_flows):
+    simulator = Simulator(levels)
+    simulator.start()
+    events = simulator.build_packet_ins(packet_ins, distinct_flows)
+    for event in events[:distinct_flows]:
+        assert full_parse(event) == fast_parse(event)
+
+    print("levels=%s packet_ins=%s distinct_flows=%s" % (levels, packet_ins, distinct_flows))
+    print("parse, pox:          %10.1f PacketIn/s" % rate(full_parse, events))
+    print("parse, from bytes:   %10.1f PacketIn/s" % rate(fast_parse, events))
+    print("handler, pox:        %10.1f PacketIn/s" % handler_rate(levels, packet_ins, distinct_flows, False))
+    print("handler, from bytes: %10.1f PacketIn/s" % handler_rate(levels, packet_ins, distinct_flows, True))
+
+
+if __name__ == '__main__':
+    args = [int(arg) for arg in sys.argv[1:]]
+    defaults = [4, 20000, 200]
+    main(*(args + defaults[len(args):]))
@@ -0,0 +1,77 @@
+"""
+Measures how many PacketIns per second FatTreeController handles on FatTreeTopo,
+replaying TCP connections between random pairs of hosts where the same 5-tuples
+appear again and again (as health checks and retries do), and with as many 5-tuples
+as PacketIns. The suppression of the PacketIns of pending flows is disabled, so every PacketIn
+installs its path again, and each run is on a new controller.
+
+    python /tmp/benchmark/packet_in_rate.py [levels] [packet_ins] [distinct_flows]
+"""
+from __future__ import print_function
+import random
+import sys
+import time
+from common import setup_sys_path, build_fat_tree, FakePacketIn, FakeBarrierIn, tcp_packet
+
+setup_sys_path()
+
+from fat_tree_controller import FatTreeController
+
+
+def build_controller(levels):
+    controller = FatTreeController(pending_flow_ttl=0)
+    switches, hosts = build_fat_tree(levels, controller.graph)
+    controller.switches.update(switches)
+    for sw in switches.values():
+        controller.switches_by_dpid[sw.connection.dpid] = sw
+    for host in hosts:
+        controller.hosts[host.mac] = host.link_to_sw
+        controller.paths_finder.notifyHostAdded(host.link_to_sw.sw_dpid)
+    return controller, hosts
+
+
+def build_packet_ins(hosts, packet_ins, distinct_flows):
+    random.seed(0)
+    flows = []
+    for _ in range(distinct_flows):
+        src_host, dst_host = random.sample(hosts, 2)
+        flows.append((src_host, dst_host, random.randint(1024, 65535), 80))
+    events = []
+    for _ in range(packet_ins):
+        src_host, dst_host, src_port, dst_port = random.choice(flows)
+        link_to_sw = src_host.link_to_sw
+        events.append(FakePacketIn(link_to_sw.sw.connection.dpid, link_to_sw.port,
+                                   tcp_packet(src_host, dst_host, src_port, dst_port)))
+    return events
+
+
+def replay(controller, events):
+    start = time.time()
+    for event in events:
+        controller._handle_PacketIn(event)
+        # the switches reply the barriers right away
+        for xid in list(controller.installations.keys()):
+            controller._handle_BarrierIn(FakeBarrierIn(xid))
+    return len(events) / (time.time() - start)
+
+
+def run(levels, packet_ins, distinct_flows):
+    """PacketIns per second of a new controller"""
+    controller, hosts = build_controller(levels)
+    events = build_packet_ins(hosts, packet_ins, distinct_flows)
+    return replay(controller, events)
+
+
+def main(levels, packet_ins, distinct_flows):
+    repeated = run(levels, packet_ins, distinct_flows)
+    distinct = run(levels, packet_ins, packet_ins)
+
+    print("levels=%s packet_ins=%s distinct_flows=%s" % (levels, packet_ins, distinct_flows))
+    print("repeated flows: %10.1f PacketIn/s" % repeated)
+    print("distinct flows: %10.1f PacketIn/s" % distinct)
+
+
+if __name__ == '__main__':
+    args = [int(arg) for arg in sys.argv[1:]]
+    defaults = [4, 20000, 200]
+    main(*(args + defaults[len(args):]))
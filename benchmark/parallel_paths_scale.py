@@ -0,0 +1,76 @@
+"""
+Measures how long the recompute of the shortest paths between the switches linked to a host
+takes in the pox thread and split among 1, 2, 4 and 8 worker processes, for FatTreeTopo with
+the given levels. For the workers it is the time since the snapshot of the topology until the
+paths are ready to be swapped in, and the time the pox thread is busy taking the snapshot
+and merging the results (the Paths are only built for the pairs asked for later).
+
+    python /tmp/benchmark/parallel_paths_scale.py [levels] [repeat]
+"""
+from __future__ import print_function
+import sys
+import threading
+import time
+from common import setup_sys_path, build_fat_tree, timed
+
+setup_sys_path()
+
+from extensions.shortest_paths_finder import ShortestPathsFinder
+from extensions.parallel_paths_calculator import ParallelPathsCalculator
+from extensions.topology_graph import TopologyGraph
+
+WORKERS = [1, 2, 4, 8]
+
+
+class TimedDelivery:
+    """Delivers the results right away in the thread of the pool instead of the pox one, timing it"""
+    def __init__(self):
+        self.elapsed = 0
+
+    def __call__(self, function, *args):
+        start = time.time()
+        function(*args)
+        self.elapsed = time.time() - start
+
+
+def parallel_recompute(workers, graph, sws, repeat):
+    """Returns (seconds until the paths are delivered, seconds the pox thread would be busy)"""
+    delivery = TimedDelivery()
+    calculator = ParallelPathsCalculator(workers, call_later=delivery)
+    best = None
+    try:
+        for _ in range(repeat):
+            done = threading.Event()
+            start = time.time()
+            calculator.calculate(graph, sws, lambda id_paths, switches: done.set())
+            snapshot = time.time() - start
+            done.wait()
+            result = (time.time() - start, snapshot + delivery.elapsed)
+            best = min(best, result) if best else result
+    finally:
+        calculator.close()
+    return best
+
+
+def main(levels, repeat):
+    graph = TopologyGraph()
+    switches, hosts = build_fat_tree(levels, graph)
+    finder = ShortestPathsFinder(switches, graph)
+    for host in hosts:
+        finder.notifyHostAdded(host.link_to_sw.sw_dpid)
+    sws = finder.get_sws_linked_to_a_host()
+    print("levels=%s switches=%s edge_switches=%s" % (levels, len(switches), len(sws)))
+    print("workers  recompute_ms  blocking_ms")
+    elapsed = timed(finder._calculate_shortest_paths, repeat)
+    print("%7s  %12.2f  %11.2f" % ('pox', elapsed * 1000, elapsed * 1000))
+
+    for workers in WORKERS:
+        elapsed, blocked = parallel_recompute(workers, graph, sws, repeat)
+        print("%7d  %12.2f  %11.2f" % (workers, elapsed * 1000, blocked * 1000))
+
+
+if __name__ == '__main__':
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 6,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    )
@@ -0,0 +1,37 @@
+"""
+Measures how long ShortestPathsFinder takes to recompute the shortest paths between
+the switches linked to a host, for FatTreeTopo with increasing levels. The recompute
+only runs a BFS per origin, the paths of a pair are enumerated the first time they are
+asked for, so it measures as well how long that takes for a pair of them.
+
+    python /tmp/benchmark/paths_recompute.py [max_levels]
+"""
+from __future__ import print_function
+import sys
+from common import setup_sys_path, build_fat_tree, timed
+
+setup_sys_path()
+
+from extensions.shortest_paths_finder import ShortestPathsFinder
+from extensions.topology_graph import TopologyGraph
+
+
+def main(max_levels):
+    print("levels  switches  edge_switches  pair_paths  recompute_ms  get_paths_ms")
+    for levels in range(1, max_levels + 1):
+        graph = TopologyGraph()
+        switches, hosts = build_fat_tree(levels, graph)
+        finder = ShortestPathsFinder(switches, graph)
+        for host in hosts:
+            finder.notifyHostAdded(host.link_to_sw.sw_dpid)
+        elapsed = timed(finder._calculate_shortest_paths)
+        sws = sorted(finder.hosts_per_sw)
+        origin, destiny = sws[0], sws[-1]
+        # only the first call enumerates them, the next ones are served from shortest_paths
+        get_paths = timed(lambda: finder.get_paths(origin, destiny), repeat=1) if origin != destiny else 0
+        pair_paths = len(finder.get_paths(origin, destiny)) if origin != destiny else 0
+        print("%6d  %8d  %13d  %10d  %12.2f  %12.2f" % (
+            levels, len(switches), len(finder.hosts_per_sw), pair_paths, elapsed * 1000, get_paths * 1000))
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 7)
@@ -0,0 +1,61 @@
+"""
+Replays on the simulator of FatTreeTopo, with proxy_arp, rounds of ARP requests in which
+every host asks for the mac of another random host. In the first round the controller only
+knows the ips of the hosts that already asked, so many requests are flooded out of every
+port not linked to another switch. From then on every request is answered.
+For each round it reports the requests answered and flooded, the packet outs sent per
+request and the time the controller takes for each one. A request flooded by the switches
+themselves would instead cross every link between switches of a spanning tree, as shown.
+
+    python benchmark/proxy_arp.py [levels] [rounds]
+"""
+from __future__ import print_function
+import random
+import sys
+import time
+from common import setup_sys_path, arp_request, FakePacketIn, OFPT_PACKET_OUT
+
+setup_sys_path()
+
+from simulator import Simulator
+
+
+def replay_round(simulator):
+    controller = simulator.controller
+    events = []
+    for src_host in simulator.hosts:
+        dst_host = random.choice([host for host in simulator.hosts if host != src_host])
+        link_to_sw = src_host.link_to_sw
+        connection = link_to_sw.sw.connection
+        events.append(FakePacketIn(connection.dpid, link_to_sw.port, arp_request(src_host, dst_host), connection))
+
+    answered, flooded = controller.proxy_arp.answered, controller.proxy_arp.flooded
+    marks = simulator.sent_marks()
+    start = time.time()
+    for event in events:
+        controller._handle_PacketIn(event)
+    elapsed = time.time() - start
+    packet_outs = simulator.count_messages(OFPT_PACKET_OUT, marks)
+    return (controller.proxy_arp.answered - answered, controller.proxy_arp.flooded - flooded,
+            packet_outs / float(len(events)), elapsed / len(events))
+
+
+def main(levels, rounds):
+    random.seed(0)
+    simulator = Simulator(levels, proxy_arp=True)
+    simulator.start()
+    print("levels=%s switches=%s hosts=%s links_between_switches=%s" % (
+        levels, len(simulator.dpids), len(simulator.hosts), len(simulator.links)))
+    # a broadcast flooded through a spanning tree crosses each of its links and reaches every other host
+    print("copies of a broadcast flooded by the switches: %s" % (len(simulator.dpids) - 1 + len(simulator.hosts) - 1))
+    print("round  answered  flooded  packet_outs_per_request  us_per_request")
+    for round_number in range(rounds):
+        answered, flooded, packet_outs, elapsed = replay_round(simulator)
+        print("%5d  %8d  %7d  %23.2f  %14.2f" % (round_number, answered, flooded, packet_outs, elapsed * 1e6))
+
+
+if __name__ == '__main__':
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 4,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    )
@@ -0,0 +1,232 @@
+"""
+Runs FatTreeController without mininet: builds FatTreeTopo of topology/fat_tree.py
+(over a minimal Topo if mininet is not installed), gives every switch a FakeConnection
+that records what the controller sends, and replays into the controller the ConnectionUp,
+LinkEvent, HostEvent and PacketIn events pox would raise. Only pox is needed, so the
+performance of the extensions can be measured on any machine.
+
+It reports, for each configuration of the controller:
+    setup_ms            time to attend the events that bring the whole topology up
+    recompute_ms        time of a full recompute of the shortest paths (an invalidation with lazy_paths)
+    link_flap_ms        time to attend the removal and the addition again of a link between switches
+    packet_in_s         PacketIns attended per second, with the switches replying the barriers right away
+    flow_mods_per_flow  flow mods sent per distinct flow of the PacketIns
+    flow_tables_kb      memory of the local flow tables of the switches after the PacketIns
+    max_rss_mb          peak memory of the process so far
+
+The switches never apply the entries, so every packet of a flow reaches the controller,
+as if the flows were retried over and over.
+
+    python benchmark/simulator.py [levels] [packet_ins] [distinct_flows] [option=value ...]
+
+With options (the ones of fat_tree_controller, e.g. lazy_paths=True) only that configuration
+is run, otherwise every one of SUITE.
+"""
+from __future__ import print_function
+import random
+import resource
+import sys
+import time
+from common import setup_sys_path, fat_tree_topo, timed, FakeConnection, FakeHost, FakePacketIn, \
+    FakeBarrierIn, tcp_packet, OFPT_FLOW_MOD
+
+setup_sys_path()
+
+from pox.lib.addresses import EthAddr
+from pox.lib.util import dpid_to_str
+from fat_tree_controller import FatTreeController
+from extensions.link_to_switch import LinkToSwitch
+
+SUITE = [
+    ('default', {}),
+    ('incremental', {'incremental_paths': True}),
+    ('lazy', {'lazy_paths': True}),
+    ('pending', {'pending_flow_ttl': 1}),
+    ('destination', {'forwarding': 'destination'}),
+    ('backup', {'backup_paths': True}),
+]
+
+
+class FakeConnectionUp:
+    def __init__(self, dpid, connection):
+        self.dpid = dpid
+        self.connection = connection
+
+
+class FakeLink:
+    def __init__(self, dpid1, port1, dpid2, port2):
+        self.dpid1 = dpid1
+        self.port1 = port1
+        self.dpid2 = dpid2
+        self.port2 = port2
+
+
+class FakeLinkEvent:
+    def __init__(self, link, added):
+        self.link = link
+        self.added = added
+        self.removed = not added
+
+
+class FakeHostEntry:
+    def __init__(self, dpid, port, mac):
+        self.dpid = dpid
+        self.port = port
+        self.macaddr = EthAddr(mac)
+        self.ipAddrs = {}   # host_tracker only knows them after the host sends an IP packet
+
+
+class FakeHostEvent:
+    def __init__(self, entry, leave=False):
+        self.entry = entry
+        self.leave = leave
+
+
+class Simulator:
+    def __init__(self, levels, **controller_options):
+        self.topo = fat_tree_topo(levels)
+        self.controller = FatTreeController(**controller_options)
+        self.dpids = {}         # {sw_name: dpid}, as the ints pox gives
+        self.connections = {}   # {dpid: FakeConnection}
+        self.links = []         # [FakeLink] between switches
+        self.hosts = []         # [FakeHost]
+        for number, name in enumerate(sorted(self.topo.switches())):
+            self.dpids[name] = number + 1
+            self.connections[number + 1] = FakeConnection(number + 1)
+
+    def start(self):
+        """Brings up the switches, then the links between them and last the hosts"""
+        for dpid, connection in sorted(self.connections.items()):
+            self.controller._handle_ConnectionUp(FakeConnectionUp(dpid, connection))
+
+        host_links = []
+        for node_1, node_2 in self.topo.links():
+            port_1, port_2 = self.topo.port(node_1, node_2)
+            for node, port in [(node_1, port_1), (node_2, port_2)]:
+                if node in self.dpids:
+                    self.connections[self.dpids[node]].ports[port] = None
+            if node_1 in self.dpids and node_2 in self.dpids:
+                link = FakeLink(self.dpids[node_1], port_1, self.dpids[node_2], port_2)
+                self.links.append(link)
+                self.link_event(link, added=True)
+            else:
+                if node_2 in self.dpids:
+                    node_1, node_2, port_1 = node_2, node_1, port_2
+                host_links.append((node_2, self.dpids[node_1], port_1))
+
+        for host_name, dpid, port in host_links:
+            link_to_sw = LinkToSwitch(self.controller.switches, dpid_to_str(dpid), port)
+            host = FakeHost(host_name, len(self.hosts) + 1, link_to_sw)
+            self.hosts.append(host)
+            self.controller._handle_HostEvent(FakeHostEvent(FakeHostEntry(dpid, port, host.mac)))
+
+    def link_event(self, link, added):
+        # openflow_discovery raises the event once for each direction of the link
+        reverse = FakeLink(link.dpid2, link.port2, link.dpid1, link.port1)
+        for event_link in [link, reverse]:
+            self.controller._handle_LinkEvent(FakeLinkEvent(event_link, added))
+
+    def flap_link(self, link):
+        self.link_event(link, added=False)
+        self.link_event(link, added=True)
+
+    def build_packet_ins(self, packet_ins, distinct_flows):
+        """PacketIns of the first packet of random TCP flows between hosts"""
+        random.seed(0)
+        flows = []
+        while len(flows) < distinct_flows:
+            src_host, dst_host = random.sample(self.hosts, 2)
+            flows.append((src_host, dst_host, random.randint(1024, 65535), 80))
+        events = []
+        for _ in range(packet_ins):
+            src_host, dst_host, src_port, dst_port = random.choice(flows)
+            link_to_sw = src_host.link_to_sw
+            events.append(FakePacketIn(link_to_sw.sw.connection.dpid, link_to_sw.port,
+                                       tcp_packet(src_host, dst_host, src_port, dst_port)))
+        return events
+
+    def replay_packet_ins(self, events):
+        """Returns the PacketIns attended per second"""
+        start = time.time()
+        for event in events:
+            self.controller._handle_PacketIn(event)
+            # the switches reply the barriers right away
+            for xid in list(self.controller.installations.keys()):
+                self.controller._handle_BarrierIn(FakeBarrierIn(xid))
+        return len(events) / (time.time() - start)
+
+    def sent_marks(self):
+        return dict((dpid, len(connection.sent)) for dpid, connection in self.connections.items())
+
+    def count_messages(self, message_type, marks):
+        """Quantity of messages of message_type sent to every switch since the marks of sent_marks"""
+        return sum(
+            connection.count_messages(message_type, marks.get(dpid, 0))
+            for dpid, connection in self.connections.items()
+        )
+
+    def flow_tables_memory(self):
+        return sum(sw.flow_table_gauge()[1] for sw in self.controller.switches.values())
+
+
+def max_rss_mb():
+    # kilobytes on linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+
+def run(levels, packet_ins, distinct_flows, **controller_options):
+    simulator = Simulator(levels, **controller_options)
+    start = time.time()
+    simulator.start()
+    setup = time.time() - start
+
+    finder = simulator.controller.paths_finder
+    recompute = timed(finder._invalidate_paths if finder.lazy else finder._calculate_shortest_paths, repeat=3)
+    link_flap = timed(lambda: simulator.flap_link(simulator.links[-1]), repeat=3) if simulator.links else 0
+
+    events = simulator.build_packet_ins(packet_ins, distinct_flows)
+    marks = simulator.sent_marks()
+    packet_in_rate = simulator.replay_packet_ins(events)
+    flow_mods = simulator.count_messages(OFPT_FLOW_MOD, marks)
+    return {
+        'setup_ms': setup * 1000,
+        'recompute_ms': recompute * 1000,
+        'link_flap_ms': link_flap * 1000,
+        'packet_in_s': packet_in_rate,
+        'flow_mods_per_flow': flow_mods / float(distinct_flows),
+        'flow_tables_kb': simulator.flow_tables_memory() / 1024.0,
+        'max_rss_mb': max_rss_mb(),
+    }
+
+
+def parse_option(value):
+    if value in ['True', 'False']:
+        return value == 'True'
+    for parse in [int, float]:
+        try:
+            return parse(value)
+        except ValueError:
+            pass
+    return value
+
+
+COLUMNS = ['setup_ms', 'recompute_ms', 'link_flap_ms', 'packet_in_s', 'flow_mods_per_flow',
+           'flow_tables_kb', 'max_rss_mb']
+
+
+def main(levels, packet_ins, distinct_flows, options):
+    suite = [(' '.join(options), dict(
+        (key, parse_option(value)) for key, value in (option.split('=', 1) for option in options)
+    ))] if options else SUITE
+    print("levels=%s packet_ins=%s distinct_flows=%s" % (levels, packet_ins, distinct_flows))
+    print("%-12s %s" % ('config', ' '.join('%12s' % column[:12] for column in COLUMNS)))
+    for name, controller_options in suite:
+        report = run(levels, packet_ins, distinct_flows, **controller_options)
+        print("%-12s %s" % (name, ' '.join('%12.2f' % report[column] for column in COLUMNS)))
+
+
+if __name__ == '__main__':
+    numbers = [int(arg) for arg in sys.argv[1:] if '=' not in arg]
+    options = [arg for arg in sys.argv[1:] if '=' in arg]
+    defaults = [4, 5000, 200]
+    main(*(numbers + defaults[len(numbers):] + [options]))
@@ -0,0 +1,51 @@
+"""
+Measures the memory of the TopologyGraph and the Switch links of FatTreeTopo with
+increasing levels (1023 switches with 10 levels), and how long a BFS from an edge
+switch takes over it, estimating the recompute of the DAGs of every edge switch.
+
+    python /tmp/benchmark/topology_graph_scale.py [max_levels] [sampled_origins]
+"""
+from __future__ import print_function
+import random
+import sys
+from common import setup_sys_path, build_fat_tree, timed
+
+setup_sys_path()
+
+from extensions.topology_graph import TopologyGraph
+from extensions.shortest_paths_dag import ShortestPathsDag
+
+
+def graph_size(graph):
+    return sys.getsizeof(graph.ids) + sys.getsizeof(graph.switches) + \
+        sys.getsizeof(graph.adjacency) + sum(map(sys.getsizeof, graph.adjacency)) + \
+        sys.getsizeof(graph.ports) + sum(map(sys.getsizeof, graph.ports))
+
+
+def switch_links_size(switches):
+    return sum(
+        sys.getsizeof(sw) + sys.getsizeof(sw.links) + sys.getsizeof(sw.ports_by_switch)
+        for sw in switches.values()
+    )
+
+
+def main(max_levels, sampled_origins):
+    random.seed(0)
+    print("levels  switches  links  graph_kb  switch_links_kb  bfs_ms  edge_dags_ms")
+    for levels in range(1, max_levels + 1):
+        graph = TopologyGraph()
+        switches, hosts = build_fat_tree(levels, graph)
+        links = sum(map(len, graph.adjacency)) // 2
+        edge_sws = list(set(host.link_to_sw.sw for host in hosts))
+        origins = random.sample(edge_sws, min(sampled_origins, len(edge_sws)))
+        elapsed = timed(lambda: [ShortestPathsDag(graph, sw) for sw in origins], repeat=3) / len(origins)
+        print("%6d  %8d  %5d  %8.1f  %15.1f  %6.2f  %12.2f" % (
+            levels, len(switches), links, graph_size(graph) / 1024.0,
+            switch_links_size(switches) / 1024.0, elapsed * 1000, elapsed * len(edge_sws) * 1000))
+
+
+if __name__ == '__main__':
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 10,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 16
+    )
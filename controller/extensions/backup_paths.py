@@ -0,0 +1,43 @@
+class BackupPaths:
+    """
+    Backup entries of the installed flows. For every switch of the path of a flow, another
+    of the equal cost paths that leaves the switch through a different port is taken, and
+    its hops from that switch are installed with a priority lower than the flow entries.
+    OpenFlow 1.0 has no fast failover groups, so they are emulated with these entries: when a port
+    goes down the controller deletes the entries through it on the PortStatus of the switch, and the
+    backup entry takes over without waiting for the link to be timed out and the flow to be repaired.
+    """
+    def __init__(self, paths_finder):
+        self.paths_finder = paths_finder
+        self.backups = {}   # {Flow: [(sw, output_port)]} of the installed backup entries
+
+    def install(self, flow, path):
+        """path is the list of (sw, output_port) the flow goes through, up to the host"""
+        self.remove(flow)
+        host_port = path[-1][1]
+        candidates = [
+            [(sw, output_port or host_port) for sw, output_port in candidate]
+            for candidate in self.paths_finder.get_paths(path[0][0].dpid, path[-1][0].dpid)
+        ]
+        path_sws = set(sw for sw, _ in path)
+        backup_ports = {}   # {sw: output_port}
+
+        for i, (sw, output_port) in enumerate(path[:-1]):
+            for candidate in candidates:
+                # equal cost paths have the switches at the same distance from the origin
+                if candidate[i][0] != sw or candidate[i][1] == output_port:
+                    continue
+                backup_ports.setdefault(sw, candidate[i][1])
+                for backup_sw, backup_port in candidate[i + 1:]:
+                    # from the switches of the path the flow entries are used
+                    if backup_sw not in path_sws:
+                        backup_ports.setdefault(backup_sw, backup_port)
+                break
+
+        for sw, output_port in backup_ports.items():
+            sw.set_backup_output(flow, output_port)
+        self.backups[flow] = list(backup_ports.items())
+
+    def remove(self, flow):
+        for sw, _ in self.backups.pop(flow, []):
+            sw.remove_backup_output(flow)
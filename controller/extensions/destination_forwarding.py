@@ -0,0 +1,100 @@
+import zlib
+from pox.core import core
+from shortest_paths_dag import ShortestPathsDag
+from recompute_scheduler import RecomputeScheduler
+
+log = core.getLogger()
+
+class DestinationForwarding:
+    """
+    Proactive forwarding by destination: every switch gets one entry per known host,
+    matching its mac as destination and outputting to the next hop of a shortest path
+    towards the switch linked to the host, so the quantity of entries scales with the hosts
+    instead of with the flows.
+    When a switch has many equal cost next hops, the one used is chosen by a hash of the
+    destination, so the destinations are spread between them.
+    """
+    def __init__(self, switches, graph, hosts, quiet_window=0):
+        self.switches = switches    # {sw_dpid: Switch}
+        self.graph = graph          # TopologyGraph
+        self.hosts = hosts          # {host_mac: LinkToSwitch}
+        self.dags = {}              # {sw_dpid: ShortestPathsDag} of the switches linked to a host, shared by its hosts
+        self.recompute_scheduler = RecomputeScheduler(self.sync, quiet_window) \
+            if quiet_window > 0 else None
+
+    def notifyTopologyChanged(self):
+        if self.recompute_scheduler:
+            self.recompute_scheduler.notify()
+        else:
+            self.sync()
+
+    def notifyHostChanged(self, host_mac):
+        """Only the entries of the host change when it joins, moves or leaves"""
+        if self.recompute_scheduler and self.recompute_scheduler.is_pending():
+            return  # the pending sync will install them
+        self._sync_host(host_mac)
+
+    def notifyLinkChanged(self, sw_1, sw_2):
+        """
+        Must be called once the link between sw_1 and sw_2 is already added or removed.
+        Only the entries of the hosts of the switches whose shortest paths the link is or could be part of change
+        """
+        if self.recompute_scheduler:
+            self.recompute_scheduler.notify()
+            return
+        # a link between switches at the same distance is not part of any shortest path from it
+        affected_sw_dpids = set(
+            sw_dpid for sw_dpid, dag in self.dags.items() if dag.distance_to(sw_1) != dag.distance_to(sw_2)
+        )
+        for sw_dpid in affected_sw_dpids:
+            del self.dags[sw_dpid]
+        for host_mac, link_to_sw in list(self.hosts.items()):
+            if link_to_sw.sw_dpid in affected_sw_dpids:
+                self._sync_host(host_mac)
+        log.debug("Destination entries synced for the link between %s and %s: %s switches linked to hosts affected.",
+                  sw_1, sw_2, len(affected_sw_dpids))
+
+    def notifyEntriesDeleted(self):
+        """Installs again the entries some switch deleted, as the ones through a port that went down"""
+        if self.recompute_scheduler and self.recompute_scheduler.is_pending():
+            return  # the pending sync will install them
+        for host_mac in list(self.hosts.keys()):
+            self._sync_host(host_mac)
+
+    def get_output_port(self, sw, host_mac):
+        return sw.destination_ports.get(host_mac, None)
+
+    def sync(self):
+        """Installs, modifies or removes the entries of every switch to match the actual hosts and links"""
+        self.dags = {}
+        for host_mac in list(self.hosts.keys()):
+            self._sync_host(host_mac)
+
+        for sw in self.switches.values():
+            for host_mac in list(sw.destination_ports.keys()):
+                if host_mac not in self.hosts:
+                    sw.remove_destination_output(host_mac)
+        log.debug("Destination entries synced for %s hosts on %s switches.", len(self.hosts), len(self.switches))
+
+    def _sync_host(self, host_mac):
+        """Installs, modifies or removes the entries of the host on every switch"""
+        link_to_sw = self.hosts.get(host_mac, None)
+        if not link_to_sw or link_to_sw.sw_dpid not in self.switches:
+            for sw in self.switches.values():
+                sw.remove_destination_output(host_mac)
+            return
+        sw_destiny = link_to_sw.sw
+        dag = self.dags.get(sw_destiny.dpid, None)
+        if dag is None:
+            dag = self.dags[sw_destiny.dpid] = ShortestPathsDag(self.graph, sw_destiny)
+        spread = zlib.crc32(host_mac.encode()) & 0xffffffff
+
+        for sw in self.switches.values():
+            if sw == sw_destiny:
+                sw.set_destination_output(host_mac, link_to_sw.port)
+                continue
+            output_ports = sorted(dag.next_ports_to_origin(sw))
+            if output_ports:
+                sw.set_destination_output(host_mac, output_ports[spread % len(output_ports)])
+            else:
+                sw.remove_destination_output(host_mac)  # no path to the host
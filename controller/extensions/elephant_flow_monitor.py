@@ -0,0 +1,143 @@
+import time
+import pox.openflow.libopenflow_01 as of
+from pox.core import core
+from pox.lib.recoco import Timer
+from flow import Flow
+from path_installation import PathInstallation
+
+log = core.getLogger()
+
+class ElephantFlowMonitor:
+    """
+    Polls periodically the statistics of the entries of the first switch of every installed
+    flow. The flows that send more than threshold bytes per second are migrated to the equal
+    cost path that would be the least loaded with them, according to a LinkLoadMonitor.
+    The migration is make-before-break: the new hops after the first switch are installed,
+    once applied the first switch is modified to use them, and only then the old hops are removed.
+    If a switch does not reply the barrier of a step, the migration is undone, and if neither the undo
+    is confirmed the flow is left with the entries of both paths, as the old hops could still be in use.
+    Only the entries of the flows are measured, the backup ones have the same match and another priority.
+    The statistics replies have to be given to update.
+    """
+    def __init__(self, switches, installed_flows, paths_finder, load_monitor, commit, interval, threshold,
+                 backup_paths=None):
+        self.switches = switches                # {sw_dpid: Switch}
+        self.installed_flows = installed_flows  # InstalledFlows
+        self.paths_finder = paths_finder
+        self.load_monitor = load_monitor
+        self.commit = commit                    # commits a PathInstallation
+        self.interval = interval                # seconds between polls
+        self.threshold = threshold              # bytes per second from which a flow is an elephant
+        self.backup_paths = backup_paths        # BackupPaths, reinstalled along the new path of a migrated flow
+        self.last_bytes = {}                    # {Flow: (time, byte_count)}
+        self.migrating = set()                  # flows being migrated
+        # counters
+        self.elephants_detected = 0
+        self.migrations = 0
+        self.timer = None
+
+    def start(self):
+        self.timer = Timer(self.interval, self.poll, recurring=True)
+
+    def poll(self):
+        first_sws = set(path[0][0] for path in self.installed_flows.paths.values())
+        for sw in first_sws:
+            if sw.dpid in self.switches:
+                sw.connection.send(of.ofp_stats_request(body=of.ofp_flow_stats_request()))
+        # forget the flows that are not installed anymore
+        for flow in [flow for flow in self.last_bytes if flow not in self.installed_flows]:
+            del self.last_bytes[flow]
+
+    def update(self, sw_dpid, flows_stats):
+        now = time.time()
+        for flow_stats in flows_stats:
+            if flow_stats.priority != of.OFP_DEFAULT_PRIORITY:
+                continue    # the backup entry of the flow, with its own byte count
+            flow = Flow.of_match(flow_stats.match)
+            path = self.installed_flows.get(flow)
+            if not path or path[0][0].dpid != sw_dpid:
+                continue    # only the first switch of the path is measured
+            last = self.last_bytes.get(flow)
+            self.last_bytes[flow] = (now, flow_stats.byte_count)
+            if last is None or now <= last[0] or flow_stats.byte_count < last[1]:
+                continue
+            rate = (flow_stats.byte_count - last[1]) / (now - last[0])
+            if rate > self.threshold and flow not in self.migrating:
+                self.elephants_detected += 1
+                self._migrate(flow, path, rate)
+
+    def _migrate(self, flow, old_path, rate):
+        first_sw, last_sw = old_path[0][0], old_path[-1][0]
+        host_port = old_path[-1][1]
+        old_load = self.load_monitor.get_path_load(old_path)
+
+        new_path, new_load = None, None
+        for candidate in self.paths_finder.get_paths(first_sw.dpid, last_sw.dpid):
+            candidate = [(sw, output_port or host_port) for sw, output_port in candidate]
+            if candidate == old_path:
+                continue
+            load = self.load_monitor.get_path_load(candidate) + rate
+            if new_path is None or load < new_load:
+                new_path, new_load = candidate, load
+        if new_path is None or new_load >= old_load:
+            return  # there is no better path
+
+        log.info("Migrating elephant flow %s of %.0f bytes/s from %s to %s.", flow, rate, old_path, new_path)
+        self.migrating.add(flow)
+        make = PathInstallation()
+        for sw, output_port in new_path[1:]:
+            make.add_action_output(sw, flow, output_port)
+        make.add_callback(lambda: self._switch_first_hop(make, flow, old_path, new_path))
+        self.commit(make)
+
+    def _switch_first_hop(self, make, flow, old_path, new_path):
+        if not make.confirmed:
+            self._abort_migration(flow, old_path, new_path)
+            return
+        switch = PathInstallation()
+        first_sw, output_port = new_path[0]
+        switch.add_action_output(first_sw, flow, output_port)
+        switch.add_callback(lambda: self._break_old_hops(switch, flow, old_path, new_path))
+        self.commit(switch)
+
+    def _abort_migration(self, flow, old_path, new_path):
+        """The new hops could be not applied, so the flow is left on its old path"""
+        log.warn("New hops of the elephant flow %s not confirmed, keeping it on %s.", flow, old_path)
+        old_ports = dict(old_path)
+        for sw, _ in new_path[1:]:
+            if sw.dpid not in self.switches:
+                continue
+            if sw in old_ports:
+                sw.add_action_output(flow, old_ports[sw])
+            else:
+                sw.remove_action_output(flow)
+        self.migrating.discard(flow)
+
+    def _break_old_hops(self, switch, flow, old_path, new_path):
+        if not switch.confirmed:
+            # the first switch could send the flow through any of both paths, so it is sent back to the old one
+            log.warn("First hop of the elephant flow %s not confirmed, moving it back to %s.", flow, old_path)
+            revert = PathInstallation()
+            first_sw, output_port = old_path[0]
+            revert.add_action_output(first_sw, flow, output_port)
+            revert.add_callback(lambda: self._undo_new_hops(revert, flow, old_path, new_path))
+            self.commit(revert)
+            return
+        new_sws = set(sw for sw, _ in new_path)
+        for sw, _ in old_path:
+            if sw not in new_sws:
+                sw.remove_action_output(flow)
+        self.installed_flows.add(flow, new_path)
+        if self.backup_paths:
+            # the old backups lead to the hops of the old path
+            self.backup_paths.install(flow, new_path)
+        self.migrating.discard(flow)
+        self.migrations += 1
+
+    def _undo_new_hops(self, revert, flow, old_path, new_path):
+        if revert.confirmed:
+            self._abort_migration(flow, old_path, new_path)
+        else:
+            # the old hops are kept as the first switch could still use them, and the new ones as well
+            log.warn("First hop of the elephant flow %s not confirmed again, keeping the hops of both paths.", flow)
+            self.migrating.discard(flow)
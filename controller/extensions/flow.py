@@ -1,19 +1,64 @@
+import weakref
 from pox.lib.packet import ipv4
 
-class Flow:
+class Flow(object):
+    """
+    5-tuple of a connection. Flows are interned: Flow.intern and Flow.of return the same
+    instance for the same 5-tuple while it is in use, so it is cheap to hash and compare
+    and can be used as key of the caches.
+    """
+    __slots__ = ('src_ip', 'src_port', 'dst_ip', 'dst_port', 'protocol',
+                 '_key', '_hash', '_reverse', '__weakref__')
+    _interned = weakref.WeakValueDictionary()     # {flow_key: Flow}
+
     def __init__(self, src_ip, src_port, dst_ip, dst_port, protocol):
         self.src_ip = src_ip
         self.src_port = src_port
         self.dst_ip = dst_ip
         self.dst_port = dst_port
         self.protocol = protocol
+        self._key = (protocol, src_ip, src_port, dst_ip, dst_port)
+        self._hash = hash(self._key)
+        self._reverse = None
+
+    def __repr__(self):
+        return str(self._key)
+
+    def __eq__(self, other):
+        return isinstance(other, Flow) and self._key == other._key
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return self._hash
+
+    def key(self):
+        """Fields of the exact match of the flow, to index it"""
+        return self._key
 
     def reverse(self):
-        return Flow(self.dst_ip, self.dst_port, self.src_ip, self.src_port, self.protocol)
+        if self._reverse is None:
+            self._reverse = Flow.intern(self.dst_ip, self.dst_port, self.src_ip, self.src_port, self.protocol)
+            self._reverse._reverse = self
+        return self._reverse
+
+    @staticmethod
+    def intern(src_ip, src_port, dst_ip, dst_port, protocol):
+        key = (protocol, src_ip, src_port, dst_ip, dst_port)
+        flow = Flow._interned.get(key)
+        if flow is None:
+            flow = Flow(src_ip, src_port, dst_ip, dst_port, protocol)
+            Flow._interned[key] = flow
+        return flow
+
+    @staticmethod
+    def of_match(match):
+        return Flow.intern(match.nw_src, match.tp_src, match.nw_dst, match.tp_dst, match.nw_proto)
 
     @staticmethod
     def of(ip_pkt):
         inner_pkt = ip_pkt.payload    # TCP, UDP or ICMP packet
         src_port = inner_pkt.srcport if ip_pkt.protocol != ipv4.ICMP_PROTOCOL else None     # Sets 0 to ports
         dst_port = inner_pkt.dstport if ip_pkt.protocol != ipv4.ICMP_PROTOCOL else None     # (ofp_match default) since ICMP
-        return Flow(ip_pkt.srcip, src_port, ip_pkt.dstip, dst_port, ip_pkt.protocol)        # doesn't have ports in header
+        return Flow.intern(ip_pkt.srcip, src_port, ip_pkt.dstip, dst_port, ip_pkt.protocol) # doesn't have ports in header
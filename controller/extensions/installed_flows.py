@@ -0,0 +1,45 @@
+class InstalledFlows:
+    """
+    Paths through which every installed flow goes, as lists of (sw, output_port),
+    indexed by the links they go through so the flows affected by a link can be found
+    """
+    def __init__(self):
+        self.paths = {}             # {Flow: [(sw, output_port)]}
+        self.flows_by_link = {}     # {(sw_dpid, output_port): set(Flow)}
+
+    def __len__(self):
+        return len(self.paths)
+
+    def __contains__(self, flow):
+        return flow in self.paths
+
+    def get(self, flow):
+        return self.paths.get(flow, None)
+
+    def add(self, flow, path):
+        self.remove(flow)
+        self.paths[flow] = path
+        for sw, output_port in path:
+            self.flows_by_link.setdefault((sw.dpid, output_port), set()).add(flow)
+
+    def remove(self, flow):
+        path = self.paths.pop(flow, None)
+        for sw, output_port in path or []:
+            flows = self.flows_by_link.get((sw.dpid, output_port))
+            if flows is not None:
+                flows.discard(flow)
+                if not flows:
+                    del self.flows_by_link[(sw.dpid, output_port)]
+        return path
+
+    def flows_through(self, sw_dpid, output_port):
+        """Flows whose path goes out of the switch through the port"""
+        return set(self.flows_by_link.get((sw_dpid, output_port), ()))
+
+    def flows_through_switch(self, sw_dpid):
+        """Flows whose path goes through the switch"""
+        flows = set()
+        for (link_sw_dpid, _), flows_of_link in self.flows_by_link.items():
+            if link_sw_dpid == sw_dpid:
+                flows.update(flows_of_link)
+        return flows
@@ -0,0 +1,51 @@
+import time
+import pox.openflow.libopenflow_01 as of
+from pox.core import core
+from pox.lib.recoco import Timer
+
+log = core.getLogger()
+
+class LinkLoadMonitor:
+    """
+    Polls periodically the port statistics of every switch and keeps an exponentially
+    weighted moving average of the bytes per second transmitted by each of its ports.
+    The statistics replies have to be given to update.
+    """
+    def __init__(self, switches, interval, alpha=0.5):
+        self.switches = switches    # {sw_dpid: Switch}
+        self.interval = interval    # seconds between polls
+        self.alpha = alpha          # weight of the last measure in the average
+        self.last_tx_bytes = {}     # {(sw_dpid, port): (time, tx_bytes)}
+        self.loads = {}             # {(sw_dpid, port): bytes per second}
+        self.listeners = []         # called with the sw_dpid every time its loads are updated
+        self.timer = None
+
+    def start(self):
+        self.timer = Timer(self.interval, self.poll, recurring=True)
+
+    def addListener(self, listener):
+        self.listeners.append(listener)
+
+    def poll(self):
+        for sw in self.switches.values():
+            sw.connection.send(of.ofp_stats_request(body=of.ofp_port_stats_request()))
+
+    def update(self, sw_dpid, ports_stats):
+        now = time.time()
+        for port_stats in ports_stats:
+            key = (sw_dpid, port_stats.port_no)
+            last = self.last_tx_bytes.get(key)
+            self.last_tx_bytes[key] = (now, port_stats.tx_bytes)
+            if last is None or now <= last[0] or port_stats.tx_bytes < last[1]:
+                continue    # first measure or the counters were reset
+            rate = (port_stats.tx_bytes - last[1]) / (now - last[0])
+            self.loads[key] = self.alpha * rate + (1 - self.alpha) * self.loads.get(key, rate)
+        for listener in self.listeners:
+            listener(sw_dpid)
+
+    def get_load(self, sw_dpid, port):
+        return self.loads.get((sw_dpid, port), 0)
+
+    def get_path_load(self, path):
+        """Load of the most loaded link of the path"""
+        return max([self.get_load(sw.dpid, port) for sw, port in path if port] or [0])
@@ -1,4 +1,6 @@
-class LinkToSwitch:
+class LinkToSwitch(object):
+    __slots__ = ('switches', 'sw_dpid', 'port')
+
     def __init__(self, switches, sw_dpid, port):
         self.switches = switches
         self.sw_dpid = sw_dpid
@@ -0,0 +1,47 @@
+class LoadAwarePathBalancer:
+    """
+    Selects the least loaded of the equal cost paths, according to the loads measured
+    by a LinkLoadMonitor. As the loads are only updated on every poll, the flows assigned
+    to a link since its last update are accounted as new_flow_load bytes per second each,
+    so a burst of new flows is not sent to the same path. Ties are broken by round robin.
+    """
+    def __init__(self, load_monitor, new_flow_load=125000):
+        self.load_monitor = load_monitor
+        self.new_flow_load = new_flow_load
+        self.recent_flows = {}  # {(sw_dpid, port): flows assigned since its last load update}
+        self.next_path_i = {}   # {(src, dst): index from which the ties are broken}
+        load_monitor.addListener(self._loads_updated)
+
+    def get_balanced(self, src_id, dst_id, possible_paths):
+        key = (src_id, dst_id)
+        start = self.next_path_i.get(key, 0) % len(possible_paths)
+        self.next_path_i[key] = start + 1
+
+        selected_path, selected_load = None, None
+        for i in range(len(possible_paths)):
+            path = possible_paths[(start + i) % len(possible_paths)]
+            load = self._get_path_load(path)
+            if selected_path is None or load < selected_load:
+                selected_path, selected_load = path, load
+
+        for sw, port in selected_path:
+            if port:
+                hop = (sw.dpid, port)
+                self.recent_flows[hop] = self.recent_flows.get(hop, 0) + 1
+        return selected_path
+
+    def _get_path_load(self, path):
+        return max([
+            self.load_monitor.get_load(sw.dpid, port) + self.recent_flows.get((sw.dpid, port), 0) * self.new_flow_load
+            for sw, port in path if port
+        ] or [0])
+
+    def _loads_updated(self, sw_dpid):
+        for hop in [hop for hop in self.recent_flows if hop[0] == sw_dpid]:
+            del self.recent_flows[hop]
+
+    def forget(self, src_id, dst_id):
+        self.next_path_i.pop((src_id, dst_id), None)
+
+    def reset(self):
+        self.next_path_i = {}
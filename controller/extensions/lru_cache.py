@@ -0,0 +1,39 @@
+from collections import OrderedDict
+
+class LRUCache:
+    """
+    Dict like cache bounded to capacity entries, that evicts the least recently used one
+    when it is full
+    """
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.entries = OrderedDict()    # from least to most recently used
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def get(self, key, default=None):
+        if key not in self.entries:
+            return default
+        value = self.entries.pop(key)
+        self.entries[key] = value       # move it to the end as the most recently used
+        return value
+
+    def put(self, key, value):
+        self.entries.pop(key, None)
+        self.entries[key] = value
+        if len(self.entries) > self.capacity:
+            self.entries.popitem(last=False)
+
+    def pop(self, key, default=None):
+        return self.entries.pop(key, default)
+
+    def remove_if(self, is_stale):
+        for key in [key for key in self.entries if is_stale(key)]:
+            del self.entries[key]
+
+    def clear(self):
+        self.entries.clear()
@@ -0,0 +1,145 @@
+import cProfile
+import pstats
+import time
+from functools import wraps
+try:
+    from StringIO import StringIO
+except ImportError:
+    from io import StringIO
+
+# upper bounds in seconds of the buckets of the histograms, the last one has the rest
+HISTOGRAM_BUCKETS = [0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, float('inf')]
+PROFILE_TOP_FUNCTIONS = 15
+
+
+class Histogram:
+    def __init__(self):
+        self.buckets = [0] * len(HISTOGRAM_BUCKETS)
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    def observe(self, value):
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+        for i, bound in enumerate(HISTOGRAM_BUCKETS):
+            if value <= bound:
+                self.buckets[i] += 1
+                return
+
+
+class Metrics:
+    """
+    Counters, histograms of durations and gauges of the controller, rendered as text.
+    The counters are always kept because they are cheap, while the durations are only
+    measured once enabled, so the hot paths only pay a check of the flag meanwhile.
+    """
+    def __init__(self):
+        self.enabled = False
+        self.counters = {}      # name: int
+        self.histograms = {}    # name: Histogram of seconds
+        self.gauges = {}        # name: function returning the actual value
+        self.profiles = {}      # handler_name: cProfile.Profile of the sampled calls
+
+    def incr(self, name, amount=1):
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def observe(self, name, seconds):
+        histogram = self.histograms.get(name, None)
+        if histogram is None:
+            histogram = self.histograms[name] = Histogram()
+        histogram.observe(seconds)
+
+    def add_gauge(self, name, function):
+        self.gauges[name] = function
+
+    def count_flow_mods(self, packed_bytes, quantity=1):
+        self.counters['flow_mods'] = self.counters.get('flow_mods', 0) + quantity
+        self.counters['flow_mod_bytes'] = self.counters.get('flow_mod_bytes', 0) + packed_bytes
+
+    def profile_handlers(self, obj, handler_names, sample):
+        """
+        Replaces the handlers of obj by ones that run one of every sample calls under cProfile.
+        Must be called before the handlers are registered as listeners of the events
+        """
+        for handler_name in handler_names:
+            profile = self.profiles[handler_name] = cProfile.Profile()
+            handler = getattr(obj, handler_name)
+            setattr(obj, handler_name, self._sampled(handler, profile, sample))
+
+    def _sampled(self, handler, profile, sample):
+        calls = [0]
+
+        @wraps(handler)
+        def sampled_handler(*args, **kwargs):
+            calls[0] += 1
+            if calls[0] % sample:
+                return handler(*args, **kwargs)
+            return profile.runcall(handler, *args, **kwargs)
+        return sampled_handler
+
+    def render(self):
+        lines = []
+        for name in sorted(self.counters):
+            lines.append("%s %s" % (name, self.counters[name]))
+        for name in sorted(self.gauges):
+            lines.append("%s %s" % (name, self.gauges[name]()))
+        for name in sorted(self.histograms):
+            histogram = self.histograms[name]
+            lines.append("%s_seconds_count %s" % (name, histogram.count))
+            lines.append("%s_seconds_sum %.6f" % (name, histogram.total))
+            lines.append("%s_seconds_max %.6f" % (name, histogram.max))
+            cumulative = 0
+            for bound, count in zip(HISTOGRAM_BUCKETS, histogram.buckets):
+                cumulative += count
+                lines.append('%s_seconds_bucket{le="%s"} %s' % (name, bound, cumulative))
+        for handler_name in sorted(self.profiles):
+            lines.append("")
+            lines.append("# cProfile of the sampled calls of %s" % handler_name)
+            lines.extend(self._render_profile(self.profiles[handler_name]))
+        return "\n".join(lines) + "\n"
+
+    def _render_profile(self, profile):
+        output = StringIO()
+        try:
+            pstats.Stats(profile, stream=output).sort_stats('cumulative').print_stats(PROFILE_TOP_FUNCTIONS)
+        except TypeError:
+            return ["no sampled calls yet"]   # pstats fails with an empty profile
+        return output.getvalue().splitlines()
+
+
+metrics = Metrics()    # shared by the whole controller
+
+
+def timed(name):
+    """Decorator that observes the duration of every call into the histogram name, while enabled"""
+    def decorator(function):
+        @wraps(function)
+        def timed_function(*args, **kwargs):
+            if not metrics.enabled:
+                return function(*args, **kwargs)
+            start = time.time()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                metrics.observe(name, time.time() - start)
+        return timed_function
+    return decorator
+
+
+def serve(prefix):
+    """Publishes the metrics as text under prefix on the web server of pox's webcore"""
+    from pox.core import core
+    from pox.web.webcore import SplitRequestHandler
+
+    class MetricsRequestHandler(SplitRequestHandler):
+        def do_GET(self):
+            text = metrics.render().encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; charset=utf-8')
+            self.send_header('Content-Length', str(len(text)))
+            self.end_headers()
+            self.wfile.write(text)
+
+    core.WebServer.set_handler(prefix, MetricsRequestHandler)
@@ -0,0 +1,63 @@
+import struct
+from pox.lib.addresses import EthAddr, IPAddr
+from pox.lib.packet import ethernet, ipv4
+from flow import Flow
+
+ETHERNET_HEADER = struct.Struct('!6s6sH')           # dst, src, type
+IPV4_HEADER = struct.Struct('!B5xHxB2x4s4s')        # version_and_length, flags_and_fragment, protocol, src, dst
+PORTS = struct.Struct('!HH')                        # src, dst of TCP and UDP
+IPV4_MIN_LENGTH = 20
+MAX_CACHED_ADDRESSES = 4096
+
+# the conversion of the bytes of an address is always the same, so it is cached
+_mac_strings = {}   # {raw_mac: mac_str}
+_ip_addresses = {}  # {raw_ip: IPAddr}
+
+
+def parse_ip_packet_in(data):
+    """
+    Reads (src_mac, dst_mac, Flow) straight from the bytes of a frame with a TCP, UDP or ICMP
+    packet, without parsing the rest of it. Returns None for any other frame, or one it can not
+    read this way (VLAN tagged, fragments, truncated), which has to be parsed fully instead
+    """
+    if len(data) < ETHERNET_HEADER.size + IPV4_MIN_LENGTH:
+        return None
+    raw_dst_mac, raw_src_mac, eth_type = ETHERNET_HEADER.unpack_from(data, 0)
+    if eth_type != ethernet.IP_TYPE:
+        return None
+    version_and_length, flags_and_fragment, protocol, raw_src_ip, raw_dst_ip = \
+        IPV4_HEADER.unpack_from(data, ETHERNET_HEADER.size)
+    header_length = (version_and_length & 0x0f) * 4
+    if version_and_length >> 4 != 4 or header_length < IPV4_MIN_LENGTH or flags_and_fragment & 0x1fff:
+        return None     # only the first fragment has the ports
+
+    if protocol == ipv4.ICMP_PROTOCOL:
+        src_port, dst_port = None, None     # as Flow.of
+    elif protocol == ipv4.TCP_PROTOCOL or protocol == ipv4.UDP_PROTOCOL:
+        ports_offset = ETHERNET_HEADER.size + header_length
+        if len(data) < ports_offset + PORTS.size:
+            return None
+        src_port, dst_port = PORTS.unpack_from(data, ports_offset)
+    else:
+        return None
+
+    flow = Flow.intern(_ip_address(raw_src_ip), src_port, _ip_address(raw_dst_ip), dst_port, protocol)
+    return _mac_string(raw_src_mac), _mac_string(raw_dst_mac), flow
+
+
+def _mac_string(raw_mac):
+    mac = _mac_strings.get(raw_mac)
+    if mac is None:
+        if len(_mac_strings) >= MAX_CACHED_ADDRESSES:
+            _mac_strings.clear()
+        mac = _mac_strings[raw_mac] = EthAddr(raw_mac).toStr()
+    return mac
+
+
+def _ip_address(raw_ip):
+    ip = _ip_addresses.get(raw_ip)
+    if ip is None:
+        if len(_ip_addresses) >= MAX_CACHED_ADDRESSES:
+            _ip_addresses.clear()
+        ip = _ip_addresses[raw_ip] = IPAddr(raw_ip)
+    return ip
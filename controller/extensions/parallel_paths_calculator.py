@@ -0,0 +1,80 @@
+import multiprocessing
+from pox.core import core
+from topology_graph import bfs, iter_jumps
+
+log = core.getLogger()
+
+
+def paths_from_origins(task):
+    """
+    Runs in the workers: the shortest paths from every origin to every destiny of the snapshot,
+    as {origin_id: {destiny_id: [tuple of (sw_id, output_port)]}}, with only integers to send them back
+    """
+    adjacency, ports, origin_ids, destiny_ids = task
+    paths = {}
+    for origin_id in origin_ids:
+        distances, predecessors = bfs(adjacency, origin_id)
+        paths_from_origin = paths[origin_id] = {}
+        for destiny_id in destiny_ids:
+            if destiny_id == origin_id:
+                continue
+            paths_from_origin[destiny_id] = [
+                jumps + ((destiny_id, None),)
+                for jumps in iter_jumps(predecessors, ports, origin_id, destiny_id)
+            ] if distances[destiny_id] >= 0 else []
+    return paths
+
+
+class ParallelPathsCalculator:
+    """
+    Calculates the shortest paths between switches in a pool of processes, out of the pox thread.
+    The TopologyGraph is copied into a snapshot of integers, the origins are split between the
+    workers and the results are delivered back on the pox thread. Only the last calculation asked
+    for is delivered, the ones that finish after the topology changed again are discarded.
+    """
+    def __init__(self, workers, call_later=None):
+        self.workers = workers
+        self.pool = multiprocessing.Pool(workers)
+        self.call_later = call_later or core.callLater  # to run the delivery on the pox thread
+        self.last_calculation = 0
+        self.last_delivered = 0
+
+    def calculate(self, graph, sws, on_done):
+        """
+        Calls on_done(id_paths, switches) with the paths between every pair of sws as
+        {origin_id: {destiny_id: [tuple of (sw_id, output_port)]}}, and the Switch of each id
+        when the calculation started. They are not turned into Paths here, because building
+        them all would take the pox thread almost as long as calculating them
+        """
+        self.last_calculation += 1
+        calculation = self.last_calculation
+        # the tasks are pickled in another thread, so they must not see the later changes of the graph
+        switches = list(graph.switches)
+        adjacency = [list(linked_sw_ids) for linked_sw_ids in graph.adjacency]
+        ports = [dict(ports_of_sw) for ports_of_sw in graph.ports]
+        sw_ids = [graph.id_of(sw) for sw in sws]
+        tasks = [
+            (adjacency, ports, sw_ids[i::self.workers], sw_ids)
+            for i in range(min(self.workers, len(sw_ids)))
+        ]
+        self.pool.map_async(
+            paths_from_origins, tasks,
+            callback=lambda results: self.call_later(self._deliver, calculation, switches, results, on_done)
+        )
+
+    def is_pending(self):
+        """True while the last calculation asked for was not delivered yet"""
+        return self.last_delivered != self.last_calculation
+
+    def close(self):
+        self.pool.terminate()
+
+    def _deliver(self, calculation, switches, results, on_done):
+        if calculation != self.last_calculation:
+            log.debug("Discarding paths calculated before the last topology change.")
+            return
+        self.last_delivered = calculation
+        id_paths = {}
+        for paths_of_task in results:
+            id_paths.update(paths_of_task)
+        on_done(id_paths, switches)
@@ -0,0 +1,81 @@
+import time
+import pox.openflow.libopenflow_01 as of
+
+
+class PathInstallation:
+    """
+    Transaction of the installation of a path. The flow mods of every switch are buffered
+    and sent in a single write followed by a barrier request, and the packets waiting
+    for the path are only released once all the switches replied their barriers,
+    so they don't reach a switch that is not programmed yet.
+    """
+    def __init__(self):
+        self.messages = {}          # sw: [packed flow_mod]
+        self.packets_out = []       # [(sw, packet_out)] to send once installed
+        self.callbacks = []         # called once installed
+        self.pending_barriers = {}  # xid: sw
+        self.start_time = None
+        self.latency = None         # seconds since commit until all barriers were replied
+        self.released = False
+        self.confirmed = False      # all the switches replied their barriers, not released by a timeout
+
+    def add_action_output(self, sw, flow, output_port):
+        self.messages.setdefault(sw, []).append(sw.prepare_action_output(flow, output_port))
+
+    def add_packet_out(self, sw, packet_out):
+        if self.released:
+            sw.connection.send(packet_out)  # the path is already installed
+        else:
+            self.packets_out.append((sw, packet_out))
+
+    def add_callback(self, callback):
+        self.callbacks.append(callback)
+
+    def commit(self):
+        """Returns the xids of the barriers that have to be replied to finish the installation"""
+        self.start_time = time.time()
+        for sw, messages in self.messages.items():
+            barrier = of.ofp_barrier_request()
+            self.pending_barriers[barrier.xid] = sw
+            sw.connection.send(b''.join(messages) + barrier.pack())
+
+        if not self.pending_barriers:
+            self.confirmed = True
+            self.release()
+        return list(self.pending_barriers.keys())
+
+    def barrier_replied(self, xid):
+        """Returns True if it was the last barrier pending so the installation is finished"""
+        self.pending_barriers.pop(xid, None)
+        if not self.pending_barriers and not self.released:
+            self.confirmed = True
+            self.release()
+            return True
+        return False
+
+    def release(self):
+        self.released = True
+        self.latency = time.time() - self.start_time
+        for sw, packet_out in self.packets_out:
+            sw.connection.send(packet_out)
+        for callback in self.callbacks:
+            callback()
+
+
+class PathSetupStats:
+    """Latency of the path installations, since its commit until its packets were released"""
+    def __init__(self):
+        self.count = 0
+        self.timeouts = 0
+        self.total_latency = 0
+        self.max_latency = 0
+        self.last_latency = 0
+
+    def add(self, installation):
+        self.count += 1
+        self.total_latency += installation.latency
+        self.max_latency = max(self.max_latency, installation.latency)
+        self.last_latency = installation.latency
+
+    def mean_latency(self):
+        return self.total_latency / self.count if self.count else 0
@@ -0,0 +1,38 @@
+import time
+
+
+class PendingFlows:
+    """
+    Flows whose path is being installed, or has just been installed, by a PathInstallation.
+    The first PacketIn of a flow owns the installation, and the ones of the same flow
+    (in any direction) arriving before ttl seconds are expired follow the path it chose.
+    """
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self.pending = {}               # {Flow: (expiration_time, PathInstallation)}
+        self.next_cleanup = 0
+        self.suppressed_packet_ins = 0  # counter of PacketIns that followed a pending installation
+
+    def get(self, flow):
+        """Returns the PathInstallation of the flow if it is still pending, None otherwise"""
+        pending = self.pending.get(flow)
+        if pending is None:
+            return None
+        expiration_time, installation = pending
+        if expiration_time <= time.time():
+            self.pending.pop(flow, None)
+            return None
+        return installation
+
+    def add(self, flow, installation):
+        now = time.time()
+        self.pending[flow] = (now + self.ttl, installation)
+        self.pending[flow.reverse()] = (now + self.ttl, installation)
+        if now >= self.next_cleanup:
+            self._remove_expired(now)
+            self.next_cleanup = now + self.ttl
+
+    def _remove_expired(self, now):
+        for flow, (expiration_time, _) in list(self.pending.items()):
+            if expiration_time <= now:
+                del self.pending[flow]
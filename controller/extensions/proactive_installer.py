@@ -0,0 +1,98 @@
+import zlib
+from pox.core import core
+
+log = core.getLogger()
+
+class ProactiveInstaller:
+    """
+    Installs the paths from and to every host as soon as it is discovered, with entries
+    matching the macs of both hosts, so the first packet between them does not need to
+    go to the controller. Each switch gets at most max_entries_per_switch of these entries,
+    the pairs of hosts that do not fit are left to the reactive installation.
+    Each pair always gets the same of the shortest paths, chosen by a hash of both macs, so the
+    paths are not rotated every time they are installed again, and when the path of a pair changes
+    its entries on the switches left out of it are removed.
+    """
+    def __init__(self, hosts, paths_finder, max_entries_per_switch):
+        self.hosts = hosts                  # {host_mac: LinkToSwitch}
+        self.paths_finder = paths_finder
+        self.max_entries_per_switch = max_entries_per_switch
+        self.pending_hosts = set()          # hosts with pairs not installed yet because of missing paths
+        self.installed = {}                 # {(src_mac, dst_mac): [sw]} with an entry of the pair
+        self.skipped_pairs = 0              # counter of pairs not installed because of the max entries
+
+    def notifyHostJoined(self, host_mac):
+        self.pending_hosts.add(host_mac)
+        self.install_pending()
+
+    def notifyHostLeft(self, host_mac, switches):
+        self.pending_hosts.discard(host_mac)
+        for src_mac, dst_mac in list(self.installed.keys()):
+            if host_mac in (src_mac, dst_mac):
+                del self.installed[(src_mac, dst_mac)]
+        for sw in switches.values():
+            sw.remove_host_pair_outputs(host_mac)
+
+    def notifyPathsChanged(self):
+        # the entries already installed that did not change are not sent again
+        self.pending_hosts = set(self.hosts.keys())
+        self.install_pending()
+
+    def install_pending(self):
+        for host_mac in list(self.pending_hosts):
+            if host_mac not in self.hosts or self._install_host(host_mac):
+                self.pending_hosts.discard(host_mac)
+
+    def _install_host(self, host_mac):
+        """Returns False if there are pairs without path yet"""
+        complete = True
+        for other_host_mac in list(self.hosts.keys()):
+            if other_host_mac == host_mac:
+                continue
+            for src_mac, dst_mac in [(host_mac, other_host_mac), (other_host_mac, host_mac)]:
+                path = self._get_path(src_mac, dst_mac)
+                if path is None:
+                    complete = False
+                    self._install_pair(src_mac, dst_mac, [])
+                elif self._fits(path, src_mac, dst_mac):
+                    self._install_pair(src_mac, dst_mac, path)
+                else:
+                    self.skipped_pairs += 1
+                    self._install_pair(src_mac, dst_mac, [])
+        return complete
+
+    def _install_pair(self, src_mac, dst_mac, path):
+        """Sets the entries of the pair on the switches of the path and removes the ones of its previous path"""
+        switches = self.hosts[src_mac].switches
+        for old_sw in self.installed.pop((src_mac, dst_mac), []):
+            # a switch that went down took its entries with it
+            if old_sw not in [sw for sw, _ in path] and switches.get(old_sw.dpid, None) is old_sw:
+                old_sw.remove_host_pair_output(src_mac, dst_mac)
+        for sw, output_port in path:
+            sw.set_host_pair_output(src_mac, dst_mac, output_port)
+        if path:
+            self.installed[(src_mac, dst_mac)] = [sw for sw, _ in path]
+
+    def _get_path(self, src_mac, dst_mac):
+        """List of (sw, output_port) from the switch of src to the host dst, None if there is no path yet"""
+        link_to_src, link_to_dst = self.hosts[src_mac], self.hosts[dst_mac]
+        if link_to_src.sw_dpid not in link_to_src.switches or link_to_dst.sw_dpid not in link_to_dst.switches:
+            return None
+        if link_to_src.sw_dpid == link_to_dst.sw_dpid:
+            return [(link_to_src.sw, link_to_dst.port)]
+        paths = self.paths_finder.get_paths(link_to_src.sw_dpid, link_to_dst.sw_dpid)
+        if not paths:
+            return None
+        # not balanced by the paths finder, which would give another path each time the pair is installed again
+        path = paths[(zlib.crc32((src_mac + dst_mac).encode()) & 0xffffffff) % len(paths)]
+        # the last switch outputs to the host
+        return [(sw, output_port or link_to_dst.port) for sw, output_port in path]
+
+    def _fits(self, path, src_mac, dst_mac):
+        for sw, _ in path:
+            if (
+                (src_mac, dst_mac) not in sw.host_pair_ports
+                and len(sw.host_pair_ports) >= self.max_entries_per_switch
+            ):
+                return False
+        return True
@@ -0,0 +1,111 @@
+import pox.openflow.libopenflow_01 as of
+from pox.core import core
+from pox.lib.addresses import EthAddr, IP_ANY
+from pox.lib.packet import ethernet, arp
+from pox.lib.util import dpid_to_str
+
+log = core.getLogger()
+
+class ProxyArp:
+    """
+    Answers the ARP requests from the controller, with the mac of the hosts known by their ips,
+    so the requests are not flooded through the fat tree. The ips are learned from the hosts
+    found by host_tracker, the senders of the ARP packets and the IP packets of the PacketIns.
+    The requests for unknown ips are only sent out of the ports of every switch that are not linked
+    to another switch, so they reach the hosts that did not send anything yet as well.
+    The switches send the ARP broadcasts to the controller and drop the ones
+    arriving from another switch, so they are never flooded between switches.
+    """
+    def __init__(self, switches, hosts):
+        self.switches = switches    # {sw_dpid: Switch}
+        self.hosts = hosts          # {host_mac: LinkToSwitch}
+        self.macs = {}              # {IPAddr: host_mac}
+        self.ips = {}               # {host_mac: set(IPAddr)}, the reverse of macs
+        # counters
+        self.answered = 0
+        self.flooded = 0
+
+    def notifySwitchUp(self, sw):
+        sw.redirect_arp_broadcasts()
+
+    def notifyLinkAdded(self, sw_1, port_1, sw_2, port_2):
+        sw_1.drop_arp_broadcasts_from(port_1)
+        sw_2.drop_arp_broadcasts_from(port_2)
+
+    def notifyLinkRemoved(self, sw_1, port_1, sw_2, port_2):
+        sw_1.allow_arp_broadcasts_from(port_1)
+        sw_2.allow_arp_broadcasts_from(port_2)
+
+    def learn(self, ip, host_mac):
+        if ip is None or ip == IP_ANY or self.macs.get(ip, None) == host_mac:
+            return
+        old_mac = self.macs.get(ip, None)
+        if old_mac:
+            self.ips[old_mac].discard(ip)   # the ip moved to another host
+        self.macs[ip] = host_mac
+        self.ips.setdefault(host_mac, set()).add(ip)
+
+    def forget(self, host_mac):
+        for ip in self.ips.pop(host_mac, ()):
+            del self.macs[ip]
+
+    def get_mac(self, ip):
+        """The mac of the host with the ip, only if it is connected"""
+        host_mac = self.macs.get(ip, None)
+        return host_mac if host_mac in self.hosts else None
+
+    def handle_packet_in(self, event):
+        eth_packet = event.parsed
+        if eth_packet.type != ethernet.ARP_TYPE:
+            return
+        arp_packet = eth_packet.payload
+        self.learn(arp_packet.protosrc, arp_packet.hwsrc.toStr())
+
+        if arp_packet.opcode == arp.REQUEST:
+            host_mac = self.get_mac(arp_packet.protodst)
+            if host_mac:
+                self._reply(event.connection, event.port, arp_packet, host_mac)
+                self.answered += 1
+            else:
+                self._flood(dpid_to_str(event.dpid), event.port, event.data)
+                self.flooded += 1
+        elif arp_packet.opcode == arp.REPLY:
+            # the reply to a flooded request goes straight to the host that asked
+            link_to_sw = self.hosts.get(eth_packet.dst.toStr(), None)
+            if link_to_sw and link_to_sw.sw_dpid in self.switches:
+                link_to_sw.sw.connection.send(
+                    of.ofp_packet_out(data=event.data, action=of.ofp_action_output(port=link_to_sw.port))
+                )
+            else:
+                self._flood(dpid_to_str(event.dpid), event.port, event.data)
+
+    def _reply(self, connection, port, request, host_mac):
+        reply = arp()
+        reply.hwtype = request.hwtype
+        reply.prototype = request.prototype
+        reply.hwlen = request.hwlen
+        reply.protolen = request.protolen
+        reply.opcode = arp.REPLY
+        reply.hwsrc = EthAddr(host_mac)
+        reply.protosrc = request.protodst
+        reply.hwdst = request.hwsrc
+        reply.protodst = request.protosrc
+        eth_reply = ethernet(type=ethernet.ARP_TYPE, src=reply.hwsrc, dst=request.hwsrc)
+        eth_reply.payload = reply
+        log.debug("ARP request for %s from %s answered with %s.", request.protodst, request.protosrc, host_mac)
+        connection.send(
+            of.ofp_packet_out(data=eth_reply.pack(), in_port=port, action=of.ofp_action_output(port=of.OFPP_IN_PORT))
+        )
+
+    def _flood(self, in_sw_dpid, in_port, data):
+        """Sends the packet out of the ports of every switch not linked to another switch, but the one it came in"""
+        for sw in self.switches.values():
+            # the ports of the features reply of the switch, kept up to date by pox with its PortStatus
+            ports = [
+                port for port in sorted(sw.connection.ports.keys())
+                if port < of.OFPP_MAX and port not in sw.links and (sw.dpid != in_sw_dpid or port != in_port)
+            ]
+            if ports:
+                sw.connection.send(
+                    of.ofp_packet_out(data=data, actions=[of.ofp_action_output(port=port) for port in ports])
+                )
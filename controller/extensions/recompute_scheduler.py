@@ -0,0 +1,50 @@
+import time
+from pox.core import core
+from pox.lib.recoco import Timer
+
+log = core.getLogger()
+
+class RecomputeScheduler:
+    """
+    Coalesces the topology changes notified in a burst into a single call of recompute,
+    made once no new change has been notified during quiet_window seconds.
+    To not starve the recompute while changes keep coming, it is never delayed
+    more than max_delay seconds since the first change of the burst.
+    """
+    def __init__(self, recompute, quiet_window, max_delay=None):
+        self.recompute = recompute
+        self.quiet_window = quiet_window
+        self.max_delay = max_delay if max_delay is not None else 10 * quiet_window
+        self.timer = None
+        self.burst_start = None
+        self.pending_events = 0
+        # counters
+        self.recomputes = 0
+        self.events_coalesced = 0           # total of events attended by the recomputes
+        self.last_events_coalesced = 0      # events attended by the last recompute
+
+    def notify(self):
+        now = time.time()
+        self.pending_events += 1
+        if self.burst_start is None:
+            self.burst_start = now
+        if self.timer:
+            self.timer.cancel()
+        wait = min(self.quiet_window, max(0, self.burst_start + self.max_delay - now))
+        self.timer = Timer(wait, self._flush)
+
+    def is_pending(self):
+        return self.pending_events > 0
+
+    def _flush(self):
+        self.timer = None
+        self.burst_start = None
+        events = self.pending_events
+        self.pending_events = 0
+
+        self.recompute()
+
+        self.recomputes += 1
+        self.events_coalesced += events
+        self.last_events_coalesced = events
+        log.debug("Shortest paths recomputed once for %s coalesced topology changes.", events)
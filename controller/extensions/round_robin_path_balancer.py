@@ -1,18 +1,16 @@
 class RoundRobinPathBalancer:
     def __init__(self):
-        self.tracking = {}     # {(src, dst): (next_path_i, [possible_paths])}
+        self.tracking = {}     # {(src, dst): next_path_i}
 
     def get_balanced(self, src_id, dst_id, possible_paths):
+        # the paths can change between calls, as when the stale ones are skipped, so only the index is kept
         key = (src_id, dst_id)
-        next_path_i, paths = self.tracking.setdefault(key, (0, possible_paths))
-        selected_path = paths[next_path_i]
-        self._update_tracking(key)
-        return selected_path
+        next_path_i = self.tracking.get(key, 0) % len(possible_paths)
+        self.tracking[key] = (next_path_i + 1) % len(possible_paths)
+        return possible_paths[next_path_i]
 
-    def _update_tracking(self, key):
-        used_path_i, possible_paths = self.tracking[key]
-        next_path_i = (used_path_i + 1) % len(possible_paths)
-        self.tracking[key] = (next_path_i, possible_paths)
+    def forget(self, src_id, dst_id):
+        self.tracking.pop((src_id, dst_id), None)
 
     def reset(self):
         self.tracking = {}
@@ -0,0 +1,48 @@
+from path import Path
+from topology_graph import bfs, iter_jumps
+
+
+class ShortestPathsDag:
+    """
+    Directed acyclic graph of predecessors that contains every shortest path
+    from an origin switch to the rest of the switches reachable from it.
+    It is built with a single BFS over the TopologyGraph, so all the equal cost
+    paths can be enumerated from it without walking the whole topology again.
+    """
+    def __init__(self, graph, sw_origin):
+        self.graph = graph
+        self.origin = sw_origin
+        self.origin_id = graph.id_of(sw_origin)
+        # sw_id: jumps from origin, -1 if unreachable / sw_id: [previous_sw_id]
+        self.distances, self.predecessors = bfs(graph.adjacency, self.origin_id)
+
+    def distance_to(self, sw_destiny):
+        sw_id = self.graph.id_of(sw_destiny)
+        # switches added after the BFS are not reachable from it
+        if sw_id is None or sw_id >= len(self.distances) or self.distances[sw_id] < 0:
+            return None
+        return self.distances[sw_id]
+
+    def next_ports_to_origin(self, sw):
+        """Output ports of sw towards the origin through any of the shortest paths"""
+        sw_id = self.graph.id_of(sw)
+        if self.distance_to(sw) is None:
+            return []
+        ports = self.graph.ports[sw_id]
+        return [ports[previous_sw_id] for previous_sw_id in self.predecessors[sw_id] or []]
+
+    def iter_paths_to(self, sw_destiny):
+        """
+        Lazily yields every shortest Path from the origin to sw_destiny.
+        Yields nothing if sw_destiny is the origin or it is not reachable.
+        """
+        if sw_destiny == self.origin or self.distance_to(sw_destiny) is None:
+            return
+        switches = self.graph.switches
+        destiny = ((sw_destiny, None),)
+        jumps_to_destiny = iter_jumps(self.predecessors, self.graph.ports, self.origin_id, self.graph.id_of(sw_destiny))
+        for jumps in jumps_to_destiny:
+            yield Path(tuple((switches[sw_id], port) for sw_id, port in jumps) + destiny)
+
+    def get_paths_to(self, sw_destiny):
+        return list(self.iter_paths_to(sw_destiny))
@@ -1,91 +1,341 @@
 from pox.core import core
+from shortest_paths_dag import ShortestPathsDag
 from path import Path
 from round_robin_path_balancer import RoundRobinPathBalancer
+from recompute_scheduler import RecomputeScheduler
+from lru_cache import LRUCache
+from metrics import timed
+from parallel_paths_calculator import ParallelPathsCalculator
 
 log = core.getLogger()
 
 class ShortestPathsFinder:
-    def __init__(self):
-        self.sws_linked_to_a_host = []
+    def __init__(self, switches, graph, incremental=False, quiet_window=0, lazy=False, cache_size=1024,
+                 path_balancer=None, workers=0):
+        self.switches = switches        # {sw_dpid: Switch}, needed by the lazy mode
+        self.graph = graph              # TopologyGraph walked to find the paths
+        self.incremental = incremental  # only rebuild the paths affected by a link change
+        # lazy mode: only find the paths between a pair of switches when they are asked for
+        self.lazy = lazy
+        self.topology_version = 0
+        self.paths_cache = LRUCache(cache_size)    # (origin_dpid, destiny_dpid, topology_version): [Path]
+        # with workers the paths are calculated in other processes, and the old ones served until they are ready
+        self.parallel_calculator = ParallelPathsCalculator(workers) if workers > 0 and not lazy else None
+        recompute = self._invalidate_paths if lazy else self._recompute_shortest_paths
+        # with a quiet window the changes are coalesced and get_path serves the last computed paths meanwhile
+        self.recompute_scheduler = RecomputeScheduler(recompute, quiet_window) \
+            if quiet_window > 0 else None
+        self.hosts_per_sw = {}      # sw_dpid: quantity of hosts linked to it, the origins and destinies of the paths
         self.shortest_paths = {}    # origin_dpid: {destiny_dpid: Path}
-        self.path_balancer = RoundRobinPathBalancer()
-
-    def notifyHostsChanged(self, hosts):
-        old_sws_linked_to_a_host = self.sws_linked_to_a_host
-        self._calculate_switches_linked_to_a_host(hosts)
-        if old_sws_linked_to_a_host != self.sws_linked_to_a_host:
-            log.info("Switches linked to a host: %s.",
-                     self.sws_linked_to_a_host)
-            self._calculate_shortest_paths()
+        # paths calculated by the workers, turned into Paths of shortest_paths the first time they are asked for
+        self.id_paths = {}          # origin_id: {destiny_id: [tuple of (sw_id, output_port)]}
+        self.id_switches = []       # sw_id: Switch, when id_paths were calculated
+        # paths of a checkpoint, served while the switches reconnect after a restart, until the paths are calculated
+        self.restored_paths = {}    # origin_dpid: {destiny_dpid: [[(sw_dpid, output_port)]]}
+        self.restoring = False      # the recomputes wait until finish_restore
+        # the paths of shortest_paths are only enumerated from the dags the first time they are asked for
+        self.dags = {}              # origin_sw: ShortestPathsDag
+        self.path_balancer = path_balancer or RoundRobinPathBalancer()
+        self.listeners = []         # called every time the paths change
+
+    def addListener(self, listener):
+        self.listeners.append(listener)
+
+    def _notify_listeners(self):
+        for listener in self.listeners:
+            listener()
+
+    def notifyHostAdded(self, sw_dpid):
+        quantity = self.hosts_per_sw.get(sw_dpid, 0)
+        self.hosts_per_sw[sw_dpid] = quantity + 1
+        if not quantity:
+            self._notify_sws_linked_to_a_host_changed()
+
+    def notifyHostRemoved(self, sw_dpid):
+        quantity = self.hosts_per_sw.get(sw_dpid, 0)
+        if quantity > 1:
+            self.hosts_per_sw[sw_dpid] = quantity - 1
+        elif self.hosts_per_sw.pop(sw_dpid, None) is not None:
+            self._notify_sws_linked_to_a_host_changed()
+
+    def notifySwitchRemoved(self, sw_dpid):
+        """Its hosts and links are gone with it, so the paths are recomputed once for all of them"""
+        self.hosts_per_sw.pop(sw_dpid, None)
+        self._schedule_shortest_paths()
+
+    def _notify_sws_linked_to_a_host_changed(self):
+        # paths between switches do not depend on the hosts when they are found on demand
+        if not self.lazy:
+            log.info("Switches linked to a host: %s.", len(self.hosts_per_sw))
+            self._schedule_shortest_paths()
+
+    def notifyLinkAdded(self, sw_1, sw_2):
+        """Must be called once the link between sw_1 and sw_2 is already added to them"""
+        if self._is_incremental():
+            self._update_shortest_paths(sw_1, sw_2, self._is_shortened_by)
+        else:
+            self._schedule_shortest_paths()
+
+    def notifyLinkRemoved(self, sw_1, sw_2):
+        """Must be called once the link between sw_1 and sw_2 is already removed from them"""
+        if self._is_incremental():
+            self._update_shortest_paths(sw_1, sw_2, self._is_traversed_by)
+        else:
+            self._schedule_shortest_paths()
 
-    def notifyLinksChanged(self):
-        self._calculate_shortest_paths()
+    def _is_incremental(self):
+        # the other modes do not keep the dags the update needs
+        return self.incremental and not self.lazy and not self.recompute_scheduler and not self.parallel_calculator \
+            and not self.restoring
+
+    def restore_paths(self, paths):
+        """
+        Serves the paths of a checkpoint, as {origin_dpid: {destiny_dpid: [[(sw_dpid, output_port)]]}},
+        while the switches reconnect. Until finish_restore the changes of the topology do not recompute them
+        """
+        if not self.lazy:   # the lazy mode finds them as fast in the restored links
+            self.restored_paths = paths
+            self.restoring = True
+
+    def finish_restore(self):
+        """Recomputes the paths once for the topology restored, serving the ones of the checkpoint until then"""
+        if self.restoring:
+            self.restoring = False
+            self._schedule_shortest_paths()
+
+    def export_paths(self):
+        """The calculated paths as {origin_dpid: {destiny_dpid: [[(sw_dpid, output_port)]]}}, to checkpoint them"""
+        paths = {}
+        for origin, paths_from_origin in self.shortest_paths.items():
+            for destiny, paths_to_destiny in paths_from_origin.items():
+                paths.setdefault(origin, {})[destiny] = [
+                    [(sw.dpid, port) for sw, port in path] for path in paths_to_destiny
+                ]
+        if not self._is_recompute_pending():    # otherwise the dags could have links removed since
+            sws_linked_to_a_host = self.get_sws_linked_to_a_host()
+            for sw_origin, dag in self.dags.items():
+                paths_from_origin = paths.setdefault(sw_origin.dpid, {})
+                for sw_destiny in sws_linked_to_a_host:
+                    if sw_destiny != sw_origin and sw_destiny.dpid not in paths_from_origin:
+                        # not kept in shortest_paths, as most of them will never be asked for
+                        paths_from_origin[sw_destiny.dpid] = [
+                            [(sw.dpid, port) for sw, port in path] for path in dag.iter_paths_to(sw_destiny)
+                        ]
+        switches = self.id_switches
+        for origin_id, paths_from_origin in self.id_paths.items():
+            paths_from_origin_dpid = paths.setdefault(switches[origin_id].dpid, {})
+            for destiny_id, id_paths in paths_from_origin.items():
+                paths_from_origin_dpid.setdefault(switches[destiny_id].dpid, [
+                    [(switches[sw_id].dpid, port) for sw_id, port in id_path] for id_path in id_paths
+                ])
+        return paths
+
+    def close(self):
+        if self.parallel_calculator:
+            self.parallel_calculator.close()
 
     def get_path(self, origin, destiny):
-        if origin in self.shortest_paths:
-            if destiny in self.shortest_paths[origin] and len(self.shortest_paths[origin][destiny]) > 0:
-                posible_paths = self.shortest_paths[origin][destiny]
-                return self.path_balancer.get_balanced(origin, destiny, posible_paths)
+        posible_paths = self.get_paths(origin, destiny)
+        if len(posible_paths) > 0:
+            return self.path_balancer.get_balanced(origin, destiny, posible_paths)
 
         log.warn("No posible path beetween switches %s and %s.", origin, destiny)
         return None
 
-    def _calculate_switches_linked_to_a_host(self, hosts):
-        self.sws_linked_to_a_host = list(set(
-            map(lambda link_to_sw: link_to_sw.sw, hosts.values())))
+    def get_paths(self, origin, destiny):
+        """All the shortest paths between both switches, empty if there is no one"""
+        if self.lazy:
+            return self._get_lazy_paths(origin, destiny)
+        paths = self.shortest_paths.get(origin, {}).get(destiny, None)
+        if paths is None:
+            paths = self._build_calculated_paths(origin, destiny)
+        if paths and self._is_recompute_pending():
+            # the topology changed since they were calculated, so they could go through a removed link or switch
+            paths = [path for path in paths if self._is_linked(path)] or self._find_paths_now(origin, destiny)
+        if not paths and self.restored_paths:
+            paths = self._build_restored_paths(origin, destiny)
+        return paths
 
-    def _calculate_shortest_paths(self):
-        self._reset_paths()
+    def _is_recompute_pending(self):
+        return bool(
+            (self.recompute_scheduler and self.recompute_scheduler.is_pending())
+            or (self.parallel_calculator and self.parallel_calculator.is_pending())
+        )
+
+    def _is_linked(self, path):
+        """True if every switch of the path is up and linked to the next one through its output port"""
+        for i in range(len(path)):
+            sw, output_port = path[i]
+            if sw.dpid not in self.switches:
+                return False
+            if i < len(path) - 1 and sw.get_switch_linked_on(output_port) != path[i + 1][0]:
+                return False
+        return True
+
+    def _find_paths_now(self, origin, destiny):
+        """The paths of the actual topology, without keeping them, while the recompute is pending"""
+        if origin not in self.switches or destiny not in self.switches:
+            return []
+        return ShortestPathsDag(self.graph, self.switches[origin]).get_paths_to(self.switches[destiny])
+
+    def _build_calculated_paths(self, origin, destiny):
+        """The paths of the last calculation, of the workers or a dag, only enumerated when first asked for"""
+        origin_id, destiny_id = self.graph.ids.get(origin, None), self.graph.ids.get(destiny, None)
+        id_paths = self.id_paths.get(origin_id, {}).get(destiny_id, None)
+        if id_paths is not None:
+            switches = self.id_switches
+            paths = [Path((switches[sw_id], port) for sw_id, port in id_path) for id_path in id_paths]
+        else:
+            dag = self.dags.get(self.switches.get(origin, None), None)
+            if dag is None or destiny not in self.hosts_per_sw or destiny not in self.switches:
+                return []
+            if self._is_recompute_pending():
+                # the dag could go through a removed link, whose ports are not in the graph anymore
+                return self._find_paths_now(origin, destiny)
+            paths = dag.get_paths_to(self.switches[destiny])
+        self.shortest_paths.setdefault(origin, {})[destiny] = paths
+        return paths
 
-        for sw_origin in self.sws_linked_to_a_host:
-            for sw_destiny in self.sws_linked_to_a_host:
-                if (
-                    sw_origin != sw_destiny
-                    and not sw_destiny.dpid in self.shortest_paths.get(sw_origin.dpid, [])
-                ):
-                    shortest_paths = self._find_paths(sw_origin, sw_destiny, Path(), [])
-                    self._set_paths(sw_origin, sw_destiny, shortest_paths)
-
-    def _set_paths(self, sw_origin, sw_destiny, paths):
-        shortest_paths_from_origin = self.shortest_paths.get(sw_origin.dpid, {})
-        shortest_paths_from_origin[sw_destiny.dpid] = paths
-        self.shortest_paths[sw_origin.dpid] = shortest_paths_from_origin
-
-    def _find_paths(self, sw_origin, sw_destiny, actual_path, visited_sws):
-        visited_sws.append(sw_origin)
-
-        port_to_destiny = sw_origin.get_port_to(sw_destiny)
-        if port_to_destiny:
-            actual_path.add_jump(sw_origin, port_to_destiny)
-            actual_path.add_destiny(sw_destiny)
-            return [actual_path] # returns a list of posible paths
+    def _build_restored_paths(self, origin, destiny):
+        """The paths of the checkpoint whose switches are up and still linked as they were"""
+        paths = []
+        for dpid_path in self.restored_paths.get(origin, {}).get(destiny, []):
+            if any(sw_dpid not in self.switches for sw_dpid, _ in dpid_path):
+                continue
+            path = Path((self.switches[sw_dpid], port) for sw_dpid, port in dpid_path)
+            if self._is_linked(path):
+                paths.append(path)
+        return paths
+
+    def _get_lazy_paths(self, origin, destiny):
+        key = (origin, destiny, self.topology_version)
+        paths = self.paths_cache.get(key)
+        if paths is None:
+            if origin not in self.switches or destiny not in self.switches:
+                return []
+            dag = ShortestPathsDag(self.graph, self.switches[origin])
+            paths = dag.get_paths_to(self.switches[destiny])
+            self.paths_cache.put(key, paths)
+        return paths
+
+    def get_sws_linked_to_a_host(self):
+        """The switches linked to a host that are up"""
+        return [self.switches[sw_dpid] for sw_dpid in self.hosts_per_sw if sw_dpid in self.switches]
+
+    def _schedule_shortest_paths(self):
+        if self.restoring:
+            return  # once for every change, when the switches of the checkpoint had time to reconnect
+        if self.recompute_scheduler:
+            self.recompute_scheduler.notify()
+        elif self.lazy:
+            self._invalidate_paths()
         else:
-            paths_from_the_next_level = []
-            linked_sws = sw_origin.get_linked_switches()
-
-            old_visited_sws = visited_sws
-            # update visited_sws to have the sws in the next level
-            visited_sws = visited_sws + linked_sws
-            for port, sw in sw_origin.get_links():
-                # no go to a sw in a higher level
-                if sw not in old_visited_sws:
-                    new_actual_path = actual_path.copy()
-                    new_actual_path.add_jump(sw_origin, port)
-                    for path in self._find_paths(sw, sw_destiny, new_actual_path, visited_sws):
-                        paths_from_the_next_level.append(path)
-        return self._keep_only_shortests(paths_from_the_next_level)
-
-    def _keep_only_shortests(self, paths):
-        if len(paths) > 0:
-            shortest = len(paths[0])
-            for path in paths:
-                if len(path) < shortest:
-                    shortest = len(path)
-            return list(filter(lambda path: len(path) == shortest, paths))
+            self._recompute_shortest_paths()
+
+    def _recompute_shortest_paths(self):
+        if self.parallel_calculator:
+            self.parallel_calculator.calculate(self.graph, self.get_sws_linked_to_a_host(), self._swap_shortest_paths)
         else:
-            # no posible path between two switches
-            return []
+            self._calculate_shortest_paths()
+
+    def _swap_shortest_paths(self, id_paths, id_switches):
+        """Replaces all the paths at once by the ones calculated by the workers"""
+        self._reset_paths()
+        self.id_paths = id_paths
+        self.id_switches = id_switches
+        log.debug("Paths calculated by the workers from %s switches.", len(id_paths))
+        self._notify_listeners()
+
+    def _invalidate_paths(self):
+        self.topology_version += 1
+        version = self.topology_version
+        self.paths_cache.remove_if(lambda key: key[2] != version)
+        self.path_balancer.reset()
+        self._notify_listeners()
+
+    @timed('calculate_shortest_paths')
+    def _calculate_shortest_paths(self):
+        self._reset_paths()
+
+        for sw_origin in self.get_sws_linked_to_a_host():
+            # one BFS per origin is enough to get the paths to every destiny, enumerated when asked for
+            self.dags[sw_origin] = ShortestPathsDag(self.graph, sw_origin)
+        self._notify_listeners()
+
+    @timed('update_shortest_paths')
+    def _update_shortest_paths(self, sw_1, sw_2, is_affected):
+        """
+        Rebuilds only the (origin, destiny) paths for which is_affected(sw_origin, sw_destiny, sw_1, sw_2)
+        with the state previous to the link change, keeping the rest of them and its balancing untouched
+        """
+        sws_linked_to_a_host = self.get_sws_linked_to_a_host()
+        if any(sw_origin not in self.dags for sw_origin in sws_linked_to_a_host):
+            # a switch linked to a host came up after the last recompute, so there is nothing to update
+            self._calculate_shortest_paths()
+            return
+
+        affected = {}   # origin_sw: [destiny_sw]
+        for sw_origin in sws_linked_to_a_host:
+            for sw_destiny in sws_linked_to_a_host:
+                if sw_origin != sw_destiny and is_affected(sw_origin, sw_destiny, sw_1, sw_2):
+                    affected.setdefault(sw_origin, []).append(sw_destiny)
+
+        # the dags have to be rebuilt even if no path between origin and destinies changed,
+        # because the distances to the rest of the switches are needed in the next changes
+        for sw_origin in sws_linked_to_a_host:
+            if sw_origin in affected or self._is_in_dag(sw_origin, sw_1, sw_2):
+                self.dags[sw_origin] = ShortestPathsDag(self.graph, sw_origin)
+
+        for sw_origin, sws_destiny in affected.items():
+            paths_from_origin = self.shortest_paths.get(sw_origin.dpid, {})
+            for sw_destiny in sws_destiny:
+                # enumerated again from the new dag when asked for
+                paths_from_origin.pop(sw_destiny.dpid, None)
+                self.path_balancer.forget(sw_origin.dpid, sw_destiny.dpid)
+        log.debug("Paths rebuilt by link change between %s and %s: %s.",
+                  sw_1, sw_2, sum(map(len, affected.values())))
+        if affected:
+            self._notify_listeners()
+
+    def _is_shortened_by(self, sw_origin, sw_destiny, sw_1, sw_2):
+        """True if the new link gives a path shorter or as short as the actual ones"""
+        distance = self.dags[sw_origin].distance_to(sw_destiny)
+        for sw_from, sw_to in [(sw_1, sw_2), (sw_2, sw_1)]:
+            # links are bidirectional so the distance from sw_to to destiny is the one from destiny to sw_to
+            to_link = self.dags[sw_origin].distance_to(sw_from)
+            from_link = self.dags[sw_destiny].distance_to(sw_to)
+            if (
+                to_link is not None and from_link is not None
+                and (distance is None or to_link + 1 + from_link <= distance)
+            ):
+                return True
+        return False
+
+    def _is_traversed_by(self, sw_origin, sw_destiny, sw_1, sw_2):
+        """True if any of the actual paths goes through the removed link"""
+        distance = self.dags[sw_origin].distance_to(sw_destiny)
+        if distance is None:
+            return False
+        for sw_from, sw_to in [(sw_1, sw_2), (sw_2, sw_1)]:
+            # the paths are not enumerated: the link is in one if it joins a step of the origin and destiny dags
+            to_link = self.dags[sw_origin].distance_to(sw_from)
+            from_link = self.dags[sw_destiny].distance_to(sw_to)
+            if to_link is not None and from_link is not None and to_link + 1 + from_link == distance:
+                return True
+        return False
+
+    def _is_in_dag(self, sw_origin, sw_1, sw_2):
+        """True if the link is or could be part of a shortest path from origin to any other switch"""
+        distance_1 = self.dags[sw_origin].distance_to(sw_1)
+        distance_2 = self.dags[sw_origin].distance_to(sw_2)
+        # same distance means the link joins two switches of the same level of the BFS,
+        # None in only one of them means the link reaches switches unreachable before
+        return distance_1 != distance_2
 
     def _reset_paths(self):
         self.shortest_paths = {}
+        self.id_paths = {}
+        self.id_switches = []
+        self.restored_paths = {}
+        self.dags = {}
         self.path_balancer.reset()
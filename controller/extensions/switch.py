@@ -1,14 +1,44 @@
+import sys
+from itertools import count
 from pox.openflow.flow_table import FlowTable, TableEntry
 import pox.openflow.libopenflow_01 as of
 from pox.lib.packet import ethernet
+from pox.lib.addresses import EthAddr, ETHER_BROADCAST
+from metrics import metrics, timed
 
+# the exact match entries of a flow take precedence over the proactive ones
+DESTINATION_PRIORITY = of.OFP_DEFAULT_PRIORITY - 1
+HOST_PAIR_PRIORITY = of.OFP_DEFAULT_PRIORITY - 1
+# the backup entries of a flow are only used when its entry is removed because its link went down
+BACKUP_PRIORITY = of.OFP_DEFAULT_PRIORITY - 2
+# the ARP broadcasts go to the controller, which answers them, and the ones coming from another switch are dropped
+ARP_REDIRECT_PRIORITY = of.OFP_DEFAULT_PRIORITY
+ARP_DROP_PRIORITY = of.OFP_DEFAULT_PRIORITY + 1
 
-class Switch:
-    def __init__(self, dpid, connection):
+# every entry of a flow gets its own cookie, echoed by the switch when it expires. 0 is an unknown one
+_cookies = count(1)
+
+class Switch(object):
+    __slots__ = ('dpid', 'connection', 'idle_timeout', 'hard_timeout', 'links', 'ports_by_switch',
+                 'flow_table', 'entries_by_flow', 'entries_by_port', 'destination_ports',
+                 'host_pair_ports', 'backup_ports', 'arp_drop_ports')
+
+    def __init__(self, dpid, connection, idle_timeout=0, hard_timeout=0):
         self.dpid = dpid
         self.connection = connection
+        # timeouts of the installed entries in seconds, 0 for permanent ones
+        self.idle_timeout = idle_timeout
+        self.hard_timeout = hard_timeout
         self.links = {}  # port: linked_sw
+        self.ports_by_switch = {}   # linked_sw_dpid: port, the reverse of links
         self.flow_table = FlowTable()
+        # indexes of the flow_table entries, which are always exact matches of a Flow
+        self.entries_by_flow = {}   # flow_key: TableEntry
+        self.entries_by_port = {}   # output_port: {flow_key: TableEntry}
+        self.destination_ports = {} # host_mac: output_port of the entry matching the host as destination
+        self.host_pair_ports = {}   # (src_mac, dst_mac): output_port of the entry matching both hosts
+        self.backup_ports = {}      # flow_key: output_port of the backup entry of the flow
+        self.arp_drop_ports = set() # input ports of the entries dropping the ARP broadcasts
 
     def __repr__(self):
         return self.dpid
@@ -18,25 +48,46 @@ class Switch:
             return self.dpid == other.dpid
         return False
 
+    def __ne__(self, other):
+        return not self == other
+
     def __hash__(self):
         return hash(self.dpid)
 
     def add_link(self, port, switch):
         self.links[port] = switch
+        self.ports_by_switch[switch.dpid] = port
 
     def remove_link(self, port):
-        self.flow_table.remove_matching_entries(
-            of.ofp_match(dl_type=ethernet.IP_TYPE),
-            out_port=port
-        )
-        self.connection.send(
-            of.ofp_flow_mod(
-                command=of.OFPFC_DELETE,
-                action=of.ofp_action_output(port=port),
-                match=of.ofp_match(dl_type=ethernet.IP_TYPE)
-            )
-        )
-        return self.links.pop(port, None)
+        self.remove_entries_through(port)
+        linked_sw = self.links.pop(port, None)
+        if linked_sw and self.ports_by_switch.get(linked_sw.dpid, None) == port:
+            # a parallel link to the same switch takes its place
+            parallel_ports = [other_port for other_port, other_sw in self.links.items() if other_sw == linked_sw]
+            if parallel_ports:
+                self.ports_by_switch[linked_sw.dpid] = min(parallel_ports)
+            else:
+                del self.ports_by_switch[linked_sw.dpid]
+        return linked_sw
+
+    def clear_links(self):
+        """Forgets every link without touching the entries, as when the switch went down"""
+        self.links = {}
+        self.ports_by_switch = {}
+
+    def remove_entries_through(self, port):
+        """
+        Deletes from the switch and the local tables only the entries that output through the port:
+        the ones of flows, and the backup, destination and host pair ones
+        """
+        for flow_key, entry in list(self.entries_by_port.get(port, {}).items()):
+            self._remove_entry(flow_key, entry)
+        for ports in [self.backup_ports, self.destination_ports, self.host_pair_ports]:
+            for key, output_port in list(ports.items()):
+                if output_port == port:
+                    del ports[key]
+        # out_port restricts the delete to the entries with an output to it, whatever they match
+        self._send_flow_mod(of.ofp_flow_mod(command=of.OFPFC_DELETE, match=of.ofp_match(), out_port=port))
 
     def get_linked_switches(self):
         return self.links.values()
@@ -48,38 +99,223 @@ class Switch:
         return self.links.get(port, None)
 
     def get_port_to(self, switch):
-        for port, linked_sw in self.links.items():
-            if linked_sw == switch:
-                return port
-        return None
+        return self.ports_by_switch.get(switch.dpid, None)
 
     def add_action_output(self, flow, output_port):
-        new_entry = TableEntry(
-            match=of.ofp_match(
-                dl_type=ethernet.IP_TYPE,
-                nw_proto=flow.protocol,
-                nw_src=flow.src_ip,
-                tp_src=flow.src_port,
-                nw_dst=flow.dst_ip,
-                tp_dst=flow.dst_port
-            ),
-            actions=[of.ofp_action_output(port=output_port)]
-        )
+        self.connection.send(self.prepare_action_output(flow, output_port))
 
-        overlapping_entry = self._find_overlapping_entry(new_entry)
+    @timed('add_action_output')
+    def prepare_action_output(self, flow, output_port):
+        """
+        Updates the local flow_table with the new entry and returns
+        the packed flow mod that has to be sent to the switch to apply it
+        """
+        flow_key = flow.key()
+        overlapping_entry = self.entries_by_flow.get(flow_key, None)
         command = of.OFPFC_ADD
 
         if overlapping_entry:
-            self.flow_table.remove_entry(overlapping_entry)
+            self._remove_entry(flow_key, overlapping_entry)
             command = of.OFPFC_MODIFY
+            cookie = overlapping_entry.cookie   # a modify keeps the cookie of the entry in the switch
+        else:
+            cookie = next(_cookies)
 
-        self.flow_table.add_entry(new_entry)
+        new_entry = self._new_entry(
+            self._match_of(flow),
+            [of.ofp_action_output(port=output_port)],
+            cookie
+        )
         flow_mod = new_entry.to_flow_mod()
         flow_mod.command = command
-        self.connection.send(flow_mod)
+        packed_flow_mod = flow_mod.pack()
+
+        self._add_entry(flow_key, new_entry)
+        metrics.count_flow_mods(len(packed_flow_mod))
+        return packed_flow_mod
+
+    def restore_action_output(self, flow, output_port, cookie=0):
+        """
+        Adds the entry of the flow to the local flow_table only, for one the switch already has,
+        like the ones installed before the controller restarted. Returns the new entry.
+        Without the cookie the switch has for it, any entry of the flow it notifies as expired is taken as this one
+        """
+        flow_key = flow.key()
+        overlapping_entry = self.entries_by_flow.get(flow_key, None)
+        if overlapping_entry:
+            self._remove_entry(flow_key, overlapping_entry)
+        entry = self._new_entry(self._match_of(flow), [of.ofp_action_output(port=output_port)], cookie)
+        self._add_entry(flow_key, entry)
+        return entry
+
+    def remove_action_output(self, flow):
+        """Removes the entry of the flow from the switch and the local flow_table"""
+        flow_key = flow.key()
+        entry = self.entries_by_flow.get(flow_key, None)
+        if not entry:
+            return  # not installed
+        self._remove_entry(flow_key, entry)
+        self._send_flow_mod(of.ofp_flow_mod(command=of.OFPFC_DELETE_STRICT, match=entry.match))
+
+    def set_backup_output(self, flow, output_port):
+        self._set_proactive_output(
+            self.backup_ports, flow.key(), output_port, self._match_of(flow), BACKUP_PRIORITY
+        )
+
+    def remove_backup_output(self, flow):
+        self._remove_proactive_output(
+            self.backup_ports, flow.key(), self._match_of(flow), BACKUP_PRIORITY
+        )
+
+    def set_destination_output(self, host_mac, output_port):
+        self._set_proactive_output(
+            self.destination_ports, host_mac, output_port,
+            of.ofp_match(dl_dst=EthAddr(host_mac)), DESTINATION_PRIORITY
+        )
+
+    def remove_destination_output(self, host_mac):
+        self._remove_proactive_output(
+            self.destination_ports, host_mac,
+            of.ofp_match(dl_dst=EthAddr(host_mac)), DESTINATION_PRIORITY
+        )
+
+    def set_host_pair_output(self, src_mac, dst_mac, output_port):
+        self._set_proactive_output(
+            self.host_pair_ports, (src_mac, dst_mac), output_port,
+            of.ofp_match(dl_src=EthAddr(src_mac), dl_dst=EthAddr(dst_mac)), HOST_PAIR_PRIORITY
+        )
+
+    def remove_host_pair_output(self, src_mac, dst_mac):
+        self._remove_proactive_output(
+            self.host_pair_ports, (src_mac, dst_mac),
+            of.ofp_match(dl_src=EthAddr(src_mac), dl_dst=EthAddr(dst_mac)), HOST_PAIR_PRIORITY
+        )
+
+    def remove_host_pair_outputs(self, host_mac):
+        """Removes the entries from and to the host"""
+        for src_mac, dst_mac in list(self.host_pair_ports.keys()):
+            if host_mac in (src_mac, dst_mac):
+                self.remove_host_pair_output(src_mac, dst_mac)
+
+    def redirect_arp_broadcasts(self):
+        self._send_flow_mod(
+            of.ofp_flow_mod(
+                command=of.OFPFC_ADD,
+                priority=ARP_REDIRECT_PRIORITY,
+                match=of.ofp_match(dl_type=ethernet.ARP_TYPE, dl_dst=ETHER_BROADCAST),
+                action=of.ofp_action_output(port=of.OFPP_CONTROLLER)
+            )
+        )
+
+    def drop_arp_broadcasts_from(self, port):
+        if port in self.arp_drop_ports:
+            return  # already installed
+        self.arp_drop_ports.add(port)
+        # without actions the packets are dropped
+        self._send_flow_mod(
+            of.ofp_flow_mod(command=of.OFPFC_ADD, priority=ARP_DROP_PRIORITY, match=self._arp_broadcast_match(port))
+        )
+
+    def allow_arp_broadcasts_from(self, port):
+        if port not in self.arp_drop_ports:
+            return  # not installed
+        self.arp_drop_ports.discard(port)
+        self._send_flow_mod(
+            of.ofp_flow_mod(
+                command=of.OFPFC_DELETE_STRICT, priority=ARP_DROP_PRIORITY, match=self._arp_broadcast_match(port)
+            )
+        )
+
+    def _arp_broadcast_match(self, port):
+        return of.ofp_match(in_port=port, dl_type=ethernet.ARP_TYPE, dl_dst=ETHER_BROADCAST)
+
+    def _set_proactive_output(self, ports, key, output_port, match, priority):
+        old_output_port = ports.get(key, None)
+        if old_output_port == output_port:
+            return  # already installed
+        ports[key] = output_port
+        self._send_flow_mod(
+            of.ofp_flow_mod(
+                command=of.OFPFC_ADD if old_output_port is None else of.OFPFC_MODIFY_STRICT,
+                priority=priority,
+                match=match,
+                action=of.ofp_action_output(port=output_port)
+            )
+        )
+
+    def _remove_proactive_output(self, ports, key, match, priority):
+        if ports.pop(key, None) is None:
+            return  # not installed
+        self._send_flow_mod(
+            of.ofp_flow_mod(
+                command=of.OFPFC_DELETE_STRICT,
+                priority=priority,
+                match=match
+            )
+        )
+
+    def _send_flow_mod(self, flow_mod):
+        packed_flow_mod = flow_mod.pack()
+        metrics.count_flow_mods(len(packed_flow_mod))
+        self.connection.send(packed_flow_mod)
+
+    def remove_expired_entry(self, match, cookie=None):
+        """
+        Removes from the local flow_table the entry of the match, which the switch
+        notified that has been removed because of its timeouts. With the cookie of the expired
+        entry, an entry of the flow installed after it is kept. Returns the removed entry, if any
+        """
+        flow_key = (match.nw_proto, match.nw_src, match.tp_src, match.nw_dst, match.tp_dst)
+        entry = self.entries_by_flow.get(flow_key, None)
+        if not entry or (cookie is not None and entry.cookie and entry.cookie != cookie):
+            return None
+        self._remove_entry(flow_key, entry)
+        return entry
+
+    def flow_table_gauge(self):
+        """Returns the quantity of entries of the local flow_table and an estimation of its memory in bytes"""
+        entries = self.entries_by_flow.values()
+        memory = sys.getsizeof(self.entries_by_flow) + sys.getsizeof(self.entries_by_port) + \
+            sys.getsizeof(self.flow_table.entries) + \
+            sum(map(sys.getsizeof, self.entries_by_port.values())) + \
+            sum(sys.getsizeof(entry) + sys.getsizeof(entry.match) for entry in entries)
+        return len(entries), memory
+
+    def _match_of(self, flow):
+        return of.ofp_match(
+            dl_type=ethernet.IP_TYPE,
+            nw_proto=flow.protocol,
+            nw_src=flow.src_ip,
+            tp_src=flow.src_port,
+            nw_dst=flow.dst_ip,
+            tp_dst=flow.dst_port
+        )
+
+    def _new_entry(self, match, actions, cookie):
+        timeouts = self.idle_timeout or self.hard_timeout
+        return TableEntry(
+            cookie=cookie,
+            match=match,
+            actions=actions,
+            idle_timeout=self.idle_timeout,
+            hard_timeout=self.hard_timeout,
+            # to know when the entry expires and remove it from the local flow_table as well
+            flags=of.OFPFF_SEND_FLOW_REM if timeouts else 0
+        )
+
+    def _add_entry(self, flow_key, entry):
+        self.flow_table.add_entry(entry)
+        self.entries_by_flow[flow_key] = entry
+        self.entries_by_port.setdefault(self._output_port_of(entry), {})[flow_key] = entry
+
+    def _remove_entry(self, flow_key, entry):
+        self.flow_table.remove_entry(entry)
+        del self.entries_by_flow[flow_key]
+        port = self._output_port_of(entry)
+        entries_on_port = self.entries_by_port[port]
+        del entries_on_port[flow_key]
+        if not entries_on_port:
+            del self.entries_by_port[port]
 
-    def _find_overlapping_entry(self, entry):
-        for e in self.flow_table.entries:
-            if e.is_matched_by(entry.match) or entry.is_matched_by(e.match):
-                return e
-        return None
+    def _output_port_of(self, entry):
+        return entry.actions[0].port
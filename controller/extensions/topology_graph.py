@@ -0,0 +1,126 @@
+from array import array
+from collections import deque
+
+
+class TopologyGraph:
+    """
+    Compact representation of the links between switches, used by the path engine.
+    Every switch gets an integer id the first time it is added, kept while the controller runs,
+    so the adjacency and the ports are plain lists indexed by it instead of dicts of Switch objects.
+    It is the single entry point to add or remove links, keeping the Switch objects in sync.
+    Between two switches with parallel links the paths only use one of them, the port the
+    Switch objects have to each other, and when it is removed another of them takes its place.
+    """
+    def __init__(self):
+        self.ids = {}           # sw_dpid: sw_id
+        self.switches = []      # sw_id: Switch, None while it is down
+        self.adjacency = []     # sw_id: [linked_sw_id]
+        self.ports = []         # sw_id: {linked_sw_id: output_port}
+
+    def __len__(self):
+        return len(self.switches)
+
+    def add_switch(self, sw):
+        sw_id = self.ids.get(sw.dpid, None)
+        if sw_id is None:
+            sw_id = len(self.switches)
+            self.ids[sw.dpid] = sw_id
+            self.switches.append(sw)
+            self.adjacency.append([])
+            self.ports.append({})
+        else:
+            self.switches[sw_id] = sw   # it came up again, maybe with another connection
+        return sw_id
+
+    def remove_switch(self, sw):
+        """Removes every link from and to the switch, keeping its id for when it comes up again"""
+        sw_id = self.ids.get(sw.dpid, None)
+        if sw_id is None:
+            return
+        for linked_sw_id in self.adjacency[sw_id]:
+            # the neighbors forget the links, the parallel ones too, and delete their entries through them
+            linked_sw = self.switches[linked_sw_id]
+            for port in [port for port, other_sw in linked_sw.get_links() if other_sw == sw]:
+                linked_sw.remove_link(port)
+            self._unlink(linked_sw_id, sw_id)
+        sw.clear_links()    # its connection is down, so nothing is sent to it
+        self.adjacency[sw_id] = []
+        self.ports[sw_id] = {}
+        self.switches[sw_id] = None
+
+    def id_of(self, sw):
+        return self.ids.get(sw.dpid, None)
+
+    def add_link(self, sw_1, port_1, sw_2, port_2):
+        sw_1.add_link(port_1, sw_2)
+        sw_2.add_link(port_2, sw_1)
+        id_1, id_2 = self.ids[sw_1.dpid], self.ids[sw_2.dpid]
+        self._link(id_1, port_1, id_2)
+        self._link(id_2, port_2, id_1)
+
+    def remove_link(self, sw_1, port_1, sw_2, port_2):
+        sw_1.remove_link(port_1)
+        sw_2.remove_link(port_2)
+        self._sync_link(sw_1, sw_2)
+        self._sync_link(sw_2, sw_1)
+
+    def port_between(self, sw_id, linked_sw_id):
+        return self.ports[sw_id].get(linked_sw_id, None)
+
+    def _link(self, sw_id, port, linked_sw_id):
+        if linked_sw_id not in self.ports[sw_id]:
+            self.adjacency[sw_id].append(linked_sw_id)
+        self.ports[sw_id][linked_sw_id] = port
+
+    def _sync_link(self, sw, linked_sw):
+        """Links both switches through the port sw has to linked_sw, if it still has any"""
+        sw_id, linked_sw_id = self.ids[sw.dpid], self.ids[linked_sw.dpid]
+        port = sw.get_port_to(linked_sw)
+        if port is None:
+            self._unlink(sw_id, linked_sw_id)
+        else:
+            self._link(sw_id, port, linked_sw_id)
+
+    def _unlink(self, sw_id, linked_sw_id):
+        if self.ports[sw_id].pop(linked_sw_id, None) is not None:
+            self.adjacency[sw_id].remove(linked_sw_id)
+
+
+def bfs(adjacency, origin_id):
+    """
+    Distances from origin_id to every switch id, -1 for the unreachable ones,
+    and the predecessors of each one through which it is reached with that distance.
+    It only needs the adjacency, so it can be run away from the Switch objects
+    """
+    distances = array('i', [-1]) * len(adjacency)
+    predecessors = [None] * len(adjacency)     # sw_id: [previous_sw_id]
+    distances[origin_id] = 0
+    queue = deque([origin_id])
+    while queue:
+        sw_id = queue.popleft()
+        next_distance = distances[sw_id] + 1
+        for linked_sw_id in adjacency[sw_id]:
+            distance = distances[linked_sw_id]
+            if distance < 0:
+                # first time reached, so it is at the next level of the BFS
+                distances[linked_sw_id] = next_distance
+                predecessors[linked_sw_id] = [sw_id]
+                queue.append(linked_sw_id)
+            elif distance == next_distance:
+                # another way of reaching it with the same cost
+                predecessors[linked_sw_id].append(sw_id)
+    return distances, predecessors
+
+
+def iter_jumps(predecessors, ports, origin_id, sw_id):
+    """
+    Lazily yields every shortest path from origin_id to sw_id of the predecessors of bfs,
+    as tuples of (sw_id, output_port) of the switches before sw_id
+    """
+    if sw_id == origin_id:
+        yield ()
+        return
+    for previous_sw_id in predecessors[sw_id]:
+        port = ports[previous_sw_id][sw_id]
+        for jumps in iter_jumps(predecessors, ports, origin_id, previous_sw_id):
+            yield jumps + ((previous_sw_id, port),)
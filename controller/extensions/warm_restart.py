@@ -0,0 +1,256 @@
+import gzip
+import json
+import os
+import threading
+import pox.openflow.libopenflow_01 as of
+from pox.core import core
+from pox.lib.addresses import IPAddr
+from pox.lib.packet import ethernet
+from pox.lib.recoco import Timer
+from flow import Flow
+
+log = core.getLogger()
+
+CHECKPOINT_VERSION = 1
+
+class WarmRestart:
+    """
+    Saves periodically a checkpoint of the links between switches, the hosts, the shortest paths
+    and the mirrored flow tables to a gzipped json file, and reloads it when the controller starts.
+    While the switches of the checkpoint reconnect, during timeout seconds, their links and hosts
+    are restored without waiting for openflow_discovery and host_tracker, the saved paths are
+    served, and the mirrored flow table of each one is reconciled with the flow statistics it replies.
+    Once the timeout expires the links not confirmed by openflow_discovery are removed,
+    and the paths are calculated for the topology as it is.
+    The statistics replies have to be given to update, and the confirmed links to confirm_link.
+    Only building the state takes the pox thread, it is encoded, compressed and written in another one.
+    """
+    def __init__(self, filename, interval, timeout, switches, hosts, paths_finder, installed_flows,
+                 add_link, remove_link, add_host):
+        self.filename = filename
+        self.interval = interval                # seconds between checkpoints
+        self.timeout = timeout                  # seconds the switches of the checkpoint have to reconnect
+        self.switches = switches                # {sw_dpid: Switch}
+        self.hosts = hosts                      # {host_mac: LinkToSwitch}
+        self.paths_finder = paths_finder
+        self.installed_flows = installed_flows  # InstalledFlows
+        # to restore them as if openflow_discovery and host_tracker had found them
+        self.add_link = add_link                # add_link(sw_1, port_1, sw_2, port_2)
+        self.remove_link = remove_link          # remove_link(sw_1, port_1, sw_2, port_2)
+        self.add_host = add_host                # add_host(host_mac, sw_dpid, port)
+        self.restoring = False
+        self.links = {}             # {sw_dpid: [(port, linked_sw_dpid, linked_port)]} of the checkpoint
+        self.restored_hosts = {}    # {sw_dpid: [(host_mac, port)]} of the checkpoint
+        self.flow_tables = {}       # {sw_dpid: [(Flow, output_port)]} of the checkpoint
+        self.flows = {}             # {Flow: [(sw_dpid, output_port)]} of the checkpoint not restored yet
+        self.unconfirmed_links = set()  # {(sw_dpid, port)} of both ends of the restored links
+        self.reconciling = {}       # {sw_dpid: {Flow: TableEntry}} restored, whose flow statistics are awaited
+        # counters
+        self.checkpoints = 0
+        self.lost_entries = 0       # entries of the checkpoint the switches did not have anymore
+        self.timer = None
+        self.writer = None          # thread writing the last checkpoint
+
+    def start(self):
+        state = self._load()
+        if state:
+            try:
+                self._restore(state)
+                Timer(self.timeout, self._finish)
+            except Exception as error:  # whatever is missing or of another type in it
+                log.warn("Checkpoint %s is malformed, starting cold: %s", self.filename, error)
+        self.timer = Timer(self.interval, self.save, recurring=True)
+
+    def save(self, wait=False):
+        """With wait, as when pox goes down, it returns once the checkpoint is written"""
+        if self.restoring:
+            return  # the state is partial until the switches of the checkpoint reconnect
+        if self.writer and self.writer.is_alive():
+            if not wait:
+                log.warn("Checkpoint skipped, the previous one is still being written.")
+                return
+            self.writer.join()
+        # the keys of the flows are immutable tuples, their ips are turned into strings when encoding
+        state = {
+            'version': CHECKPOINT_VERSION,
+            'links': self._links_state(),
+            'hosts': dict(
+                (host_mac, [link_to_sw.sw_dpid, link_to_sw.port]) for host_mac, link_to_sw in self.hosts.items()
+            ),
+            'paths': self.paths_finder.export_paths(),
+            'flows': [
+                flow.key() + ([(sw.dpid, output_port) for sw, output_port in path],)
+                for flow, path in self.installed_flows.paths.items()
+            ],
+            'flow_tables': dict(
+                (sw.dpid, [flow_key + (entry.actions[0].port,) for flow_key, entry in sw.entries_by_flow.items()])
+                for sw in self.switches.values()
+            ),
+        }
+        self.writer = threading.Thread(target=self._write, args=(state,))
+        self.writer.daemon = True
+        self.writer.start()
+        if wait:
+            self.writer.join()
+
+    def _write(self, state):
+        # written aside and renamed, so a crash while writing does not leave a broken checkpoint
+        temporary = self.filename + '.tmp'
+        try:
+            with gzip.open(temporary, 'wb') as checkpoint:
+                checkpoint.write(json.dumps(state, separators=(',', ':'), default=str).encode('utf-8'))
+            os.rename(temporary, self.filename)
+        except (IOError, OSError) as error:
+            log.error("Checkpoint could not be written to %s: %s", self.filename, error)
+            return
+        self.checkpoints += 1
+        log.debug("Checkpoint of %s switches and %s flows saved to %s.",
+                  len(state['flow_tables']), len(state['flows']), self.filename)
+
+    def _links_state(self):
+        links = []
+        for sw in self.switches.values():
+            for port, linked_sw in sw.get_links():
+                if sw.dpid < linked_sw.dpid:    # each link once
+                    links.append([sw.dpid, port, linked_sw.dpid, linked_sw.get_port_to(sw)])
+        return links
+
+    def _load(self):
+        if not os.path.exists(self.filename):
+            log.info("No checkpoint in %s, starting cold.", self.filename)
+            return None
+        try:
+            with gzip.open(self.filename, 'rb') as checkpoint:
+                state = json.loads(checkpoint.read().decode('utf-8'))
+        except (IOError, ValueError) as error:
+            log.warn("Checkpoint %s could not be read, starting cold: %s", self.filename, error)
+            return None
+        if state.get('version') != CHECKPOINT_VERSION:
+            log.warn("Checkpoint %s is of another version, starting cold.", self.filename)
+            return None
+        return state
+
+    def _restore(self, state):
+        """Raises an error if the state is malformed, leaving everything as it was"""
+        links, restored_hosts, flow_tables, flows = {}, {}, {}, {}
+        # json gives unicode strings on python 2, which pox does not take as addresses
+        for dpid_1, port_1, dpid_2, port_2 in state['links']:
+            links.setdefault(str(dpid_1), []).append((port_1, str(dpid_2), port_2))
+            links.setdefault(str(dpid_2), []).append((port_2, str(dpid_1), port_1))
+        for host_mac, (sw_dpid, port) in state['hosts'].items():
+            restored_hosts.setdefault(str(sw_dpid), []).append((str(host_mac), port))
+        for sw_dpid, entries in state['flow_tables'].items():
+            flow_tables[str(sw_dpid)] = [(self._flow_of(entry[:5]), entry[5]) for entry in entries]
+        for flow_state in state['flows']:
+            flows[self._flow_of(flow_state[:5])] = [(str(sw_dpid), port) for sw_dpid, port in flow_state[5]]
+        paths = dict(
+            (str(origin), dict(
+                (str(destiny), [[(str(sw_dpid), port) for sw_dpid, port in path] for path in paths])
+                for destiny, paths in paths_from_origin.items()
+            ))
+            for origin, paths_from_origin in state['paths'].items()
+        )
+
+        self.links, self.restored_hosts, self.flow_tables, self.flows = links, restored_hosts, flow_tables, flows
+        self.paths_finder.restore_paths(paths)
+        self.restoring = True
+        log.info("Checkpoint of %s switches, %s hosts and %s flows loaded from %s.",
+                 len(flow_tables), len(state['hosts']), len(flows), self.filename)
+
+    def _flow_of(self, flow_state):
+        protocol, src_ip, src_port, dst_ip, dst_port = flow_state
+        return Flow.intern(self._ip_of(src_ip), src_port, self._ip_of(dst_ip), dst_port, protocol)
+
+    def _ip_of(self, ip_state):
+        ip = IPAddr(str(ip_state))
+        # pox takes a string of 4 characters, like 'None', as the bytes of the address
+        if ip.toStr() != ip_state:
+            raise ValueError("%r is not an ip" % ip_state)
+        return ip
+
+    def notifySwitchUp(self, sw):
+        """Restores the links of the switch to the ones already up, its hosts and its flow table"""
+        if not self.restoring:
+            return
+        for port, linked_sw_dpid, linked_port in self.links.pop(sw.dpid, []):
+            linked_sw = self.switches.get(linked_sw_dpid, None)
+            if linked_sw and linked_sw.get_switch_linked_on(linked_port) != sw:
+                self.add_link(sw, port, linked_sw, linked_port)
+                self.unconfirmed_links.update([(sw.dpid, port), (linked_sw_dpid, linked_port)])
+        for host_mac, port in self.restored_hosts.pop(sw.dpid, []):
+            if host_mac not in self.hosts:  # host_tracker could have found it already
+                self.add_host(host_mac, sw.dpid, port)
+
+        if sw.dpid in self.flow_tables:
+            self.reconciling[sw.dpid] = dict(
+                (flow, sw.restore_action_output(flow, output_port))
+                for flow, output_port in self.flow_tables.pop(sw.dpid)
+            )
+            # the entries could have expired or been deleted while the controller was down
+            sw.connection.send(of.ofp_stats_request(body=of.ofp_flow_stats_request()))
+        for flow, path in list(self.flows.items()):
+            if all(sw_dpid in self.switches for sw_dpid, _ in path):
+                del self.flows[flow]
+                self.installed_flows.add(flow, [(self.switches[sw_dpid], port) for sw_dpid, port in path])
+
+    def confirm_link(self, sw_dpid_1, port_1, sw_dpid_2, port_2):
+        self.unconfirmed_links.difference_update([(sw_dpid_1, port_1), (sw_dpid_2, port_2)])
+
+    def update(self, sw_dpid, flows_stats):
+        """
+        Makes the mirrored flow table of the switch match the entries of flows it actually has:
+        the restored ones it does not have are forgotten along with the rest of the path of their flow,
+        and the ones installed after the checkpoint are mirrored
+        """
+        restored_entries = self.reconciling.pop(sw_dpid, None)
+        if restored_entries is None or sw_dpid not in self.switches:
+            return
+        sw = self.switches[sw_dpid]
+        ports = {}  # {Flow: output_port} of the entries of flows in the switch
+        cookies = {}    # {Flow: cookie} of those entries, unknown until now for the restored ones
+        for flow_stats in flows_stats:
+            # the proactive and backup entries have lower priorities, and the ARP redirect one is not of IP
+            match = flow_stats.match
+            if (
+                flow_stats.priority == of.OFP_DEFAULT_PRIORITY and len(flow_stats.actions) == 1
+                and match.dl_type == ethernet.IP_TYPE and match.nw_src is not None and match.nw_dst is not None
+            ):
+                flow = Flow.of_match(match)
+                ports[flow] = flow_stats.actions[0].port
+                cookies[flow] = flow_stats.cookie
+
+        lost_flows = []
+        for flow, entry in restored_entries.items():
+            if sw.entries_by_flow.get(flow.key(), None) is not entry:
+                continue    # the entry was replaced or removed since it was restored
+            if ports.get(flow, None) != entry.actions[0].port:
+                sw.remove_expired_entry(entry.match)
+                lost_flows.append(flow)
+            else:
+                entry.cookie = cookies[flow]
+        for flow, output_port in ports.items():
+            if flow.key() not in sw.entries_by_flow:
+                sw.restore_action_output(flow, output_port, cookies[flow])
+
+        for flow in lost_flows:
+            # without one of its hops the path is not installed anymore, it will be installed again on a PacketIn
+            self.flows.pop(flow, None)
+            for path_sw, _ in self.installed_flows.remove(flow) or []:
+                if path_sw != sw:
+                    path_sw.remove_action_output(flow)
+        self.lost_entries += len(lost_flows)
+        log.info("Flow table of switch %s reconciled: %s entries, %s lost.", sw_dpid, len(ports), len(lost_flows))
+
+    def _finish(self):
+        for sw_dpid, port in list(self.unconfirmed_links):
+            sw = self.switches.get(sw_dpid, None)
+            linked_sw = sw.get_switch_linked_on(port) if sw else None
+            if linked_sw:
+                log.info("Restored link %s:%s - %s not confirmed, removing it.", sw_dpid, port, linked_sw)
+                self.remove_link(sw, port, linked_sw, linked_sw.get_port_to(sw))
+        log.info("Warm restart finished, %s switches of the checkpoint did not reconnect.",
+                 len(set(self.links) | set(self.flow_tables)))
+        self.restoring = False
+        self.unconfirmed_links = set()
+        self.links, self.restored_hosts, self.flow_tables, self.flows = {}, {}, {}, {}
+        self.paths_finder.finish_restore()
@@ -1,28 +1,143 @@
 # coding=utf-8
+import time
 from pox.core import core
 import pox.openflow.discovery
 import pox.host_tracker
 import pox.openflow.libopenflow_01 as of
-from pox.lib.util import dpid_to_str
+from pox.lib.util import dpid_to_str, str_to_bool
+from pox.lib.recoco import Timer
 from extensions.shortest_paths_finder import ShortestPathsFinder
 from extensions.switch import Switch
 from extensions.link_to_switch import LinkToSwitch
 from extensions.flow import Flow
+from extensions.path_installation import PathInstallation, PathSetupStats
+from extensions.pending_flows import PendingFlows
+from extensions.destination_forwarding import DestinationForwarding
+from extensions.proactive_installer import ProactiveInstaller
+from extensions.link_load_monitor import LinkLoadMonitor
+from extensions.load_aware_path_balancer import LoadAwarePathBalancer
+from extensions.installed_flows import InstalledFlows
+from extensions.elephant_flow_monitor import ElephantFlowMonitor
+from extensions.backup_paths import BackupPaths
+from extensions.shortest_paths_dag import ShortestPathsDag
+from extensions.topology_graph import TopologyGraph
+from extensions.metrics import metrics, timed, serve
+from extensions.packet_in_parser import parse_ip_packet_in
+from extensions.warm_restart import WarmRestart
+from extensions.proxy_arp import ProxyArp
 
 log = core.getLogger()
 
+BARRIER_TIMEOUT = 2  # seconds to wait the barriers of a path installation before releasing its packets
+BARRIER_SWEEP_INTERVAL = 0.5  # seconds between the checks of the installations past their BARRIER_TIMEOUT
+METRICS_PREFIX = '/metrics/'   # of the metrics on the web server of webcore, if it is launched
+
 class FatTreeController:
 
-    def __init__(self):
+    def __init__(self, incremental_paths=False, recompute_quiet_window=0, lazy_paths=False, paths_cache_size=1024,
+                 pending_flow_ttl=0, idle_timeout=0, hard_timeout=0, gauge_interval=0, forwarding='flow',
+                 proactive=False, max_proactive_entries=1000, balancer='round_robin', stats_interval=5,
+                 elephant_threshold=0, backup_paths=False, instrument=False, metrics_interval=0,
+                 profile_handlers=(), profile_sample=100, path_workers=0, checkpoint_file='', checkpoint_interval=30,
+                 warm_restart_timeout=20, proxy_arp=False):
         self.switches = {}  # {sw_dpid: Switch}
+        self.switches_by_dpid = {}  # {dpid: Switch}, as pox gives the dpid in the events, to not format it
         self.hosts = {}     # {host_mac: LinkToSwitch}
-        self.paths_finder = ShortestPathsFinder()
+        self.hosts_by_sw = {}   # {sw_dpid: set(host_mac)}, the reverse of hosts
+        self.graph = TopologyGraph()    # links between the switches, indexed by integer ids
+        self.installed_flows = InstalledFlows()
+        self.link_load_monitor = None
+        if balancer == 'load_aware' or elephant_threshold > 0:
+            self.link_load_monitor = LinkLoadMonitor(self.switches, stats_interval)
+        path_balancer = LoadAwarePathBalancer(self.link_load_monitor) if balancer == 'load_aware' else None
+        self.idle_timeout = idle_timeout
+        self.hard_timeout = hard_timeout
+        self.gauge_interval = gauge_interval
+        self.paths_finder = ShortestPathsFinder(
+            self.switches,
+            self.graph,
+            incremental=incremental_paths,
+            quiet_window=recompute_quiet_window,
+            lazy=lazy_paths,
+            cache_size=paths_cache_size,
+            path_balancer=path_balancer,
+            workers=path_workers
+        )
+        self.installations = {}     # {barrier_xid: PathInstallation}
+        self.path_setup_stats = PathSetupStats()
+        self.pending_flows = PendingFlows(pending_flow_ttl) if pending_flow_ttl > 0 else None
+        # 'flow' installs reactively an entry per flow, 'destination' proactively an entry per host
+        self.destination_forwarding = DestinationForwarding(
+            self.switches, self.graph, self.hosts, recompute_quiet_window
+        ) if forwarding == 'destination' else None
+        # install the paths between hosts as soon as they are discovered, only for the 'flow' forwarding
+        self.proactive_installer = None
+        if proactive and not self.destination_forwarding:
+            self.proactive_installer = ProactiveInstaller(self.hosts, self.paths_finder, max_proactive_entries)
+            self.paths_finder.addListener(self.proactive_installer.notifyPathsChanged)
+        self.backup_paths = BackupPaths(self.paths_finder) if backup_paths else None
+        self.elephant_flow_monitor = ElephantFlowMonitor(
+            self.switches, self.installed_flows, self.paths_finder, self.link_load_monitor,
+            self._commit_installation, stats_interval, elephant_threshold, self.backup_paths
+        ) if elephant_threshold > 0 else None
+        self.warm_restart = WarmRestart(
+            checkpoint_file, checkpoint_interval, warm_restart_timeout, self.switches, self.hosts,
+            self.paths_finder, self.installed_flows, self._add_link, self._remove_link, self._restore_host
+        ) if checkpoint_file else None
+        self.proxy_arp = ProxyArp(self.switches, self.hosts) if proxy_arp else None
+        metrics.enabled = instrument
+        self.metrics_interval = metrics_interval
+        self._add_metrics_gauges()
+        if profile_handlers:
+            metrics.profile_handlers(self, profile_handlers, profile_sample)
         core.call_when_ready(self.startup, ('openflow', 'openflow_discovery', 'host_tracker'))
+        core.call_when_ready(serve, 'WebServer', args=(METRICS_PREFIX,))
+
+    def _add_metrics_gauges(self):
+        """Publishes the counters kept by the extensions along with the metrics"""
+        metrics.add_gauge('switches', lambda: len(self.switches))
+        metrics.add_gauge('hosts', lambda: len(self.hosts))
+        metrics.add_gauge('installed_flows', lambda: len(self.installed_flows))
+        metrics.add_gauge('path_setups', lambda: self.path_setup_stats.count)
+        metrics.add_gauge('path_setup_timeouts', lambda: self.path_setup_stats.timeouts)
+        metrics.add_gauge('path_setup_mean_latency_seconds', self.path_setup_stats.mean_latency)
+        metrics.add_gauge('path_setup_max_latency_seconds', lambda: self.path_setup_stats.max_latency)
+        if self.pending_flows:
+            metrics.add_gauge('suppressed_packet_ins', lambda: self.pending_flows.suppressed_packet_ins)
+        recompute_scheduler = self.paths_finder.recompute_scheduler
+        if recompute_scheduler:
+            metrics.add_gauge('paths_recomputes', lambda: recompute_scheduler.recomputes)
+            metrics.add_gauge('paths_events_coalesced', lambda: recompute_scheduler.events_coalesced)
+        if self.proactive_installer:
+            metrics.add_gauge('proactive_skipped_pairs', lambda: self.proactive_installer.skipped_pairs)
+        if self.elephant_flow_monitor:
+            metrics.add_gauge('elephants_detected', lambda: self.elephant_flow_monitor.elephants_detected)
+            metrics.add_gauge('elephant_migrations', lambda: self.elephant_flow_monitor.migrations)
+        if self.warm_restart:
+            metrics.add_gauge('checkpoints', lambda: self.warm_restart.checkpoints)
+            metrics.add_gauge('restored_entries_lost', lambda: self.warm_restart.lost_entries)
+        if self.proxy_arp:
+            metrics.add_gauge('arp_requests_answered', lambda: self.proxy_arp.answered)
+            metrics.add_gauge('arp_requests_flooded', lambda: self.proxy_arp.flooded)
 
     def startup(self):
         core.openflow.addListeners(self)
         core.openflow_discovery.addListeners(self)
         core.host_tracker.addListenerByName("HostEvent", self._handle_HostEvent)
+        core.addListenerByName("GoingDownEvent", lambda event: self.paths_finder.close())
+        # a single timer for every installation instead of one per installation, which is a PacketIn
+        Timer(BARRIER_SWEEP_INTERVAL, self._expire_installations, recurring=True)
+        if self.gauge_interval > 0:
+            Timer(self.gauge_interval, self._log_flow_tables_gauge, recurring=True)
+        if self.link_load_monitor:
+            self.link_load_monitor.start()
+        if self.elephant_flow_monitor:
+            self.elephant_flow_monitor.start()
+        if self.metrics_interval > 0:
+            Timer(self.metrics_interval, self._log_metrics, recurring=True)
+        if self.warm_restart:
+            self.warm_restart.start()
+            core.addListenerByName("GoingDownEvent", lambda event: self.warm_restart.save(wait=True))
         log.info('Controller initialized')
 
     def _handle_ConnectionUp(self, event):
@@ -32,7 +147,13 @@ class FatTreeController:
         dpid = dpid_to_str(event.dpid)
         log.info("Switch %s has come up.", dpid)
         if not dpid in self.switches:
-            self.switches[dpid] = Switch(dpid, event.connection)
+            self.switches[dpid] = Switch(dpid, event.connection, self.idle_timeout, self.hard_timeout)
+            self.switches_by_dpid[event.dpid] = self.switches[dpid]
+            self.graph.add_switch(self.switches[dpid])
+            if self.proxy_arp:
+                self.proxy_arp.notifySwitchUp(self.switches[dpid])
+            if self.warm_restart:
+                self.warm_restart.notifySwitchUp(self.switches[dpid])
 
     def _handle_ConnectionDown(self, event):
         """
@@ -42,13 +163,31 @@ class FatTreeController:
         assert dpid in self.switches
 
         log.info("Switch %s has come down.", dpid)
-        for host, link_to_sw in self.hosts.items():
-            if link_to_sw.sw_dpid == dpid:
-                # the host is not connected to any switch so its not in the topology anymore
-                self.hosts.pop(host)
-                self.paths_finder.notifyHostsChanged(self.hosts)
-        self.switches.pop(dpid, None)
-        self.paths_finder.notifyLinksChanged()
+        # its hosts are not connected to any switch so they are not in the topology anymore
+        for host_mac in self.hosts_by_sw.pop(dpid, set()):
+            self.hosts.pop(host_mac)
+            if self.proactive_installer:
+                self.proactive_installer.notifyHostLeft(host_mac, self.switches)
+            if self.proxy_arp:
+                self.proxy_arp.forget(host_mac)
+        self._forget_flows_through(self.switches[dpid])
+        self.switches_by_dpid.pop(event.dpid, None)
+        self.graph.remove_switch(self.switches.pop(dpid))
+        self.paths_finder.notifySwitchRemoved(dpid)
+        if self.destination_forwarding:
+            self.destination_forwarding.notifyTopologyChanged()
+
+    def _forget_flows_through(self, down_sw):
+        """
+        The entries of the switch went down with it, so the flows through it are not installed anymore:
+        their entries on the rest of the switches are removed, and they will be installed again on a PacketIn
+        """
+        for flow in self.installed_flows.flows_through_switch(down_sw.dpid):
+            for sw, _ in self.installed_flows.remove(flow):
+                if sw != down_sw:
+                    sw.remove_action_output(flow)
+            if self.backup_paths:
+                self.backup_paths.remove(flow)
 
     def _handle_HostEvent(self, event):
         """
@@ -62,17 +201,60 @@ class FatTreeController:
         sw_port = event.entry.port
 
         host_mac = event.entry.macaddr.toStr()
+        old_link_to_sw = self.hosts.get(host_mac, None)
         if event.leave:
             log.info("Host %s has disconnected from %s:%s.", host_mac, sw_dpid, sw_port)
-            # with default because it could be deleted if the host has no switch
-            self.hosts.pop(host_mac, None)
+            # it could be already deleted if its switch went down
+            if old_link_to_sw:
+                self.hosts.pop(host_mac)
+                self._unlink_host(host_mac, old_link_to_sw.sw_dpid)
+            if self.proactive_installer:
+                self.proactive_installer.notifyHostLeft(host_mac, self.switches)
+            if self.proxy_arp:
+                self.proxy_arp.forget(host_mac)
         else:
             log.info("Host %s has connected to %s:%s.", host_mac, sw_dpid, sw_port)
-            self.hosts[host_mac] = LinkToSwitch(self.switches, sw_dpid, sw_port)
+            self._link_host(host_mac, sw_dpid, sw_port)
+            if self.proxy_arp:
+                for ip in event.entry.ipAddrs.keys():
+                    self.proxy_arp.learn(ip, host_mac)
+
+        if sw_dpid in self.switches: # only sync the forwarding if the linked sw is already up
+            if self.destination_forwarding:
+                self.destination_forwarding.notifyHostChanged(host_mac)
+            if self.proactive_installer and not event.leave:
+                self.proactive_installer.notifyHostJoined(host_mac)
+
+    def _link_host(self, host_mac, sw_dpid, sw_port):
+        old_link_to_sw = self.hosts.get(host_mac, None)
+        self.hosts[host_mac] = LinkToSwitch(self.switches, sw_dpid, sw_port)
+        self.hosts_by_sw.setdefault(sw_dpid, set()).add(host_mac)
+        self.paths_finder.notifyHostAdded(sw_dpid)
+        if old_link_to_sw:
+            # unlinked once linked again, to not leave its switch without hosts for a moment if it is the same
+            self._unlink_host(host_mac, old_link_to_sw.sw_dpid)
 
-        if sw_dpid in self.switches: # only find new paths if the linked sw is already up
-            self.paths_finder.notifyHostsChanged(self.hosts)
+    def _restore_host(self, host_mac, sw_dpid, sw_port):
+        """Links a host of the checkpoint of a warm restart, as if host_tracker had found it"""
+        log.info("Host %s restored on %s:%s.", host_mac, sw_dpid, sw_port)
+        self._link_host(host_mac, sw_dpid, sw_port)
+        if self.destination_forwarding:
+            self.destination_forwarding.notifyHostChanged(host_mac)
+        if self.proactive_installer:
+            self.proactive_installer.notifyHostJoined(host_mac)
 
+    def _unlink_host(self, host_mac, sw_dpid):
+        """Removes the host from the hosts of sw_dpid, unless it is still linked to it through another port"""
+        self.paths_finder.notifyHostRemoved(sw_dpid)
+        link_to_sw = self.hosts.get(host_mac, None)
+        if link_to_sw and link_to_sw.sw_dpid == sw_dpid:
+            return
+        hosts_of_sw = self.hosts_by_sw.get(sw_dpid, set())
+        hosts_of_sw.discard(host_mac)
+        if not hosts_of_sw:
+            self.hosts_by_sw.pop(sw_dpid, None)
+
+    @timed('packet_in')
     def _handle_PacketIn(self, event):
         """Called when:
         - A packet does not have a matching FlowEntry in switch.
@@ -82,43 +264,80 @@ class FatTreeController:
             https://noxrepo.github.io/pox-doc/html/#ofp-flow-mod-flow-table-modification
             https://noxrepo.github.io/pox-doc/html/#match-structure
         """
-        eth_packet = event.parsed
-        if eth_packet.type == eth_packet.IP_TYPE:
-            ip_packet = eth_packet.payload
-            src_mac = eth_packet.src.toStr()
-            dst_mac = eth_packet.dst.toStr()
-            dpid = dpid_to_str(event.dpid)
+        metrics.incr('packet_ins')
+        # the packets are read straight from their bytes, pox only parses the ones that can not be read so
+        parsed = parse_ip_packet_in(event.data) or self._parse_ip_packet_in(event)
+        if parsed:
+            src_mac, dst_mac, new_flow = parsed
+            sw = self.switches_by_dpid.get(event.dpid, None)
 
-            assert dpid in self.switches
-
-            new_flow = Flow.of(ip_packet)
+            assert sw
 
             if src_mac not in self.hosts or dst_mac not in self.hosts:
                 log.warn("No posible path beetween hosts %s and %s.", src_mac, dst_mac)
                 return
 
-            log.info("Packet arrived to switch %s:%s from %s<%s> to %s<%s>",
-                     dpid, event.port, src_mac,
-                     new_flow.src_ip, dst_mac, new_flow.dst_ip)
+            if self.proxy_arp:
+                self.proxy_arp.learn(new_flow.src_ip, src_mac)
+
+            # debug because it is logged for every packet in
+            log.debug("Packet arrived to switch %s:%s from %s<%s> to %s<%s>",
+                      sw, event.port, src_mac,
+                      new_flow.src_ip, dst_mac, new_flow.dst_ip)
+
+            if self.destination_forwarding:
+                self._forward_by_destination(event, sw, dst_mac)
+                return
+
+            # dont lose the packet that generated the packet in, but only send it when the path is installed
+            packet_out = of.ofp_packet_out(data=event.data, action=of.ofp_action_output(port=of.OFPP_TABLE))
 
+            pending_installation = self.pending_flows.get(new_flow) if self.pending_flows else None
+            if pending_installation:
+                # another packet of the flow already chose the path, so follow it instead of installing another one
+                self.pending_flows.suppressed_packet_ins += 1
+                pending_installation.add_packet_out(self.hosts[src_mac].sw, packet_out)
+                return
+
+            installation = PathInstallation()
+            if self.pending_flows:
+                self.pending_flows.add(new_flow, installation)
             # src and dest connected to the same sw
             if self.hosts[src_mac].sw_dpid == self.hosts[dst_mac].sw_dpid:
-                sw = self.switches[dpid]
-                self._set_shared_switch_output_port(sw, src_mac, dst_mac, new_flow)
+                self._set_shared_switch_output_port(installation, sw, src_mac, dst_mac, new_flow)
             else:
                 sw_linked_to_src = self.hosts[src_mac].sw
                 sw_linked_to_dst = self.hosts[dst_mac].sw
-                self._set_path(sw_linked_to_src, sw_linked_to_dst, src_mac, dst_mac, new_flow)
+                self._set_path(installation, sw_linked_to_src, sw_linked_to_dst, src_mac, dst_mac, new_flow)
 
-            # dont lose the packet that generated the packet in
-            packet_out = of.ofp_packet_out(data=eth_packet, action=of.ofp_action_output(port=of.OFPP_TABLE))
-            self.hosts[src_mac].sw.connection.send(packet_out)
+            installation.add_packet_out(self.hosts[src_mac].sw, packet_out)
+            self._commit_installation(installation)
+        elif self.proxy_arp:
+            self.proxy_arp.handle_packet_in(event)
+
+    def _parse_ip_packet_in(self, event):
+        """(src_mac, dst_mac, Flow) of the packet parsed by pox, None if it is not an IP one"""
+        eth_packet = event.parsed
+        if eth_packet.type != eth_packet.IP_TYPE:
+            return None
+        return eth_packet.src.toStr(), eth_packet.dst.toStr(), Flow.of(eth_packet.payload)
 
-    def _set_shared_switch_output_port(self, sw, src_mac, dst_mac, flow):
-        sw.add_action_output(flow, self.hosts[dst_mac].port)            # Since hosts share same switch, the paths
-        sw.add_action_output(flow.reverse(), self.hosts[src_mac].port)  # between them will be the same but reversed
+    def _forward_by_destination(self, event, sw, dst_mac):
+        """The entries of the destination were not installed yet when the packet arrived to the switch"""
+        output_port = self.destination_forwarding.get_output_port(sw, dst_mac)
+        if output_port is None:
+            log.warn("No entry to host %s on switch %s yet.", dst_mac, sw.dpid)
+            return
+        sw.connection.send(of.ofp_packet_out(data=event.ofp, action=of.ofp_action_output(port=output_port)))
 
-    def _set_path(self, src_sw, dst_sw, src_mac, dst_mac, flow):
+    def _set_shared_switch_output_port(self, installation, sw, src_mac, dst_mac, flow):
+        installation.add_action_output(sw, flow, self.hosts[dst_mac].port)            # Since hosts share same switch, the paths
+        installation.add_action_output(sw, flow.reverse(), self.hosts[src_mac].port)  # between them will be the same but reversed
+        self.installed_flows.add(flow, [(sw, self.hosts[dst_mac].port)])
+        self.installed_flows.add(flow.reverse(), [(sw, self.hosts[src_mac].port)])
+
+    @timed('set_path')
+    def _set_path(self, installation, src_sw, dst_sw, src_mac, dst_mac, flow):
         path_to = self.paths_finder.get_path(src_sw.dpid, dst_sw.dpid)      # Since I'm already going from one switch to
         path_from = self.paths_finder.get_path(dst_sw.dpid, src_sw.dpid)    # another, I should define the way back as well
         if not path_from or not path_to:
@@ -129,12 +348,127 @@ class FatTreeController:
 
         for i in range(len(paths)):
             path, mac, flow = paths[i], macs[i], flows[i]
+            installed_path = []
 
             for sw, output_port in path:
                 if not output_port:     # the last switch
                     output_port = self.hosts[mac].port
 
-                sw.add_action_output(flow, output_port)
+                installation.add_action_output(sw, flow, output_port)
+                installed_path.append((sw, output_port))
+            self.installed_flows.add(flow, installed_path)
+            if self.backup_paths:
+                # the backups are not needed to release the packet, so they are installed afterwards
+                installation.add_callback(
+                    lambda flow=flow, path=installed_path: self.backup_paths.install(flow, path))
+
+    def _commit_installation(self, installation):
+        xids = installation.commit()
+        if installation.released:
+            return  # nothing to wait for
+        for xid in xids:
+            self.installations[xid] = installation
+
+    def _expire_installations(self):
+        """Releases the installations committed more than BARRIER_TIMEOUT ago whose barriers were not replied"""
+        deadline = time.time() - BARRIER_TIMEOUT
+        expired = set(
+            installation for installation in self.installations.values() if installation.start_time <= deadline
+        )
+        for installation in expired:
+            for xid in installation.pending_barriers:
+                self.installations.pop(xid, None)
+            log.warn("Barriers of a path installation not replied by %s, releasing its packets anyway.",
+                     list(installation.pending_barriers.values()))
+            installation.release()
+            self.path_setup_stats.timeouts += 1
+
+    def _handle_BarrierIn(self, event):
+        """
+        Called when a switch replies a barrier request, so all the messages sent before it were applied
+        Ref: https://noxrepo.github.io/pox-doc/html/#barrierin
+        """
+        installation = self.installations.pop(event.xid, None)
+        if installation and installation.barrier_replied(event.xid):
+            self.path_setup_stats.add(installation)
+            log.debug("Path installed on %s switches in %.2f ms.",
+                      len(installation.messages), installation.latency * 1000)
+
+    def _handle_FlowRemoved(self, event):
+        """
+        Called when an entry installed with timeouts expires in a switch
+        Ref: https://noxrepo.github.io/pox-doc/html/#flowremoved
+        """
+        dpid = dpid_to_str(event.dpid)
+        # the entries deleted by the controller are already removed from the local flow tables
+        if not event.timeout or dpid not in self.switches:
+            return
+        # an entry that expired before the flow was installed again is not the one the switch has now
+        if self.switches[dpid].remove_expired_entry(event.ofp.match, event.ofp.cookie):
+            # without one of its hops the path is not installed anymore
+            flow = Flow.of_match(event.ofp.match)
+            self.installed_flows.remove(flow)
+            if self.backup_paths:
+                self.backup_paths.remove(flow)
+
+    def _handle_PortStatus(self, event):
+        """
+        Called when a port of a switch is added, removed or modified, as when its link goes down or up.
+        OpenFlow 1.0 switches keep the entries through a port that went down, so the controller deletes them
+        and the backup entries take over until openflow_discovery times the link out
+        Ref: https://noxrepo.github.io/pox-doc/html/#portstatus
+        """
+        sw = self.switches.get(dpid_to_str(event.dpid), None)
+        port = event.ofp.desc.port_no
+        if not self.backup_paths or not sw or not sw.get_switch_linked_on(port):
+            return
+        desc = event.ofp.desc
+        if event.deleted or desc.config & of.OFPPC_PORT_DOWN or desc.state & of.OFPPS_LINK_DOWN:
+            log.info("Port %s of switch %s is down, deleting the entries through it.", port, sw.dpid)
+            sw.remove_entries_through(port)
+        else:
+            # the link came back before it was timed out, so the entries through it are installed again
+            self._restore_entries_through(sw, port)
+
+    def _restore_entries_through(self, sw, port):
+        """The flows, backups, destinations and host pairs through a port still have it in their paths"""
+        for flow in self.installed_flows.flows_through(sw.dpid, port):
+            if flow.key() not in sw.entries_by_flow:
+                sw.add_action_output(flow, port)
+        for flow, backups in list(self.backup_paths.backups.items()):
+            if (sw, port) in backups and flow in self.installed_flows:
+                self.backup_paths.install(flow, self.installed_flows.get(flow))
+        # the entries that did not change are not sent again
+        if self.destination_forwarding:
+            self.destination_forwarding.notifyEntriesDeleted()
+        if self.proactive_installer:
+            self.proactive_installer.notifyPathsChanged()
+
+    def _handle_PortStatsReceived(self, event):
+        """
+        Called when a switch replies the port statistics requested by the LinkLoadMonitor
+        Ref: https://noxrepo.github.io/pox-doc/html/#statistics-events
+        """
+        if self.link_load_monitor:
+            self.link_load_monitor.update(dpid_to_str(event.dpid), event.stats)
+
+    def _handle_FlowStatsReceived(self, event):
+        """
+        Called when a switch replies the flow statistics requested by the ElephantFlowMonitor
+        Ref: https://noxrepo.github.io/pox-doc/html/#statistics-events
+        """
+        if self.elephant_flow_monitor:
+            self.elephant_flow_monitor.update(dpid_to_str(event.dpid), event.stats)
+        if self.warm_restart:
+            self.warm_restart.update(dpid_to_str(event.dpid), event.stats)
+
+    def _log_flow_tables_gauge(self):
+        for dpid, sw in self.switches.items():
+            entries, memory = sw.flow_table_gauge()
+            log.info("Switch %s has %s entries in its flow table (%s bytes).", dpid, entries, memory)
+
+    def _log_metrics(self):
+        log.info("Metrics:\n%s", metrics.render())
 
     def _handle_LinkEvent(self, event):
         """
@@ -157,20 +491,178 @@ class FatTreeController:
             and (sw_linked_by_1 != sw_2 or sw_linked_by_2 != sw_1)
         ):
             log.info("Link has been added from %s:%s to %s:%s", dpid1, link.port1, dpid2, link.port2)
-            sw_1.add_link(link.port1, sw_2)
-            sw_2.add_link(link.port2, sw_1)
-            self.paths_finder.notifyLinksChanged()
+            self._add_link(sw_1, link.port1, sw_2, link.port2)
         # idem check if setted because the link event is raised in both ways
         elif (
             event.removed
             and (sw_linked_by_1 or sw_linked_by_2)
         ):
             log.info("Link has been removed from %s:%s to %s:%s", dpid1, link.port1, dpid2, link.port2)
-            sw_1.remove_link(link.port1)
-            sw_2.remove_link(link.port2)
-            self.paths_finder.notifyLinksChanged()
+            self._remove_link(sw_1, link.port1, sw_2, link.port2)
+        if event.added and self.warm_restart:
+            # the links restored from the checkpoint that openflow_discovery does not find are removed
+            self.warm_restart.confirm_link(dpid1, link.port1, dpid2, link.port2)
+
+    def _add_link(self, sw_1, port_1, sw_2, port_2):
+        self.graph.add_link(sw_1, port_1, sw_2, port_2)
+        self.paths_finder.notifyLinkAdded(sw_1, sw_2)
+        if self.destination_forwarding:
+            self.destination_forwarding.notifyLinkChanged(sw_1, sw_2)
+        if self.proxy_arp:
+            self.proxy_arp.notifyLinkAdded(sw_1, port_1, sw_2, port_2)
+
+    def _remove_link(self, sw_1, port_1, sw_2, port_2):
+        self.graph.remove_link(sw_1, port_1, sw_2, port_2)
+        self.paths_finder.notifyLinkRemoved(sw_1, sw_2)
+        if self.destination_forwarding:
+            self.destination_forwarding.notifyLinkChanged(sw_1, sw_2)
+        self._repair_flows_through(sw_1, port_1, sw_2, port_2)
+        if self.proxy_arp:
+            self.proxy_arp.notifyLinkRemoved(sw_1, port_1, sw_2, port_2)
+
+    def _repair_flows_through(self, sw_1, port_1, sw_2, port_2):
+        """
+        Moves the installed flows that went through the removed link to another path, in both
+        directions and on every switch of it, leaving the rest of the entries untouched
+        """
+        flows = self.installed_flows.flows_through(sw_1.dpid, port_1) | \
+            self.installed_flows.flows_through(sw_2.dpid, port_2)
+        if not flows:
+            return
+
+        installation = PathInstallation()
+        for flow in flows:
+            old_path = self.installed_flows.get(flow)
+            new_path = self._find_repaired_path(old_path)
+            if new_path:
+                for sw, output_port in new_path:
+                    installation.add_action_output(sw, flow, output_port)
+                self.installed_flows.add(flow, new_path)
+                if self.backup_paths:
+                    installation.add_callback(
+                        lambda flow=flow, path=new_path: self.backup_paths.install(flow, path))
+            else:
+                self.installed_flows.remove(flow)
+                if self.backup_paths:
+                    self.backup_paths.remove(flow)
+            # once the new path is applied, remove the entries of the switches that are not in it anymore
+            stale_sws = set(sw for sw, _ in old_path) - set(sw for sw, _ in new_path or [])
+            installation.add_callback(
+                lambda flow=flow, stale_sws=stale_sws: self._remove_stale_entries(flow, stale_sws))
+        log.info("Repairing %s flows that went through the link %s:%s - %s:%s.",
+                 len(flows), sw_1, port_1, sw_2, port_2)
+        self._commit_installation(installation)
+
+    def _remove_stale_entries(self, flow, stale_sws):
+        for sw in stale_sws:
+            sw.remove_action_output(flow)
+
+    def _find_repaired_path(self, old_path):
+        """
+        The shortest path between the ends of old_path that shares the most hops with it,
+        taken without advancing the balancing of the paths. None if there is not any
+        """
+        first_sw, last_sw = old_path[0][0], old_path[-1][0]
+        host_port = old_path[-1][1]
+        if first_sw == last_sw:
+            return old_path
+        candidates = [
+            path for path in self.paths_finder.get_paths(first_sw.dpid, last_sw.dpid) if self._is_linked(path)
+        ]
+        if not candidates:
+            # the paths could be waiting to be recomputed after the link change
+            candidates = ShortestPathsDag(self.graph, first_sw).get_paths_to(last_sw)
+        if not candidates:
+            return None
+        old_hops = set(old_path)
+        best = max(candidates, key=lambda path: len(old_hops.intersection(path)))
+        return [(sw, output_port or host_port) for sw, output_port in best]
+
+    def _is_linked(self, path):
+        for i in range(len(path) - 1):
+            sw, output_port = path[i]
+            if sw.get_switch_linked_on(output_port) != path[i + 1][0]:
+                return False
+        return True
 
-def launch():
-    core.registerNew(FatTreeController)
+def launch(incremental_paths=False, recompute_quiet_window=0, lazy_paths=False, paths_cache_size=1024,
+           pending_flow_ttl=0, idle_timeout=0, hard_timeout=0, gauge_interval=0, forwarding='flow',
+           proactive=False, max_proactive_entries=1000, balancer='round_robin', stats_interval=5,
+           elephant_threshold=0, backup_paths=False, instrument=False, metrics_interval=0,
+           profile_handlers='', profile_sample=100, path_workers=0, checkpoint_file='', checkpoint_interval=30,
+           warm_restart_timeout=20, proxy_arp=False):
+    """
+    Args:
+        incremental_paths: on a link change only rebuild the shortest paths affected by it
+        recompute_quiet_window: seconds without topology changes to wait before recomputing
+            the shortest paths once for all of them, 0 to recompute on every change
+        lazy_paths: find the paths between two switches the first time they are needed
+            instead of between every pair of switches linked to a host
+        paths_cache_size: max quantity of switch pairs whose paths are kept in lazy mode
+        pending_flow_ttl: seconds during which the PacketIns of a flow follow the path chosen by the
+            first one instead of installing a new one, 0 to not suppress them
+        idle_timeout: seconds without traffic after which the installed entries expire, 0 to never expire
+        hard_timeout: seconds after which the installed entries expire, 0 to never expire
+        gauge_interval: seconds between logs of the size of every flow table, 0 to not log them
+        forwarding: 'flow' to install reactively an entry per flow on its path, or 'destination'
+            to install proactively on every switch an entry per host matching its mac as destination
+        proactive: with 'flow' forwarding, install the paths between every pair of hosts as soon as
+            they are discovered, matching both macs, so the first packet does not go to the controller
+        max_proactive_entries: max quantity of entries installed proactively on each switch
+        balancer: how to choose between the equal cost paths, 'round_robin' or 'load_aware'
+            to choose the least loaded one according to the port statistics of the switches
+        stats_interval: seconds between polls of the port and flow statistics
+        elephant_threshold: bytes per second from which a flow is migrated to the least loaded
+            equal cost path, 0 to not migrate flows
+        backup_paths: install with lower priority backup next hops for every hop of a flow path
+            from the other equal cost paths, used by the switch when the link of the hop goes down
+        instrument: measure the duration of the handling of PacketIns, the installation of paths,
+            the recompute of the shortest paths and the preparation of flow mods. The metrics are
+            published on /metrics/ of the web server if web.webcore is launched too
+        metrics_interval: seconds between logs of the metrics, 0 to not log them
+        profile_handlers: comma separated names of event handlers, like _handle_PacketIn,
+            to run one of every profile_sample calls of them under cProfile, published with the metrics
+        profile_sample: one of how many calls of the profiled handlers is profiled
+        path_workers: processes among which to split the recompute of the shortest paths, out of
+            the pox thread, serving the old paths until it finishes. 0 to recompute them in the pox thread
+        checkpoint_file: file where the links, hosts, shortest paths and flow tables are saved, and reloaded
+            from when the controller starts, so it does not wait to discover them again. Empty to not save them
+        checkpoint_interval: seconds between saves of the checkpoint
+        warm_restart_timeout: seconds the switches of the checkpoint have to reconnect, while its paths are
+            served. Then the links not discovered again are removed and the paths are recomputed
+        proxy_arp: answer the ARP requests from the controller with the macs of the known hosts, and
+            drop the ARP broadcasts between switches, so they are not flooded through the fat tree
+    """
+    if forwarding not in ['flow', 'destination']:
+        raise RuntimeError("Forwarding must be 'flow' or 'destination'.")
+    if balancer not in ['round_robin', 'load_aware']:
+        raise RuntimeError("Balancer must be 'round_robin' or 'load_aware'.")
+    core.registerNew(
+        FatTreeController,
+        incremental_paths=str_to_bool(incremental_paths),
+        recompute_quiet_window=float(recompute_quiet_window),
+        lazy_paths=str_to_bool(lazy_paths),
+        paths_cache_size=int(paths_cache_size),
+        pending_flow_ttl=float(pending_flow_ttl),
+        idle_timeout=int(idle_timeout),
+        hard_timeout=int(hard_timeout),
+        gauge_interval=float(gauge_interval),
+        forwarding=forwarding,
+        proactive=str_to_bool(proactive),
+        max_proactive_entries=int(max_proactive_entries),
+        balancer=balancer,
+        stats_interval=float(stats_interval),
+        elephant_threshold=float(elephant_threshold),
+        backup_paths=str_to_bool(backup_paths),
+        instrument=str_to_bool(instrument),
+        metrics_interval=float(metrics_interval),
+        profile_handlers=[name for name in profile_handlers.split(',') if name],
+        profile_sample=int(profile_sample),
+        path_workers=int(path_workers),
+        checkpoint_file=checkpoint_file,
+        checkpoint_interval=float(checkpoint_interval),
+        warm_restart_timeout=float(warm_restart_timeout),
+        proxy_arp=str_to_bool(proxy_arp)
+    )
     pox.openflow.discovery.launch()
     pox.host_tracker.launch()
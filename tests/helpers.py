@@ -0,0 +1,43 @@
+"""
+Helpers shared by the tests. As benchmark/simulator.py, they only need pox (the submodule)
+and no switch, and are run from the root of the repository with
+
+    python -m unittest discover -s tests
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmark'))
+
+from common import setup_sys_path, FakeConnection
+
+setup_sys_path()
+
+from pox.lib.util import dpid_to_str
+from extensions.switch import Switch
+from extensions.topology_graph import TopologyGraph
+
+# 1 - 2 - 4 - 5 and 1 - 3 - 4, so there are two shortest paths between 1 and 4 or 5
+DIAMOND_LINKS = [(1, 1, 2, 1), (1, 2, 3, 1), (2, 2, 4, 1), (3, 2, 4, 2), (4, 3, 5, 1)]
+
+
+def build_topology(links, graph=None):
+    """
+    Switches with a FakeConnection linked through graph (a new TopologyGraph if not given)
+    as links, [(dpid_1, port_1, dpid_2, port_2)] with the dpids as the ints pox gives.
+    Returns (graph, switches) with switches as {sw_dpid: Switch}
+    """
+    graph = graph if graph is not None else TopologyGraph()
+    switches = {}
+    for dpid_1, _, dpid_2, _ in links:
+        for dpid in [dpid_1, dpid_2]:
+            if dpid_to_str(dpid) not in switches:
+                switches[dpid_to_str(dpid)] = Switch(dpid_to_str(dpid), FakeConnection(dpid))
+                graph.add_switch(switches[dpid_to_str(dpid)])
+    for dpid_1, port_1, dpid_2, port_2 in links:
+        graph.add_link(switches[dpid_to_str(dpid_1)], port_1, switches[dpid_to_str(dpid_2)], port_2)
+    return graph, switches
+
+
+def sw_of(switches, dpid):
+    return switches[dpid_to_str(dpid)]
@@ -0,0 +1,50 @@
+import unittest
+import helpers
+
+import fat_tree_controller
+from common import FakeBarrierIn
+from simulator import Simulator
+
+
+class BarrierTimeoutTest(unittest.TestCase):
+    def setUp(self):
+        self.simulator = Simulator(3)
+        self.simulator.start()
+        self.controller = self.simulator.controller
+        # the switches do not reply the barriers
+        for event in self.simulator.build_packet_ins(20, 20):
+            self.controller._handle_PacketIn(event)
+        self.installations = set(self.controller.installations.values())
+
+    def age(self, installations, seconds):
+        for installation in installations:
+            installation.start_time -= seconds
+
+    def test_recent_installations_kept(self):
+        self.age(self.installations, fat_tree_controller.BARRIER_TIMEOUT / 2.0)
+        self.controller._expire_installations()
+        self.assertEqual(set(self.controller.installations.values()), self.installations)
+        self.assertEqual(self.controller.path_setup_stats.timeouts, 0)
+
+    def test_installations_past_the_timeout_released(self):
+        self.assertTrue(self.installations)
+        old = set(list(self.installations)[:len(self.installations) // 2])
+        self.age(old, fat_tree_controller.BARRIER_TIMEOUT)
+        self.controller._expire_installations()
+        self.assertEqual(set(self.controller.installations.values()), self.installations - old)
+        self.assertTrue(all(installation.released and not installation.confirmed for installation in old))
+        self.assertFalse(any(installation.released for installation in self.installations - old))
+        self.assertEqual(self.controller.path_setup_stats.timeouts, len(old))
+
+    def test_late_barrier_of_a_released_installation_ignored(self):
+        installation = next(iter(self.installations))
+        xid = next(iter(installation.pending_barriers))
+        self.age([installation], fat_tree_controller.BARRIER_TIMEOUT)
+        self.controller._expire_installations()
+        self.controller._handle_BarrierIn(FakeBarrierIn(xid))
+        self.assertFalse(installation.confirmed)
+        self.assertEqual(self.controller.path_setup_stats.count, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+import unittest
+from helpers import build_topology, sw_of, DIAMOND_LINKS
+
+from extensions.destination_forwarding import DestinationForwarding
+from extensions.link_to_switch import LinkToSwitch
+
+H1, H2 = '00:00:00:00:00:01', '00:00:00:00:00:02'
+
+
+class DestinationForwardingTest(unittest.TestCase):
+    def setUp(self):
+        self.graph, self.switches = build_topology(DIAMOND_LINKS)
+        self.sw_1, self.sw_2, self.sw_3, self.sw_4, self.sw_5 = [sw_of(self.switches, dpid) for dpid in range(1, 6)]
+        self.hosts = {}
+        self.forwarding = DestinationForwarding(self.switches, self.graph, self.hosts)
+
+    def connect(self, host_mac, sw, port):
+        self.hosts[host_mac] = LinkToSwitch(self.switches, sw.dpid, port)
+        self.forwarding.notifyHostChanged(host_mac)
+
+    def ports_to(self, host_mac):
+        return dict(
+            (sw, sw.destination_ports[host_mac]) for sw in self.switches.values() if host_mac in sw.destination_ports
+        )
+
+    def test_host_joined(self):
+        self.connect(H1, self.sw_5, 2)
+        ports = self.ports_to(H1)
+        self.assertIn(ports.pop(self.sw_1), [1, 2])     # any of both equal cost next hops
+        self.assertEqual(ports, {self.sw_2: 2, self.sw_3: 2, self.sw_4: 3, self.sw_5: 2})
+
+    def test_host_left(self):
+        self.connect(H1, self.sw_5, 2)
+        self.connect(H2, self.sw_1, 3)
+        del self.hosts[H1]
+        self.forwarding.notifyHostChanged(H1)
+        self.assertEqual(self.ports_to(H1), {})
+        self.assertEqual(len(self.ports_to(H2)), 5)
+
+    def test_host_moved(self):
+        self.connect(H1, self.sw_5, 2)
+        self.connect(H1, self.sw_1, 3)
+        ports = self.ports_to(H1)
+        self.assertIn(ports.pop(self.sw_4), [1, 2])
+        self.assertEqual(ports, {self.sw_1: 3, self.sw_2: 1, self.sw_3: 1, self.sw_5: 1})
+
+    def test_link_removed(self):
+        self.connect(H1, self.sw_5, 2)
+        self.graph.remove_link(self.sw_2, 2, self.sw_4, 1)
+        self.forwarding.notifyLinkChanged(self.sw_2, self.sw_4)
+        self.assertEqual(self.ports_to(H1), {self.sw_1: 2, self.sw_2: 1, self.sw_3: 2, self.sw_4: 3, self.sw_5: 2})
+
+    def test_only_link_to_the_host_removed(self):
+        self.connect(H1, self.sw_5, 2)
+        self.graph.remove_link(self.sw_4, 3, self.sw_5, 1)
+        self.forwarding.notifyLinkChanged(self.sw_4, self.sw_5)
+        self.assertEqual(self.ports_to(H1), {self.sw_5: 2})
+
+    def test_link_added_back(self):
+        self.connect(H1, self.sw_5, 2)
+        before = self.ports_to(H1)
+        self.graph.remove_link(self.sw_2, 2, self.sw_4, 1)
+        self.forwarding.notifyLinkChanged(self.sw_2, self.sw_4)
+        self.graph.add_link(self.sw_2, 2, self.sw_4, 1)
+        self.forwarding.notifyLinkChanged(self.sw_2, self.sw_4)
+        self.assertEqual(self.ports_to(H1), before)
+
+    def test_sync_removes_the_entries_of_unknown_hosts(self):
+        self.connect(H1, self.sw_5, 2)
+        self.hosts.clear()
+        self.connect(H2, self.sw_1, 3)
+        self.forwarding.sync()
+        self.assertEqual(self.ports_to(H1), {})
+        self.assertEqual(len(self.ports_to(H2)), 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
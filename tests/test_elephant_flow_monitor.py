@@ -0,0 +1,148 @@
+import unittest
+from helpers import build_topology, sw_of, DIAMOND_LINKS
+
+import pox.openflow.libopenflow_01 as of
+from pox.lib.addresses import IPAddr
+from extensions import elephant_flow_monitor
+from extensions.backup_paths import BackupPaths
+from extensions.elephant_flow_monitor import ElephantFlowMonitor
+from extensions.flow import Flow
+from extensions.installed_flows import InstalledFlows
+from extensions.switch import BACKUP_PRIORITY
+
+THRESHOLD = 1000
+HOST_PORT = 5
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def time(self):
+        return self.now
+
+
+class FakePathsFinder:
+    def __init__(self, paths):
+        self.paths = paths
+
+    def get_paths(self, origin, destiny):
+        return self.paths
+
+
+class FakeLoadMonitor:
+    """The old path is the busy one"""
+    def __init__(self, busy_path):
+        self.busy_path = busy_path
+
+    def get_path_load(self, path):
+        return 100 * THRESHOLD if path == self.busy_path else 0
+
+
+class FlowStats:
+    def __init__(self, match, byte_count, priority=of.OFP_DEFAULT_PRIORITY):
+        self.match = match
+        self.byte_count = byte_count
+        self.priority = priority
+
+
+class ElephantFlowMonitorTest(unittest.TestCase):
+    def setUp(self):
+        _, switches = build_topology(DIAMOND_LINKS)
+        self.sw_1, self.sw_2, self.sw_3, self.sw_4 = [sw_of(switches, dpid) for dpid in range(1, 5)]
+        self.flow = Flow.intern(IPAddr('10.0.0.1'), 1234, IPAddr('10.0.0.2'), 80, 6)
+        self.old_path = [(self.sw_1, 1), (self.sw_2, 2), (self.sw_4, HOST_PORT)]
+        self.new_path = [(self.sw_1, 2), (self.sw_3, 2), (self.sw_4, HOST_PORT)]
+        for sw, output_port in self.old_path:
+            sw.add_action_output(self.flow, output_port)
+        self.installed_flows = InstalledFlows()
+        self.installed_flows.add(self.flow, self.old_path)
+
+        paths_finder = FakePathsFinder([
+            [(self.sw_1, 1), (self.sw_2, 2), (self.sw_4, None)],
+            [(self.sw_1, 2), (self.sw_3, 2), (self.sw_4, None)],
+        ])
+        self.backup_paths = BackupPaths(paths_finder)
+        self.committed = []
+        self.monitor = ElephantFlowMonitor(
+            switches, self.installed_flows, paths_finder, FakeLoadMonitor(self.old_path), self.committed.append,
+            1, THRESHOLD, self.backup_paths
+        )
+        self.clock = FakeClock()
+        self.real_time, elephant_flow_monitor.time = elephant_flow_monitor.time, self.clock
+
+    def tearDown(self):
+        elephant_flow_monitor.time = self.real_time
+
+    def report(self, *flows_stats):
+        self.monitor.update(self.sw_1.dpid, list(flows_stats))
+        self.clock.now += 1
+
+    def primary(self, byte_count):
+        return FlowStats(self.sw_1.entries_by_flow[self.flow.key()].match, byte_count)
+
+    def backup(self, byte_count):
+        return FlowStats(self.sw_1.entries_by_flow[self.flow.key()].match, byte_count, BACKUP_PRIORITY)
+
+    def run_installations(self, *confirmations):
+        """
+        Finishes the committed installations, and the ones they commit, as the controller would.
+        Each one is confirmed or timed out as given by confirmations, the ones left are confirmed
+        """
+        confirmations = list(confirmations)
+        while self.committed:
+            installation = self.committed.pop(0)
+            xids = installation.commit()
+            if not confirmations or confirmations.pop(0):
+                for xid in xids:
+                    installation.barrier_replied(xid)
+            elif not installation.released:
+                installation.release()  # timed out
+
+    def test_backup_entry_not_measured(self):
+        self.report(self.primary(0), self.backup(0))
+        self.report(self.primary(10 * THRESHOLD), self.backup(0))
+        self.assertEqual(self.monitor.last_bytes[self.flow][1], 10 * THRESHOLD)
+        self.assertEqual(self.monitor.elephants_detected, 1)
+
+    def test_mouse_flow_with_a_busy_backup_entry_not_migrated(self):
+        self.report(self.backup(0), self.primary(0))
+        self.report(self.backup(10 * THRESHOLD), self.primary(THRESHOLD / 2))
+        self.assertEqual(self.monitor.elephants_detected, 0)
+        self.assertEqual(self.committed, [])
+
+    def test_migration_moves_the_backups_to_the_new_path(self):
+        self.report(self.primary(0))
+        self.report(self.primary(10 * THRESHOLD))
+        self.run_installations()
+        self.assertEqual(self.monitor.migrations, 1)
+        self.assertEqual(self.installed_flows.get(self.flow), self.new_path)
+        self.assertNotIn(self.flow.key(), self.sw_2.entries_by_flow)
+        self.assertEqual(self.sw_1.entries_by_flow[self.flow.key()].actions[0].port, 2)
+        self.assertEqual(self.sw_1.backup_ports, {self.flow.key(): 1})
+        self.assertEqual(self.sw_2.backup_ports, {self.flow.key(): 2})
+
+    def test_unconfirmed_first_hop_moved_back_to_the_old_path(self):
+        self.report(self.primary(0))
+        self.report(self.primary(10 * THRESHOLD))
+        self.run_installations(True, False, True)
+        self.assertEqual(self.monitor.migrations, 0)
+        self.assertNotIn(self.flow, self.monitor.migrating)
+        self.assertEqual(self.installed_flows.get(self.flow), self.old_path)
+        self.assertEqual(self.sw_1.entries_by_flow[self.flow.key()].actions[0].port, 1)
+        self.assertNotIn(self.flow.key(), self.sw_3.entries_by_flow)
+        self.assertIn(self.flow.key(), self.sw_2.entries_by_flow)
+
+    def test_unconfirmed_move_back_keeps_both_paths(self):
+        self.report(self.primary(0))
+        self.report(self.primary(10 * THRESHOLD))
+        self.run_installations(True, False, False)
+        self.assertNotIn(self.flow, self.monitor.migrating)
+        self.assertEqual(self.installed_flows.get(self.flow), self.old_path)
+        # the first switch could still use any of both, its local entry points to the old hops
+        self.assertEqual(self.sw_1.entries_by_flow[self.flow.key()].actions[0].port, 1)
+        self.assertIn(self.flow.key(), self.sw_2.entries_by_flow)
+        self.assertIn(self.flow.key(), self.sw_3.entries_by_flow)
+
+if __name__ == '__main__':
+    unittest.main()
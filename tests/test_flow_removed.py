@@ -0,0 +1,84 @@
+import unittest
+import helpers
+
+from simulator import Simulator
+
+LEVELS = 3
+
+
+class FakeFlowRemovedMessage:
+    def __init__(self, match, cookie):
+        self.match = match
+        self.cookie = cookie
+
+
+class FakeFlowRemoved:
+    def __init__(self, dpid, match, cookie, timeout=True):
+        self.dpid = dpid
+        self.ofp = FakeFlowRemovedMessage(match, cookie)
+        self.timeout = timeout
+        self.idleTimeout = timeout
+        self.hardTimeout = False
+        self.deleted = not timeout
+
+
+class FlowRemovedTest(unittest.TestCase):
+    def setUp(self):
+        simulator = Simulator(LEVELS, idle_timeout=10, backup_paths=True)
+        simulator.start()
+        simulator.replay_packet_ins(simulator.build_packet_ins(100, 20))
+        self.controller = simulator.controller
+        # a flow between hosts of different switches, so it has backups
+        self.flow, self.path = next(
+            (flow, path) for flow, path in sorted(self.controller.installed_flows.paths.items(),
+                                                  key=lambda item: item[0].key()) if len(path) > 1
+        )
+        self.sw = self.path[1][0]
+        self.entry = self.sw.entries_by_flow[self.flow.key()]
+        self.assertIn(self.flow, self.controller.backup_paths.backups)
+
+    def expire(self, cookie, timeout=True, sw=None):
+        self.controller._handle_FlowRemoved(
+            FakeFlowRemoved((sw or self.sw).connection.dpid, self.entry.match, cookie, timeout)
+        )
+
+    def assertForgotten(self):
+        self.assertNotIn(self.flow, self.controller.installed_flows)
+        self.assertNotIn(self.flow.key(), self.sw.entries_by_flow)
+        self.assertNotIn(self.flow.key(), self.sw.entries_by_port.get(self.entry.actions[0].port, {}))
+        self.assertNotIn(self.flow, self.controller.backup_paths.backups)
+
+    def assertKept(self):
+        self.assertIn(self.flow, self.controller.installed_flows)
+        self.assertIn(self.flow.key(), self.sw.entries_by_flow)
+        self.assertIn(self.flow, self.controller.backup_paths.backups)
+
+    def test_expired_entry_forgotten(self):
+        self.expire(self.entry.cookie)
+        self.assertForgotten()
+
+    def test_expired_entry_forgotten_after_being_modified(self):
+        # the modify keeps the entry and the cookie in the switch
+        self.sw.add_action_output(self.flow, self.entry.actions[0].port + 1)
+        self.expire(self.entry.cookie)
+        self.assertForgotten()
+
+    def test_entry_expired_before_the_flow_was_installed_again_ignored(self):
+        self.sw.remove_action_output(self.flow)
+        self.sw.add_action_output(self.flow, self.entry.actions[0].port)
+        self.expire(self.entry.cookie)
+        self.assertKept()
+
+    def test_entry_deleted_by_the_controller_ignored(self):
+        self.expire(self.entry.cookie, timeout=False)
+        self.assertKept()
+
+    def test_entry_of_a_switch_out_of_the_path_ignored(self):
+        path_sws = set(sw for sw, _ in self.path)
+        other_sw = next(sw for sw in self.controller.switches.values() if sw not in path_sws)
+        self.expire(self.entry.cookie, sw=other_sw)
+        self.assertKept()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,53 @@
+import unittest
+from helpers import build_topology, sw_of, DIAMOND_LINKS
+
+from pox.lib.addresses import IPAddr
+from extensions.flow import Flow
+from extensions.installed_flows import InstalledFlows
+
+
+class InstalledFlowsTest(unittest.TestCase):
+    def setUp(self):
+        _, switches = build_topology(DIAMOND_LINKS)
+        self.sw_1, self.sw_2, self.sw_3, self.sw_4 = [sw_of(switches, dpid) for dpid in range(1, 5)]
+        self.installed_flows = InstalledFlows()
+        self.flow = Flow.intern(IPAddr('10.0.0.1'), 1234, IPAddr('10.0.0.2'), 80, 6)
+        self.other_flow = Flow.intern(IPAddr('10.0.0.3'), 1234, IPAddr('10.0.0.2'), 80, 6)
+        self.path = [(self.sw_1, 1), (self.sw_2, 2), (self.sw_4, 5)]
+
+    def test_add(self):
+        self.installed_flows.add(self.flow, self.path)
+        self.assertIn(self.flow, self.installed_flows)
+        self.assertEqual(self.installed_flows.get(self.flow), self.path)
+        self.assertEqual(self.installed_flows.flows_through(self.sw_2.dpid, 2), set([self.flow]))
+        self.assertEqual(self.installed_flows.flows_through(self.sw_2.dpid, 1), set())
+
+    def test_add_again_replaces_the_path(self):
+        self.installed_flows.add(self.flow, self.path)
+        self.installed_flows.add(self.flow, [(self.sw_1, 2), (self.sw_3, 2), (self.sw_4, 5)])
+        self.assertEqual(len(self.installed_flows), 1)
+        self.assertEqual(self.installed_flows.flows_through(self.sw_2.dpid, 2), set())
+        self.assertEqual(self.installed_flows.flows_through(self.sw_3.dpid, 2), set([self.flow]))
+
+    def test_remove_forgets_its_links(self):
+        self.installed_flows.add(self.flow, self.path)
+        self.assertEqual(self.installed_flows.remove(self.flow), self.path)
+        self.assertNotIn(self.flow, self.installed_flows)
+        self.assertEqual(self.installed_flows.flows_by_link, {})
+        self.assertIsNone(self.installed_flows.remove(self.flow))
+
+    def test_flows_through_switch(self):
+        self.installed_flows.add(self.flow, self.path)
+        self.installed_flows.add(self.other_flow, [(self.sw_3, 2), (self.sw_4, 5)])
+        self.assertEqual(self.installed_flows.flows_through_switch(self.sw_4.dpid), set([self.flow, self.other_flow]))
+        self.assertEqual(self.installed_flows.flows_through_switch(self.sw_2.dpid), set([self.flow]))
+
+    def test_flows_through_are_a_copy(self):
+        self.installed_flows.add(self.flow, self.path)
+        for flow in self.installed_flows.flows_through(self.sw_1.dpid, 1):
+            self.installed_flows.remove(flow)
+        self.assertEqual(len(self.installed_flows), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+import unittest
+import helpers
+
+from pox.lib.util import dpid_to_str
+from common import FakeBarrierIn
+from simulator import Simulator
+from extensions.shortest_paths_dag import ShortestPathsDag
+
+LEVELS = 4
+
+
+class LinkRepairTest(unittest.TestCase):
+    def setUp(self):
+        self.simulator = Simulator(LEVELS)
+        self.simulator.start()
+        self.simulator.replay_packet_ins(self.simulator.build_packet_ins(200, 40))
+        self.controller = self.simulator.controller
+        self.link, self.ends = max(
+            ((link, self.ends_of(link)) for link in self.simulator.links),
+            key=lambda item: len(self.flows_through(item[1]))
+        )
+        self.old_paths = dict(
+            (flow, self.controller.installed_flows.get(flow)) for flow in self.flows_through(self.ends)
+        )
+        self.assertTrue(self.old_paths)
+
+    def ends_of(self, link):
+        switches = self.controller.switches
+        return [(switches[dpid_to_str(link.dpid1)], link.port1), (switches[dpid_to_str(link.dpid2)], link.port2)]
+
+    def flows_through(self, ends):
+        return set().union(*[self.controller.installed_flows.flows_through(sw.dpid, port) for sw, port in ends])
+
+    def reply_barriers(self):
+        for xid in list(self.controller.installations.keys()):
+            self.controller._handle_BarrierIn(FakeBarrierIn(xid))
+
+    def stale_sws(self, flow):
+        new_path = self.controller.installed_flows.get(flow)
+        return set(sw for sw, _ in self.old_paths[flow]) - set(sw for sw, _ in new_path)
+
+    def test_flows_moved_to_the_path_sharing_the_most_hops(self):
+        self.simulator.link_event(self.link, added=False)
+        self.reply_barriers()
+        self.assertEqual(self.flows_through(self.ends), set())
+        for flow, old_path in self.old_paths.items():
+            new_path = self.controller.installed_flows.get(flow)
+            self.assertEqual((new_path[0][0], new_path[-1]), (old_path[0][0], old_path[-1]))
+            # the last hop outputs to the host, so it is left out of the comparison
+            shared = lambda path: len(set(old_path[:-1]).intersection(path[:-1]))
+            candidates = ShortestPathsDag(self.controller.graph, old_path[0][0]).get_paths_to(old_path[-1][0])
+            self.assertIn([sw for sw, _ in new_path], [[sw for sw, _ in path] for path in candidates])
+            self.assertEqual(shared(new_path), max(shared(path) for path in candidates))
+
+    def test_stale_entries_removed_once_the_new_path_is_applied(self):
+        self.simulator.link_event(self.link, added=False)
+        self.assertTrue(any(self.stale_sws(flow) for flow in self.old_paths))
+        # make before break: the old entries are kept until the new path is confirmed,
+        # but the ones through the removed link, which are deleted along with it
+        for flow, old_path in self.old_paths.items():
+            for sw, port in old_path:
+                if sw in self.stale_sws(flow):
+                    self.assertEqual(flow.key() in sw.entries_by_flow, (sw, port) not in self.ends)
+
+        self.reply_barriers()
+        for flow in self.old_paths:
+            for sw in self.stale_sws(flow):
+                self.assertNotIn(flow.key(), sw.entries_by_flow)
+            for sw, port in self.controller.installed_flows.get(flow):
+                self.assertEqual(sw.entries_by_flow[flow.key()].actions[0].port, port)
+
+    def test_flows_of_other_links_untouched(self):
+        others = dict(
+            (flow, path) for flow, path in self.controller.installed_flows.paths.items() if flow not in self.old_paths
+        )
+        self.assertTrue(others)
+        self.simulator.link_event(self.link, added=False)
+        self.reply_barriers()
+        for flow, path in others.items():
+            self.assertEqual(self.controller.installed_flows.get(flow), path)
+            for sw, port in path:
+                self.assertEqual(sw.entries_by_flow[flow.key()].actions[0].port, port)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+import unittest
+from helpers import build_topology, sw_of, DIAMOND_LINKS
+
+from extensions import link_load_monitor
+from extensions.link_load_monitor import LinkLoadMonitor
+from extensions.load_aware_path_balancer import LoadAwarePathBalancer
+from extensions.path import Path
+
+NEW_FLOW_LOAD = 1000
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def time(self):
+        return self.now
+
+
+class PortStats:
+    def __init__(self, port_no, tx_bytes):
+        self.port_no = port_no
+        self.tx_bytes = tx_bytes
+
+
+class LoadAwarePathBalancerTest(unittest.TestCase):
+    def setUp(self):
+        _, self.switches = build_topology(DIAMOND_LINKS)
+        self.sw_1, self.sw_2, self.sw_3, self.sw_4 = [sw_of(self.switches, dpid) for dpid in range(1, 5)]
+        self.via_2 = Path([(self.sw_1, 1), (self.sw_2, 2), (self.sw_4, None)])
+        self.via_3 = Path([(self.sw_1, 2), (self.sw_3, 2), (self.sw_4, None)])
+        self.clock = FakeClock()
+        self.real_time, link_load_monitor.time = link_load_monitor.time, self.clock
+        self.monitor = LinkLoadMonitor(self.switches, 1, alpha=1)
+        self.balancer = LoadAwarePathBalancer(self.monitor, NEW_FLOW_LOAD)
+
+    def tearDown(self):
+        link_load_monitor.time = self.real_time
+
+    def sample(self, tx_bytes_per_second):
+        """Two polls of every switch, with ports sending {(sw, port): bytes per second}"""
+        for elapsed in [0, 1]:
+            for sw in self.switches.values():
+                self.monitor.update(sw.dpid, [
+                    PortStats(port, rate * elapsed)
+                    for (rate_sw, port), rate in tx_bytes_per_second.items() if rate_sw == sw
+                ])
+            self.clock.now += 1
+
+    def balanced(self):
+        return self.balancer.get_balanced(self.sw_1.dpid, self.sw_4.dpid, [self.via_2, self.via_3])
+
+    def test_least_loaded_path(self):
+        self.sample({(self.sw_2, 2): 50 * NEW_FLOW_LOAD, (self.sw_3, 2): 10 * NEW_FLOW_LOAD})
+        self.assertEqual(self.monitor.get_load(self.sw_2.dpid, 2), 50 * NEW_FLOW_LOAD)
+        for _ in range(5):
+            self.assertEqual(self.balanced(), self.via_3)
+
+    def test_load_of_a_path_is_the_one_of_its_busiest_link(self):
+        self.sample({(self.sw_1, 1): 10 * NEW_FLOW_LOAD, (self.sw_3, 2): 20 * NEW_FLOW_LOAD})
+        self.assertEqual(self.balanced(), self.via_2)
+
+    def test_new_flows_accounted_until_the_next_sample(self):
+        self.sample({(self.sw_2, 2): 2500})
+        # the ones sent through via_3 take it above via_2 before its load is measured again
+        self.assertEqual([self.balanced() for _ in range(4)], [self.via_3, self.via_3, self.via_3, self.via_2])
+        self.sample({(self.sw_2, 2): 2500})
+        self.assertEqual(self.balanced(), self.via_3)
+
+    def test_ties_broken_by_round_robin(self):
+        self.sample({})
+        self.balancer.new_flow_load = 0
+        self.assertEqual([self.balanced() for _ in range(4)], [self.via_2, self.via_3, self.via_2, self.via_3])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+import unittest
+import helpers
+
+from extensions.lru_cache import LRUCache
+
+
+class LRUCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.cache = LRUCache(2)
+
+    def test_get(self):
+        self.cache.put('a', 1)
+        self.assertEqual(self.cache.get('a'), 1)
+        self.assertIsNone(self.cache.get('b'))
+        self.assertEqual(self.cache.get('b', 0), 0)
+
+    def test_evicts_the_least_recently_put(self):
+        self.cache.put('a', 1)
+        self.cache.put('b', 2)
+        self.cache.put('c', 3)
+        self.assertNotIn('a', self.cache)
+        self.assertEqual(len(self.cache), 2)
+
+    def test_get_makes_it_the_most_recently_used(self):
+        self.cache.put('a', 1)
+        self.cache.put('b', 2)
+        self.cache.get('a')
+        self.cache.put('c', 3)
+        self.assertIn('a', self.cache)
+        self.assertNotIn('b', self.cache)
+
+    def test_put_again_replaces_without_evicting(self):
+        self.cache.put('a', 1)
+        self.cache.put('b', 2)
+        self.cache.put('a', 3)
+        self.assertEqual((self.cache.get('a'), self.cache.get('b')), (3, 2))
+
+    def test_pop(self):
+        self.cache.put('a', 1)
+        self.assertEqual(self.cache.pop('a'), 1)
+        self.assertIsNone(self.cache.pop('a'))
+        self.assertEqual(len(self.cache), 0)
+
+    def test_remove_if(self):
+        cache = LRUCache(10)
+        for number in range(5):
+            cache.put(number, str(number))
+        cache.remove_if(lambda key: key % 2 == 0)
+        self.assertEqual(sorted(cache.entries), [1, 3])
+
+    def test_clear(self):
+        self.cache.put('a', 1)
+        self.cache.clear()
+        self.assertNotIn('a', self.cache)
+
+
+if __name__ == '__main__':
+    unittest.main()
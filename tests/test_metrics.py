@@ -0,0 +1,103 @@
+import unittest
+import helpers
+
+from pox.lib.addresses import IPAddr
+from common import FakeConnection
+from extensions import metrics as metrics_module
+from extensions.flow import Flow
+from extensions.metrics import metrics, timed, HISTOGRAM_BUCKETS
+from extensions.switch import Switch
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def time(self):
+        return self.now
+
+
+class MetricsTest(unittest.TestCase):
+    def setUp(self):
+        # the metrics are shared by the whole controller, so the test works on a clean copy of them
+        self.saved = dict(metrics.__dict__)
+        metrics.__init__()
+        self.clock = FakeClock()
+        self.real_time, metrics_module.time = metrics_module.time, self.clock
+
+    def tearDown(self):
+        metrics_module.time = self.real_time
+        metrics.__dict__.clear()
+        metrics.__dict__.update(self.saved)
+
+    def sleeping(self, seconds):
+        """Function timed as 'sleep' that takes seconds of the fake clock"""
+        @timed('sleep')
+        def sleep(result):
+            self.clock.now += seconds
+            return result
+        return sleep
+
+    def test_timed_not_observed_while_disabled(self):
+        self.assertEqual(self.sleeping(0.003)('done'), 'done')
+        self.assertEqual(metrics.histograms, {})
+
+    def test_timed_observes_the_duration(self):
+        metrics.enabled = True
+        sleep = self.sleeping(0.003)
+        self.assertEqual(sleep('done'), 'done')
+        self.assertEqual(sleep.__name__, 'sleep')
+        histogram = metrics.histograms['sleep']
+        self.assertEqual(histogram.count, 1)
+        self.assertAlmostEqual(histogram.total, 0.003)
+        self.assertAlmostEqual(histogram.max, 0.003)
+        self.assertEqual(histogram.buckets[HISTOGRAM_BUCKETS.index(0.005)], 1)
+        self.assertEqual(sum(histogram.buckets), 1)
+
+    def test_timed_observes_the_calls_that_raise(self):
+        metrics.enabled = True
+
+        @timed('failing')
+        def failing():
+            self.clock.now += 2
+            raise ValueError()
+        self.assertRaises(ValueError, failing)
+        self.assertEqual(metrics.histograms['failing'].count, 1)
+        self.assertEqual(metrics.histograms['failing'].buckets[-1], 1)
+
+    def test_counters(self):
+        metrics.incr('packet_ins')
+        metrics.incr('packet_ins', 2)
+        metrics.count_flow_mods(80)
+        metrics.count_flow_mods(160, quantity=2)
+        self.assertEqual(metrics.counters, {'packet_ins': 3, 'flow_mods': 3, 'flow_mod_bytes': 240})
+
+    def test_flow_mods_of_a_switch_counted(self):
+        sw = Switch('00-00-00-00-00-01', FakeConnection(1))
+        flow = Flow.intern(IPAddr('10.0.0.1'), 1234, IPAddr('10.0.0.2'), 80, 6)
+        sw.add_action_output(flow, 1)
+        sw.remove_action_output(flow)
+        self.assertEqual(metrics.counters['flow_mods'], 2)
+        self.assertEqual(metrics.counters['flow_mod_bytes'], sum(len(sent) for sent in sw.connection.sent))
+
+    def test_render(self):
+        metrics.enabled = True
+        installed_flows = []
+        metrics.incr('packet_ins')
+        metrics.add_gauge('installed_flows', lambda: len(installed_flows))
+        self.sleeping(0.003)(None)
+        self.sleeping(0.3)(None)
+        installed_flows.append(None)    # the gauges are read when rendered
+        lines = metrics.render().splitlines()
+        self.assertIn("packet_ins 1", lines)
+        self.assertIn("installed_flows 1", lines)
+        self.assertIn("sleep_seconds_count 2", lines)
+        self.assertIn("sleep_seconds_sum 0.303000", lines)
+        self.assertIn('sleep_seconds_bucket{le="0.001"} 0', lines)
+        self.assertIn('sleep_seconds_bucket{le="0.005"} 1', lines)
+        self.assertIn('sleep_seconds_bucket{le="0.5"} 2', lines)
+        self.assertIn('sleep_seconds_bucket{le="inf"} 2', lines)
+
+
+if __name__ == '__main__':
+    unittest.main()
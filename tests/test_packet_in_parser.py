@@ -0,0 +1,72 @@
+import socket
+import struct
+import unittest
+import helpers
+
+from pox.lib.addresses import IPAddr
+from extensions.flow import Flow
+from extensions.packet_in_parser import parse_ip_packet_in
+
+SRC_MAC, DST_MAC = '00:00:00:00:00:01', '00:00:00:00:00:02'
+SRC_IP, DST_IP = '10.0.0.1', '10.0.0.2'
+
+
+def mac_bytes(mac):
+    return struct.pack('!6B', *[int(part, 16) for part in mac.split(':')])
+
+
+def frame(protocol, payload=b'', eth_type=0x0800, header_words=5, flags_and_fragment=0):
+    """Bytes of an ethernet frame with an IPv4 header of header_words 32 bit words"""
+    options = b'\x00' * (header_words - 5) * 4
+    ip_header = struct.pack(
+        '!BBHHHBBH4s4s', 0x40 | header_words, 0, header_words * 4 + len(payload), 0, flags_and_fragment,
+        64, protocol, 0, socket.inet_aton(SRC_IP), socket.inet_aton(DST_IP)
+    )
+    return mac_bytes(DST_MAC) + mac_bytes(SRC_MAC) + struct.pack('!H', eth_type) + ip_header + options + payload
+
+
+def ports(src_port, dst_port):
+    return struct.pack('!HH', src_port, dst_port) + b'\x00' * 16
+
+
+class ParseIpPacketInTest(unittest.TestCase):
+    def assertFlow(self, data, src_port, dst_port, protocol):
+        self.assertEqual(parse_ip_packet_in(data), (
+            SRC_MAC, DST_MAC, Flow.intern(IPAddr(SRC_IP), src_port, IPAddr(DST_IP), dst_port, protocol)
+        ))
+
+    def test_tcp(self):
+        self.assertFlow(frame(6, ports(1234, 80)), 1234, 80, 6)
+
+    def test_udp(self):
+        self.assertFlow(frame(17, ports(5353, 53)), 5353, 53, 17)
+
+    def test_icmp_has_no_ports(self):
+        self.assertFlow(frame(1, b'\x08\x00' + b'\x00' * 6), None, None, 1)
+
+    def test_ports_after_the_ip_options(self):
+        self.assertFlow(frame(6, ports(1234, 80), header_words=6), 1234, 80, 6)
+
+    def test_same_flow_instance_as_pox_parsing(self):
+        _, _, flow = parse_ip_packet_in(frame(6, ports(1234, 80)))
+        self.assertIs(flow, Flow.intern(IPAddr(SRC_IP), 1234, IPAddr(DST_IP), 80, 6))
+
+    def test_not_ip(self):
+        self.assertIsNone(parse_ip_packet_in(frame(6, ports(1234, 80), eth_type=0x0806)))
+
+    def test_vlan_tagged(self):
+        self.assertIsNone(parse_ip_packet_in(frame(6, ports(1234, 80), eth_type=0x8100)))
+
+    def test_not_first_fragment(self):
+        self.assertIsNone(parse_ip_packet_in(frame(6, ports(1234, 80), flags_and_fragment=0x2001)))
+
+    def test_other_protocol(self):
+        self.assertIsNone(parse_ip_packet_in(frame(47, b'\x00' * 8)))
+
+    def test_truncated(self):
+        self.assertIsNone(parse_ip_packet_in(frame(6, ports(1234, 80))[:36]))
+        self.assertIsNone(parse_ip_packet_in(frame(6)[:20]))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,96 @@
+import threading
+import unittest
+import helpers
+
+from simulator import Simulator
+from extensions.parallel_paths_calculator import ParallelPathsCalculator, paths_from_origins
+from extensions.shortest_paths_dag import ShortestPathsDag
+
+LEVELS = 4
+WORKERS = 3
+
+
+class ParallelPathsCalculatorTest(unittest.TestCase):
+    def setUp(self):
+        simulator = Simulator(LEVELS)
+        simulator.start()
+        self.graph = simulator.controller.graph
+        # one link down, so not every pair has the same quantity of paths
+        simulator.link_event(simulator.links[0], added=False)
+        self.sws = sorted(self.graph.switches, key=lambda sw: sw.dpid)
+        self.delivered = threading.Event()
+        self.calculator = ParallelPathsCalculator(WORKERS, call_later=self.call_later)
+
+    def tearDown(self):
+        self.calculator.close()
+
+    def call_later(self, function, *args):
+        # the test thread takes the place of the pox one
+        self.delivery = (function, args)
+        self.delivered.set()
+
+    def deliver(self):
+        self.assertTrue(self.delivered.wait(10))
+        self.delivered.clear()
+        function, args = self.delivery
+        function(*args)
+
+    def serial_paths(self):
+        """The paths of ShortestPathsDag, as the ids the workers send back"""
+        id_of = self.graph.id_of
+        return dict(
+            (id_of(origin), dict(
+                (id_of(destiny), sorted(
+                    tuple((id_of(sw), port) for sw, port in path)
+                    for path in ShortestPathsDag(self.graph, origin).get_paths_to(destiny)
+                ))
+                for destiny in self.sws if destiny != origin
+            ))
+            for origin in self.sws
+        )
+
+    def sorted_paths(self, id_paths):
+        return dict(
+            (origin_id, dict((destiny_id, sorted(paths)) for destiny_id, paths in paths_from_origin.items()))
+            for origin_id, paths_from_origin in id_paths.items()
+        )
+
+    def test_same_paths_as_serial(self):
+        results = []
+        self.calculator.calculate(self.graph, self.sws, lambda id_paths, switches: results.append(id_paths))
+        self.deliver()
+        self.assertEqual(len(results), 1)
+        self.assertEqual(self.sorted_paths(results[0]), self.serial_paths())
+
+    def test_switches_of_the_ids_delivered(self):
+        results = []
+        self.calculator.calculate(self.graph, self.sws, lambda id_paths, switches: results.append(switches))
+        self.deliver()
+        self.assertEqual(results, [list(self.graph.switches)])
+
+    def test_task_of_a_worker(self):
+        adjacency = [list(linked_sw_ids) for linked_sw_ids in self.graph.adjacency]
+        ports = [dict(ports_of_sw) for ports_of_sw in self.graph.ports]
+        sw_ids = [self.graph.id_of(sw) for sw in self.sws]
+        paths = paths_from_origins((adjacency, ports, sw_ids[:2], sw_ids))
+        serial_paths = self.serial_paths()
+        self.assertEqual(self.sorted_paths(paths), dict((sw_id, serial_paths[sw_id]) for sw_id in sw_ids[:2]))
+
+    def test_calculation_outdated_by_a_later_one_discarded(self):
+        results = []
+        self.calculator.calculate(self.graph, self.sws, lambda id_paths, switches: results.append('first'))
+        self.deliver()
+        # the first one is delivered after the second was asked for
+        first_delivery = self.delivery
+        self.calculator.calculate(self.graph, self.sws, lambda id_paths, switches: results.append('second'))
+        self.assertTrue(self.calculator.is_pending())
+        function, args = first_delivery
+        function(*args)
+        self.assertEqual(results, ['first'])
+        self.deliver()
+        self.assertEqual(results, ['first', 'second'])
+        self.assertFalse(self.calculator.is_pending())
+
+
+if __name__ == '__main__':
+    unittest.main()
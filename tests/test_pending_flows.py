@@ -0,0 +1,54 @@
+import unittest
+import helpers
+
+from pox.lib.addresses import IPAddr
+from extensions import pending_flows
+from extensions.flow import Flow
+from extensions.pending_flows import PendingFlows
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self):
+        return self.now
+
+
+class PendingFlowsTest(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.real_time, pending_flows.time = pending_flows.time, self.clock
+        self.pending = PendingFlows(ttl=1)
+        self.flow = Flow.intern(IPAddr('10.0.0.1'), 1234, IPAddr('10.0.0.2'), 80, 6)
+        self.installation = object()
+
+    def tearDown(self):
+        pending_flows.time = self.real_time
+
+    def test_unknown_flow(self):
+        self.assertIsNone(self.pending.get(self.flow))
+
+    def test_both_directions_follow_the_installation(self):
+        self.pending.add(self.flow, self.installation)
+        self.assertIs(self.pending.get(self.flow), self.installation)
+        self.assertIs(self.pending.get(self.flow.reverse()), self.installation)
+
+    def test_expires_after_ttl(self):
+        self.pending.add(self.flow, self.installation)
+        self.clock.now += 0.5
+        self.assertIs(self.pending.get(self.flow), self.installation)
+        self.clock.now += 0.5
+        self.assertIsNone(self.pending.get(self.flow))
+        self.assertNotIn(self.flow, self.pending.pending)
+
+    def test_expired_flows_are_cleaned_up_by_later_adds(self):
+        self.pending.add(self.flow, self.installation)
+        self.clock.now += 2
+        other_flow = Flow.intern(IPAddr('10.0.0.3'), 1234, IPAddr('10.0.0.4'), 80, 6)
+        self.pending.add(other_flow, self.installation)
+        self.assertEqual(set(self.pending.pending), set([other_flow, other_flow.reverse()]))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,97 @@
+import unittest
+import helpers
+
+import pox.openflow.libopenflow_01 as of
+from simulator import Simulator
+
+LEVELS = 3
+
+
+class FakePortDesc:
+    def __init__(self, port_no, down):
+        self.port_no = port_no
+        self.config = of.OFPPC_PORT_DOWN if down else 0
+        self.state = of.OFPPS_LINK_DOWN if down else 0
+
+
+class FakePortStatusMessage:
+    def __init__(self, desc):
+        self.desc = desc
+
+
+class FakePortStatus:
+    def __init__(self, dpid, port_no, down):
+        self.dpid = dpid
+        self.ofp = FakePortStatusMessage(FakePortDesc(port_no, down))
+        self.deleted = False
+
+
+class PortStatusTest(unittest.TestCase):
+    def start(self, **controller_options):
+        self.simulator = Simulator(LEVELS, backup_paths=True, **controller_options)
+        self.simulator.start()
+        self.simulator.replay_packet_ins(self.simulator.build_packet_ins(200, 40))
+        self.controller = self.simulator.controller
+
+    def busiest_linked_port(self, ports_of):
+        """(sw, port) linked to another switch with the most entries of ports_of(sw) through it"""
+        return max(
+            ((sw, port) for sw in self.controller.switches.values() for port, _ in sw.get_links()),
+            key=lambda sw_port: list(ports_of(sw_port[0]).values()).count(sw_port[1])
+        )
+
+    def entries_of(self, sw):
+        return (
+            dict((flow_key, entry.actions[0].port) for flow_key, entry in sw.entries_by_flow.items()),
+            dict(sw.backup_ports), dict(sw.destination_ports), dict(sw.host_pair_ports)
+        )
+
+    def port_status(self, sw, port, down):
+        self.controller._handle_PortStatus(FakePortStatus(sw.connection.dpid, port, down))
+
+    def assertRoundTrip(self, sw, port, entries_through_port):
+        before = self.entries_of(sw)
+        self.assertTrue(entries_through_port(sw, port))
+
+        self.port_status(sw, port, down=True)
+        self.assertEqual(entries_through_port(sw, port), [])
+        self.assertNotIn(port, sw.entries_by_port)
+        for ports in [sw.backup_ports, sw.destination_ports, sw.host_pair_ports]:
+            self.assertNotIn(port, ports.values())
+
+        self.port_status(sw, port, down=False)
+        self.assertEqual(self.entries_of(sw), before)
+
+    def test_flows_and_backups_restored(self):
+        self.start()
+        sw, port = self.busiest_linked_port(lambda sw: sw.backup_ports)
+        self.assertRoundTrip(sw, port, lambda sw, port: sorted(
+            [flow_key for flow_key, output_port in sw.backup_ports.items() if output_port == port] +
+            list(sw.entries_by_port.get(port, {}).keys())
+        ))
+
+    def test_destinations_restored(self):
+        self.start(forwarding='destination')
+        sw, port = self.busiest_linked_port(lambda sw: sw.destination_ports)
+        self.assertRoundTrip(sw, port, lambda sw, port: sorted(
+            host_mac for host_mac, output_port in sw.destination_ports.items() if output_port == port
+        ))
+
+    def test_host_pairs_restored(self):
+        self.start(proactive=True)
+        sw, port = self.busiest_linked_port(lambda sw: sw.host_pair_ports)
+        self.assertRoundTrip(sw, port, lambda sw, port: sorted(
+            pair for pair, output_port in sw.host_pair_ports.items() if output_port == port
+        ))
+
+    def test_port_of_a_host_ignored(self):
+        self.start()
+        host = self.simulator.hosts[0]
+        sw = host.link_to_sw.sw
+        before = self.entries_of(sw)
+        self.port_status(sw, host.link_to_sw.port, down=True)
+        self.assertEqual(self.entries_of(sw), before)
+
+
+if __name__ == '__main__':
+    unittest.main()
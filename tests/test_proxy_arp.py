@@ -0,0 +1,118 @@
+import unittest
+from helpers import build_topology, sw_of, DIAMOND_LINKS
+
+import pox.openflow.libopenflow_01 as of
+from pox.lib.addresses import EthAddr, IPAddr
+from pox.lib.packet import ethernet, arp
+from pox.lib.util import dpid_to_str
+from common import FakeHost, FakePacketIn, arp_request
+from extensions.link_to_switch import LinkToSwitch
+from extensions.proxy_arp import ProxyArp
+from simulator import Simulator
+
+
+class ProxyArpTest(unittest.TestCase):
+    def setUp(self):
+        _, self.switches = build_topology(DIAMOND_LINKS)
+        # h1 on port 3 of switch 1, h2 on port 2 and h3 on port 4 of switch 5
+        self.h1, self.h2, self.h3 = [
+            FakeHost('h%s' % number, number, LinkToSwitch(self.switches, sw_of(self.switches, dpid).dpid, port))
+            for number, dpid, port in [(1, 1, 3), (2, 5, 2), (3, 5, 4)]
+        ]
+        self.hosts = dict((host.mac, host.link_to_sw) for host in [self.h1, self.h2, self.h3])
+        # the ports of the links and the hosts, and a silent host on port 6 of switch 3
+        for dpid_1, port_1, dpid_2, port_2 in DIAMOND_LINKS:
+            sw_of(self.switches, dpid_1).connection.ports[port_1] = None
+            sw_of(self.switches, dpid_2).connection.ports[port_2] = None
+        for dpid, port in [(1, 3), (5, 2), (5, 4), (3, 6)]:
+            sw_of(self.switches, dpid).connection.ports[port] = None
+        sw_of(self.switches, 1).connection.ports[of.OFPP_LOCAL] = None
+        self.proxy_arp = ProxyArp(self.switches, self.hosts)
+
+    def request(self, src_host, dst_host):
+        """Handles the request of src_host for the mac of dst_host, returning the connection it came in"""
+        connection = src_host.link_to_sw.sw.connection
+        self.proxy_arp.handle_packet_in(
+            FakePacketIn(connection.dpid, src_host.link_to_sw.port, arp_request(src_host, dst_host), connection)
+        )
+        return connection
+
+    def sent_packet_outs(self):
+        return dict(
+            (sw.dpid, [message for message in sw.connection.sent if isinstance(message, of.ofp_packet_out)])
+            for sw in self.switches.values()
+        )
+
+    def test_reply_for_a_known_ip(self):
+        self.proxy_arp.learn(IPAddr(self.h2.ip), self.h2.mac)
+        connection = self.request(self.h1, self.h2)
+        self.assertEqual(self.proxy_arp.answered, 1)
+        self.assertEqual(len(connection.sent), 1)
+        packet_out = connection.sent[0]
+        self.assertEqual(packet_out.in_port, self.h1.link_to_sw.port)
+        self.assertEqual([action.port for action in packet_out.actions], [of.OFPP_IN_PORT])
+
+        reply = ethernet(packet_out.data)
+        self.assertEqual(reply.type, ethernet.ARP_TYPE)
+        self.assertEqual((reply.src, reply.dst), (EthAddr(self.h2.mac), EthAddr(self.h1.mac)))
+        self.assertEqual(reply.payload.opcode, arp.REPLY)
+        self.assertEqual(reply.payload.hwsrc, EthAddr(self.h2.mac))
+        self.assertEqual(reply.payload.protosrc, IPAddr(self.h2.ip))
+        self.assertEqual(reply.payload.hwdst, EthAddr(self.h1.mac))
+        self.assertEqual(reply.payload.protodst, IPAddr(self.h1.ip))
+
+    def test_learns_the_sender(self):
+        self.request(self.h1, self.h2)
+        self.assertEqual(self.proxy_arp.get_mac(IPAddr(self.h1.ip)), self.h1.mac)
+
+    def test_no_reply_for_a_host_not_connected(self):
+        self.proxy_arp.learn(IPAddr(self.h2.ip), self.h2.mac)
+        del self.hosts[self.h2.mac]
+        self.request(self.h1, self.h2)
+        self.assertEqual((self.proxy_arp.answered, self.proxy_arp.flooded), (0, 1))
+
+    def test_unknown_ip_flooded_only_to_the_ports_not_linked_to_a_switch(self):
+        self.request(self.h1, self.h2)
+        self.assertEqual(self.proxy_arp.flooded, 1)
+        flooded_ports = dict(
+            (dpid, [action.port for packet_out in packet_outs for action in packet_out.actions])
+            for dpid, packet_outs in self.sent_packet_outs().items()
+        )
+        self.assertEqual(flooded_ports, {
+            sw_of(self.switches, 1).dpid: [],   # the port of the request is left out
+            sw_of(self.switches, 2).dpid: [],
+            sw_of(self.switches, 3).dpid: [6],  # reaches the host that did not send anything yet
+            sw_of(self.switches, 4).dpid: [],
+            sw_of(self.switches, 5).dpid: [2, 4],
+        })
+
+    def test_forget(self):
+        self.proxy_arp.learn(IPAddr(self.h2.ip), self.h2.mac)
+        self.proxy_arp.forget(self.h2.mac)
+        self.assertIsNone(self.proxy_arp.get_mac(IPAddr(self.h2.ip)))
+
+
+class FakeConnectionDown:
+    def __init__(self, dpid):
+        self.dpid = dpid
+
+
+class ProxyArpOnControllerTest(unittest.TestCase):
+    def test_hosts_of_a_switch_down_forgotten(self):
+        simulator = Simulator(3, proxy_arp=True)
+        simulator.start()
+        proxy_arp = simulator.controller.proxy_arp
+        for host in simulator.hosts:
+            proxy_arp.learn(IPAddr(host.ip), host.mac)
+        down_dpid = simulator.hosts[0].link_to_sw.sw.connection.dpid
+        simulator.controller._handle_ConnectionDown(FakeConnectionDown(down_dpid))
+        for host in simulator.hosts:
+            if host.link_to_sw.sw_dpid == dpid_to_str(down_dpid):
+                self.assertNotIn(host.mac, proxy_arp.ips)
+                self.assertNotIn(IPAddr(host.ip), proxy_arp.macs)
+            else:
+                self.assertEqual(proxy_arp.macs[IPAddr(host.ip)], host.mac)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,48 @@
+import unittest
+from helpers import build_topology, sw_of, DIAMOND_LINKS
+
+from extensions.shortest_paths_dag import ShortestPathsDag
+
+
+class ShortestPathsDagTest(unittest.TestCase):
+    def setUp(self):
+        self.graph, self.switches = build_topology(DIAMOND_LINKS)
+        self.dag = ShortestPathsDag(self.graph, sw_of(self.switches, 1))
+
+    def hops(self, path):
+        return [(sw.dpid, port) for sw, port in path]
+
+    def test_distances(self):
+        self.assertEqual([self.dag.distance_to(sw_of(self.switches, dpid)) for dpid in range(1, 6)], [0, 1, 1, 2, 3])
+
+    def test_every_equal_cost_path(self):
+        paths = sorted(self.hops(path) for path in self.dag.get_paths_to(sw_of(self.switches, 5)))
+        self.assertEqual(paths, [
+            [(sw_of(self.switches, 1).dpid, 1), (sw_of(self.switches, 2).dpid, 2),
+             (sw_of(self.switches, 4).dpid, 3), (sw_of(self.switches, 5).dpid, None)],
+            [(sw_of(self.switches, 1).dpid, 2), (sw_of(self.switches, 3).dpid, 2),
+             (sw_of(self.switches, 4).dpid, 3), (sw_of(self.switches, 5).dpid, None)],
+        ])
+
+    def test_next_ports_to_origin(self):
+        self.assertEqual(sorted(self.dag.next_ports_to_origin(sw_of(self.switches, 4))), [1, 2])
+        self.assertEqual(self.dag.next_ports_to_origin(sw_of(self.switches, 5)), [1])
+        self.assertEqual(self.dag.next_ports_to_origin(sw_of(self.switches, 1)), [])
+
+    def test_no_paths_to_the_origin(self):
+        self.assertEqual(list(self.dag.get_paths_to(sw_of(self.switches, 1))), [])
+
+    def test_unreachable_switch(self):
+        graph, switches = build_topology(DIAMOND_LINKS + [(6, 1, 7, 1)])
+        dag = ShortestPathsDag(graph, sw_of(switches, 1))
+        self.assertIsNone(dag.distance_to(sw_of(switches, 6)))
+        self.assertEqual(dag.next_ports_to_origin(sw_of(switches, 6)), [])
+        self.assertEqual(list(dag.get_paths_to(sw_of(switches, 6))), [])
+
+    def test_switch_added_after_it_is_unreachable(self):
+        _, switches = build_topology([(6, 1, 7, 1)], self.graph)
+        self.assertIsNone(self.dag.distance_to(sw_of(switches, 6)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+import unittest
+from helpers import build_topology, sw_of, DIAMOND_LINKS
+
+from extensions.shortest_paths_finder import ShortestPathsFinder
+
+
+class IncrementalShortestPathsTest(unittest.TestCase):
+    """The paths updated on every link change must be the ones of a full recompute"""
+    def setUp(self):
+        self.graph, self.switches = build_topology(DIAMOND_LINKS)
+        self.finder = ShortestPathsFinder(self.switches, self.graph, incremental=True)
+        for dpid in [1, 5]:     # the switches linked to a host
+            self.finder.notifyHostAdded(sw_of(self.switches, dpid).dpid)
+
+    def paths(self, finder, origin, destiny):
+        return sorted(
+            [(sw.dpid, port) for sw, port in path]
+            for path in finder.get_paths(sw_of(self.switches, origin).dpid, sw_of(self.switches, destiny).dpid)
+        )
+
+    def assertSameAsRecomputed(self):
+        recomputed = ShortestPathsFinder(self.switches, self.graph)
+        for sw_dpid in self.finder.hosts_per_sw:
+            recomputed.notifyHostAdded(sw_dpid)
+        for origin, destiny in [(1, 5), (5, 1)]:
+            self.assertEqual(self.paths(self.finder, origin, destiny), self.paths(recomputed, origin, destiny))
+
+    def remove_link(self, dpid_1, port_1, dpid_2, port_2):
+        sw_1, sw_2 = sw_of(self.switches, dpid_1), sw_of(self.switches, dpid_2)
+        self.graph.remove_link(sw_1, port_1, sw_2, port_2)
+        self.finder.notifyLinkRemoved(sw_1, sw_2)
+
+    def add_link(self, dpid_1, port_1, dpid_2, port_2):
+        sw_1, sw_2 = sw_of(self.switches, dpid_1), sw_of(self.switches, dpid_2)
+        self.graph.add_link(sw_1, port_1, sw_2, port_2)
+        self.finder.notifyLinkAdded(sw_1, sw_2)
+
+    def test_both_equal_cost_paths(self):
+        self.assertEqual(len(self.paths(self.finder, 1, 5)), 2)
+        self.assertSameAsRecomputed()
+
+    def test_link_of_a_path_removed(self):
+        self.remove_link(2, 2, 4, 1)
+        self.assertEqual(len(self.paths(self.finder, 1, 5)), 1)
+        self.assertSameAsRecomputed()
+
+    def test_link_of_a_path_added_again(self):
+        self.remove_link(2, 2, 4, 1)
+        self.add_link(2, 2, 4, 1)
+        self.assertEqual(len(self.paths(self.finder, 1, 5)), 2)
+        self.assertSameAsRecomputed()
+
+    def test_link_between_switches_at_the_same_distance(self):
+        self.add_link(2, 3, 3, 3)
+        self.assertSameAsRecomputed()
+
+    def test_shortcut_added(self):
+        self.add_link(1, 3, 4, 4)
+        self.assertEqual(len(self.paths(self.finder, 1, 5)), 1)
+        self.assertSameAsRecomputed()
+
+    def test_only_link_to_a_switch_removed(self):
+        self.remove_link(4, 3, 5, 1)
+        self.assertEqual(self.paths(self.finder, 1, 5), [])
+        self.assertSameAsRecomputed()
+
+
+class PathsEnumerationTest(unittest.TestCase):
+    """The recompute only builds the dags, the paths of a pair are enumerated when asked for"""
+    def setUp(self):
+        self.graph, self.switches = build_topology(DIAMOND_LINKS)
+        self.finder = ShortestPathsFinder(self.switches, self.graph)
+        self.sw_1, self.sw_5 = sw_of(self.switches, 1), sw_of(self.switches, 5)
+        for sw in [self.sw_1, self.sw_5]:
+            self.finder.notifyHostAdded(sw.dpid)
+
+    def test_paths_enumerated_only_when_asked_for(self):
+        self.assertEqual(self.finder.shortest_paths, {})
+        self.assertEqual(len(self.finder.get_paths(self.sw_1.dpid, self.sw_5.dpid)), 2)
+        self.assertEqual(list(self.finder.shortest_paths), [self.sw_1.dpid])
+
+    def test_no_paths_to_a_switch_without_hosts(self):
+        self.assertEqual(self.finder.get_paths(self.sw_1.dpid, sw_of(self.switches, 4).dpid), [])
+
+    def test_exported_without_being_enumerated(self):
+        exported = self.finder.export_paths()
+        self.assertEqual(sorted(exported[self.sw_1.dpid][self.sw_5.dpid]), sorted(
+            [(sw.dpid, port) for sw, port in path] for path in self.finder.get_paths(self.sw_1.dpid, self.sw_5.dpid)
+        ))
+        self.assertEqual(len(exported[self.sw_5.dpid][self.sw_1.dpid]), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
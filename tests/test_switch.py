@@ -0,0 +1,121 @@
+import unittest
+import helpers
+
+import pox.openflow.libopenflow_01 as of
+from pox.lib.addresses import IPAddr
+from common import FakeConnection
+from extensions.flow import Flow
+from extensions.switch import Switch
+
+H1, H2, H3 = '00:00:00:00:00:01', '00:00:00:00:00:02', '00:00:00:00:00:03'
+
+
+class RecordingSwitch(Switch):
+    """Keeps the flow mods it sends, but the ones of the flow entries, which are sent already packed"""
+    __slots__ = ('flow_mods',)
+
+    def __init__(self, *args):
+        super(RecordingSwitch, self).__init__(*args)
+        self.flow_mods = []
+
+    def _send_flow_mod(self, flow_mod):
+        self.flow_mods.append(flow_mod)
+        super(RecordingSwitch, self)._send_flow_mod(flow_mod)
+
+
+class SwitchEntriesTest(unittest.TestCase):
+    def setUp(self):
+        self.sw = RecordingSwitch('00-00-00-00-00-01', FakeConnection(1))
+        self.flow = Flow.intern(IPAddr('10.0.0.1'), 1234, IPAddr('10.0.0.2'), 80, 6)
+        self.other_flow = Flow.intern(IPAddr('10.0.0.3'), 1234, IPAddr('10.0.0.2'), 80, 6)
+
+    def assertIndexesConsistent(self):
+        self.assertEqual(
+            sorted(map(id, self.sw.entries_by_flow.values())), sorted(map(id, self.sw.flow_table.entries))
+        )
+        by_port = dict(
+            (flow_key, (port, entry))
+            for port, entries in self.sw.entries_by_port.items() for flow_key, entry in entries.items()
+        )
+        self.assertEqual(
+            by_port, dict((key, (entry.actions[0].port, entry)) for key, entry in self.sw.entries_by_flow.items())
+        )
+        self.assertNotIn({}, list(self.sw.entries_by_port.values()))
+
+    def test_add(self):
+        self.sw.add_action_output(self.flow, 1)
+        self.assertEqual(self.sw.entries_by_flow[self.flow.key()].actions[0].port, 1)
+        self.assertEqual(list(self.sw.entries_by_port[1]), [self.flow.key()])
+        self.assertEqual(len(self.sw.connection.sent), 1)
+        self.assertIndexesConsistent()
+
+    def test_replace_moves_the_entry_to_the_new_port(self):
+        self.sw.add_action_output(self.flow, 1)
+        self.sw.add_action_output(self.flow, 2)
+        self.assertEqual(len(self.sw.entries_by_flow), 1)
+        self.assertNotIn(1, self.sw.entries_by_port)
+        self.assertEqual(list(self.sw.entries_by_port[2]), [self.flow.key()])
+        self.assertEqual(len(self.sw.flow_table.entries), 1)
+        self.assertIndexesConsistent()
+
+    def test_remove(self):
+        self.sw.add_action_output(self.flow, 1)
+        self.sw.add_action_output(self.other_flow, 1)
+        self.sw.remove_action_output(self.flow)
+        self.assertEqual(list(self.sw.entries_by_flow), [self.other_flow.key()])
+        self.assertEqual(list(self.sw.entries_by_port[1]), [self.other_flow.key()])
+        self.assertEqual(self.sw.flow_mods[-1].command, of.OFPFC_DELETE_STRICT)
+        match = self.sw.flow_mods[-1].match
+        self.assertEqual((match.nw_src, match.tp_src), (self.flow.src_ip, self.flow.src_port))
+        self.assertIndexesConsistent()
+
+    def test_remove_not_installed_sends_nothing(self):
+        self.sw.remove_action_output(self.flow)
+        self.assertEqual(self.sw.connection.sent, [])
+
+    def test_remove_entries_through_a_port(self):
+        self.sw.add_action_output(self.flow, 1)
+        self.sw.add_action_output(self.other_flow, 2)
+        self.sw.set_backup_output(self.flow, 2)
+        self.sw.set_backup_output(self.other_flow, 1)
+        self.sw.set_destination_output(H1, 1)
+        self.sw.set_destination_output(H2, 2)
+        self.sw.set_host_pair_output(H1, H3, 1)
+        self.sw.set_host_pair_output(H3, H2, 2)
+        sent = len(self.sw.flow_mods)
+
+        self.sw.remove_entries_through(1)
+        self.assertEqual(list(self.sw.entries_by_flow), [self.other_flow.key()])
+        self.assertEqual(self.sw.backup_ports, {self.flow.key(): 2})
+        self.assertEqual(self.sw.destination_ports, {H2: 2})
+        self.assertEqual(self.sw.host_pair_ports, {(H3, H2): 2})
+        self.assertIndexesConsistent()
+        # a single delete of whatever outputs to the port
+        flow_mods = self.sw.flow_mods[sent:]
+        self.assertEqual(len(flow_mods), 1)
+        self.assertEqual(flow_mods[0].command, of.OFPFC_DELETE)
+        self.assertEqual(flow_mods[0].out_port, 1)
+
+    def test_destination_entries(self):
+        self.sw.set_destination_output(H1, 1)
+        self.sw.set_destination_output(H1, 1)
+        self.sw.set_destination_output(H1, 2)
+        self.assertEqual(self.sw.destination_ports, {H1: 2})
+        self.assertEqual(
+            [flow_mod.command for flow_mod in self.sw.flow_mods], [of.OFPFC_ADD, of.OFPFC_MODIFY_STRICT]
+        )
+        self.sw.remove_destination_output(H1)
+        self.sw.remove_destination_output(H1)
+        self.assertEqual(self.sw.destination_ports, {})
+        self.assertEqual(len(self.sw.flow_mods), 3)
+
+    def test_host_pair_entries_of_a_host_removed(self):
+        self.sw.set_host_pair_output(H1, H2, 1)
+        self.sw.set_host_pair_output(H2, H1, 2)
+        self.sw.set_host_pair_output(H2, H3, 3)
+        self.sw.remove_host_pair_outputs(H1)
+        self.assertEqual(self.sw.host_pair_ports, {(H2, H3): 3})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+import unittest
+from helpers import build_topology, sw_of, DIAMOND_LINKS
+
+from extensions.topology_graph import bfs, iter_jumps
+
+
+class TopologyGraphTest(unittest.TestCase):
+    def setUp(self):
+        self.graph, self.switches = build_topology(DIAMOND_LINKS)
+        self.sw_1, self.sw_2, self.sw_3, self.sw_4, self.sw_5 = [sw_of(self.switches, dpid) for dpid in range(1, 6)]
+
+    def test_links_kept_in_sync_with_the_switches(self):
+        self.assertEqual(self.sw_2.get_switch_linked_on(2), self.sw_4)
+        self.assertEqual(self.sw_4.get_port_to(self.sw_2), 1)
+        self.assertEqual(self.graph.port_between(self.graph.id_of(self.sw_2), self.graph.id_of(self.sw_4)), 2)
+
+    def test_remove_link(self):
+        self.graph.remove_link(self.sw_2, 2, self.sw_4, 1)
+        self.assertIsNone(self.sw_2.get_switch_linked_on(2))
+        self.assertIsNone(self.sw_4.get_port_to(self.sw_2))
+        self.assertNotIn(self.graph.id_of(self.sw_4), self.graph.adjacency[self.graph.id_of(self.sw_2)])
+        self.assertNotIn(self.graph.id_of(self.sw_2), self.graph.adjacency[self.graph.id_of(self.sw_4)])
+
+    def test_parallel_link_takes_the_place_of_the_removed_one(self):
+        self.graph.add_link(self.sw_2, 4, self.sw_4, 4)
+        self.assertEqual(self.graph.port_between(self.graph.id_of(self.sw_2), self.graph.id_of(self.sw_4)), 4)
+        self.graph.remove_link(self.sw_2, 4, self.sw_4, 4)
+        self.assertEqual(self.sw_2.get_port_to(self.sw_4), 2)
+        self.assertEqual(self.sw_4.get_port_to(self.sw_2), 1)
+        self.assertEqual(self.graph.port_between(self.graph.id_of(self.sw_2), self.graph.id_of(self.sw_4)), 2)
+        self.assertEqual(self.graph.port_between(self.graph.id_of(self.sw_4), self.graph.id_of(self.sw_2)), 1)
+        self.assertEqual(self.graph.adjacency[self.graph.id_of(self.sw_2)].count(self.graph.id_of(self.sw_4)), 1)
+
+    def test_parallel_link_not_used_removed(self):
+        self.graph.add_link(self.sw_2, 4, self.sw_4, 4)
+        self.graph.remove_link(self.sw_2, 2, self.sw_4, 1)
+        self.assertIsNone(self.sw_2.get_switch_linked_on(2))
+        self.assertEqual(self.graph.port_between(self.graph.id_of(self.sw_2), self.graph.id_of(self.sw_4)), 4)
+        self.assertEqual(self.graph.port_between(self.graph.id_of(self.sw_4), self.graph.id_of(self.sw_2)), 4)
+
+    def test_remove_switch_unlinks_its_parallel_links(self):
+        self.graph.add_link(self.sw_2, 4, self.sw_4, 4)
+        self.graph.remove_switch(self.sw_4)
+        self.assertEqual(list(self.sw_2.get_links()), [(1, self.sw_1)])
+
+    def test_remove_switch_unlinks_its_neighbors(self):
+        sw_4_id = self.graph.id_of(self.sw_4)
+        self.graph.remove_switch(self.sw_4)
+        for sw in [self.sw_2, self.sw_3, self.sw_5]:
+            self.assertNotIn(self.sw_4, sw.get_linked_switches())
+            self.assertIsNone(sw.get_port_to(self.sw_4))
+            self.assertNotIn(sw_4_id, self.graph.adjacency[self.graph.id_of(sw)])
+        self.assertEqual(list(self.sw_4.get_links()), [])
+        self.assertEqual(self.graph.adjacency[sw_4_id], [])
+
+    def test_switch_keeps_its_id_when_it_comes_up_again(self):
+        sw_4_id = self.graph.id_of(self.sw_4)
+        self.graph.remove_switch(self.sw_4)
+        self.assertEqual(self.graph.add_switch(self.sw_4), sw_4_id)
+        self.assertEqual(len(self.graph), 5)
+
+
+class BfsTest(unittest.TestCase):
+    def setUp(self):
+        # 0 - 1 - 3 - 4 and 0 - 2 - 3, 5 not linked
+        self.adjacency = [[1, 2], [0, 3], [0, 3], [1, 2, 4], [3], []]
+        self.ports = [{1: 1, 2: 2}, {0: 1, 3: 2}, {0: 1, 3: 2}, {1: 1, 2: 2, 4: 3}, {3: 1}, {}]
+
+    def test_distances(self):
+        distances, _ = bfs(self.adjacency, 0)
+        self.assertEqual(list(distances), [0, 1, 1, 2, 3, -1])
+
+    def test_predecessors_of_every_shortest_path(self):
+        _, predecessors = bfs(self.adjacency, 0)
+        self.assertEqual(sorted(predecessors[3]), [1, 2])
+        self.assertEqual(predecessors[4], [3])
+        self.assertIsNone(predecessors[5])
+
+    def test_iter_jumps(self):
+        _, predecessors = bfs(self.adjacency, 0)
+        self.assertEqual(sorted(iter_jumps(predecessors, self.ports, 0, 4)), [
+            ((0, 1), (1, 2), (3, 3)),
+            ((0, 2), (2, 2), (3, 3)),
+        ])
+        self.assertEqual(list(iter_jumps(predecessors, self.ports, 0, 0)), [()])
+
+
+if __name__ == '__main__':
+    unittest.main()
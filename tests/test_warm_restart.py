@@ -0,0 +1,143 @@
+import gzip
+import json
+import os
+import shutil
+import tempfile
+import unittest
+import helpers
+
+import pox.openflow.libopenflow_01 as of
+from pox.lib.packet import ethernet
+from pox.lib.addresses import ETHER_BROADCAST
+from extensions import warm_restart
+from simulator import Simulator, FakeConnectionUp
+
+LEVELS = 3
+
+
+class FakeTimer:
+    """Records the timers instead of scheduling them on pox"""
+    timers = []
+
+    def __init__(self, seconds, callback, recurring=False):
+        FakeTimer.timers.append(callback)
+
+
+class FlowStats:
+    def __init__(self, match, actions, priority=of.OFP_DEFAULT_PRIORITY, cookie=0):
+        self.match = match
+        self.actions = actions
+        self.priority = priority
+        self.cookie = cookie
+
+
+class WarmRestartTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.filename = os.path.join(self.directory, 'checkpoint.json.gz')
+        self.real_timer, warm_restart.Timer = warm_restart.Timer, FakeTimer
+        FakeTimer.timers = []
+
+    def tearDown(self):
+        warm_restart.Timer = self.real_timer
+        shutil.rmtree(self.directory)
+
+    def save_checkpoint(self):
+        simulator = Simulator(LEVELS, checkpoint_file=self.filename)
+        simulator.start()
+        simulator.replay_packet_ins(simulator.build_packet_ins(200, 40))
+        simulator.controller.warm_restart.save(wait=True)
+        return simulator.controller
+
+    def restart(self):
+        """A controller that loads the checkpoint and sees its switches reconnect, before any discovery"""
+        simulator = Simulator(LEVELS, checkpoint_file=self.filename)
+        simulator.controller.warm_restart.start()
+        for dpid, connection in sorted(simulator.connections.items()):
+            simulator.controller._handle_ConnectionUp(FakeConnectionUp(dpid, connection))
+        return simulator.controller
+
+    def links_of(self, controller):
+        return sorted(
+            (sw.dpid, port, linked_sw.dpid) for sw in controller.switches.values() for port, linked_sw in sw.get_links()
+        )
+
+    def paths_of(self, controller):
+        return dict(
+            (flow.key(), [(sw.dpid, port) for sw, port in path])
+            for flow, path in controller.installed_flows.paths.items()
+        )
+
+    def flow_tables_of(self, controller):
+        return dict(
+            (sw.dpid, dict((flow_key, entry.actions[0].port) for flow_key, entry in sw.entries_by_flow.items()))
+            for sw in controller.switches.values()
+        )
+
+    def test_round_trip(self):
+        old = self.save_checkpoint()
+        new = self.restart()
+        self.assertTrue(new.warm_restart.restoring)
+        self.assertEqual(self.links_of(new), self.links_of(old))
+        self.assertEqual(
+            dict((mac, (link.sw_dpid, link.port)) for mac, link in new.hosts.items()),
+            dict((mac, (link.sw_dpid, link.port)) for mac, link in old.hosts.items())
+        )
+        self.assertEqual(self.paths_of(new), self.paths_of(old))
+        self.assertEqual(self.flow_tables_of(new), self.flow_tables_of(old))
+
+    def hops_of(self, controller, origin, destiny):
+        return sorted([(sw.dpid, port) for sw, port in path] for path in controller.paths_finder.get_paths(origin, destiny))
+
+    def test_restored_paths_served_before_they_are_calculated(self):
+        old = self.save_checkpoint()
+        new = self.restart()
+        for origin in old.paths_finder.hosts_per_sw:
+            for destiny in old.paths_finder.hosts_per_sw:
+                if origin != destiny:
+                    self.assertEqual(self.hops_of(new, origin, destiny), self.hops_of(old, origin, destiny))
+
+    def test_reconcile_forgets_the_flows_of_lost_entries(self):
+        old = self.save_checkpoint()
+        new = self.restart()
+        sw_dpid, entries = max(old.switches.items(), key=lambda item: len(item[1].entries_by_flow))
+        flows_stats = [FlowStats(entry.match, entry.actions) for entry in entries.entries_by_flow.values()]
+        lost = flows_stats.pop()
+        new.warm_restart.update(sw_dpid, flows_stats)
+        self.assertEqual(new.warm_restart.lost_entries, 1)
+        lost_key = (lost.match.nw_proto, lost.match.nw_src, lost.match.tp_src, lost.match.nw_dst, lost.match.tp_dst)
+        self.assertNotIn(lost_key, new.switches[sw_dpid].entries_by_flow)
+        self.assertNotIn(lost_key, self.paths_of(new))
+
+    def test_reconcile_ignores_the_entries_not_of_ip(self):
+        self.save_checkpoint()
+        new = self.restart()
+        sw = sorted(new.switches.values(), key=lambda sw: sw.dpid)[0]
+        restored = dict(sw.entries_by_flow)
+        arp_redirect = FlowStats(
+            of.ofp_match(dl_type=ethernet.ARP_TYPE, dl_dst=ETHER_BROADCAST),
+            [of.ofp_action_output(port=of.OFPP_CONTROLLER)]
+        )
+        new.warm_restart.update(sw.dpid, [arp_redirect] + [
+            FlowStats(entry.match, entry.actions) for entry in restored.values()
+        ])
+        self.assertEqual(sw.entries_by_flow, restored)
+
+    def test_malformed_checkpoint_starts_cold(self):
+        self.save_checkpoint()
+        with gzip.open(self.filename, 'rb') as checkpoint:
+            state = json.loads(checkpoint.read().decode('utf-8'))
+        sw_dpid = sorted(state['flow_tables'])[0]
+        state['flow_tables'][sw_dpid].append([6, 'None', 1234, '10.0.0.1', 80, 1])
+        with gzip.open(self.filename, 'wb') as checkpoint:
+            checkpoint.write(json.dumps(state).encode('utf-8'))
+
+        new = self.restart()
+        self.assertFalse(new.warm_restart.restoring)
+        self.assertEqual(new.hosts, {})
+        self.assertEqual(len(new.installed_flows), 0)
+        self.assertEqual(self.links_of(new), [])
+
+
+if __name__ == '__main__':
+    unittest.main()